@@ -4,18 +4,19 @@ Clean architecture, robust parsing, and a chonky fox persona.
 """
 
 import streamlit as st
-from google import genai
-from google.genai import types
-import fitz  # PyMuPDF
-import requests
 import base64
 import os
-import json
-import re
-try:
-    from streamlit_pdf_viewer import pdf_viewer
-except ImportError:
-    pdf_viewer = None
+
+from tal import config
+from tal.agent import TalAgent
+from tal.blobs import blobs
+from tal.companies import company_profiles
+from tal.compile import compile_stats
+from tal.jobs import jobs, report_error
+from tal.pipeline import build_resume, fan_out, prefetch, split_jds
+from tal.preview import placeholder_pages, request_pages
+from tal.resources import run_in_loop
+from tal.telemetry import new_trace_id, set_trace, span, start_metrics_server, trace_spans
 
 # ─────────────────────────────────────────────────────────────
 # CONFIGURATION & CSS
@@ -28,7 +29,7 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
-st.markdown("""
+APP_CSS = """
 <style>
     /* Main container spacing */
     .block-container {
@@ -81,470 +82,22 @@ st.markdown("""
     #MainMenu {visibility: hidden;}
     footer {visibility: hidden;}
 </style>
-""", unsafe_allow_html=True)
+"""
+# Streamlit drops elements that a rerun doesn't emit, so the CSS is sent every run (it's a constant string)
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # ─────────────────────────────────────────────────────────────
-# CONSTANTS & TEMPLATES
+# CONSTANTS
 # ─────────────────────────────────────────────────────────────
 
-MODEL_NAME = "gemini-3-pro-preview"
 TAL_AVATAR = "assets/tal_avatar.png" if os.path.exists("assets/tal_avatar.png") else "🦊"
 USER_AVATAR = "assets/user_avatar.png" if os.path.exists("assets/user_avatar.png") else "👤"
 
-LATEX_TEMPLATE = r"""% Jake's Resume Template - ATS Optimized
-\documentclass[letterpaper,11pt]{article}
-\usepackage{latexsym}
-\usepackage[empty]{fullpage}
-\usepackage{titlesec}
-\usepackage{marvosym}
-\usepackage[usenames,dvipsnames]{color}
-\usepackage{verbatim}
-\usepackage{enumitem}
-\usepackage{fancyhdr}
-\usepackage[english]{babel}
-\usepackage{tabularx}
-\usepackage{fontawesome5}
-\usepackage{multicol}
-\setlength{\multicolsep}{-3.0pt}
-\setlength{\columnsep}{-1pt}
-\usepackage[colorlinks=true, urlcolor=royalblue, linkcolor=royalblue]{hyperref}
-
-\pagestyle{fancy}
-\fancyhf{}
-\fancyfoot{}
-\renewcommand{\headrulewidth}{0pt}
-\renewcommand{\footrulewidth}{0pt}
-
-\addtolength{\oddsidemargin}{-0.6in}
-\addtolength{\evensidemargin}{-0.5in}
-\addtolength{\textwidth}{1.19in}
-\addtolength{\topmargin}{-.7in}
-\addtolength{\textheight}{1.4in}
-
-\urlstyle{same}
-\raggedbottom
-\raggedright
-\setlength{\tabcolsep}{0in}
-
-% Sections formatting
-\titleformat{\section}{
-  \vspace{-4pt}\scshape\raggedright\large\bfseries
-}{}{0em}{}[\color{black}\titlerule \vspace{-5pt}]
-
-\pdfgentounicode=1
-
-% Custom Bullet Size Command - Re-definable by AI
-\newcommand{\resumeBulletSize}{\small} 
-
-\newcommand{\resumeItem}[1]{
-  \item\resumeBulletSize{
-    {#1 \vspace{-2pt}}
-  }
-}
-
-\newcommand{\resumeSubheading}[4]{
-  \vspace{-2pt}\item
-    \begin{tabular*}{1.0\textwidth}[t]{l@{\extracolsep{\fill}}r}
-      \textbf{#1} & \textbf{\small #2} \\
-      \textit{\small#3} & \textit{\small #4} \\
-    \end{tabular*}\vspace{-7pt}
-}
-
-\newcommand{\resumeProjectHeading}[2]{
-    \item
-    \begin{tabular*}{1.0\textwidth}{l@{\extracolsep{\fill}}r}
-      \small#1 & \textbf{\small #2} \\
-    \end{tabular*}\vspace{-7pt}
-}
-
-\newcommand{\resumeSubItem}[1]{\resumeItem{#1}\vspace{-4pt}}
-\renewcommand\labelitemii{$\vcenter{\hbox{\tiny$\bullet$}}$}
-\newcommand{\resumeSubHeadingListStart}{\begin{itemize}[leftmargin=0.0in, label={}]}
-\newcommand{\resumeSubHeadingListEnd}{\end{itemize}}
-\newcommand{\resumeItemListStart}{\begin{itemize}}
-\newcommand{\resumeItemListEnd}{\end{itemize}\vspace{-5pt}}
-
-\begin{document}
-
-% HEADER
-\begin{center}
-    {\Huge \scshape FULL_NAME} \\ \vspace{2pt}
-    {\hypersetup{urlcolor=black} \small CONTACT_INFO}
-\end{center}
-
-% EDUCATION
-\section{Education}
-  \resumeSubHeadingListStart
-    EDUCATION_CONTENT
-  \resumeSubHeadingListEnd
-
-% EXPERIENCE
-\section{Experience}
-  \resumeSubHeadingListStart
-    EXPERIENCE_CONTENT
-  \resumeSubHeadingListEnd
-
-% PROJECTS
-\section{Projects}
-    \resumeSubHeadingListStart
-      PROJECTS_CONTENT
-    \resumeSubHeadingListEnd
-
-% SKILLS
-\section{Technical Skills}
- \begin{itemize}[leftmargin=0.15in, label={}]
-    \small{\item{
-     SKILLS_CONTENT
-    }}
- \end{itemize}
-
-\end{document}
-"""
-
-# ─────────────────────────────────────────────────────────────
-# CORE LOGIC
-# ─────────────────────────────────────────────────────────────
-
-class TalAgent:
-    def __init__(self):
-        try:
-            self.client = genai.Client(api_key=st.secrets["GEMINI_API_KEY"])
-        except Exception:
-            st.error("Missing GEMINI_API_KEY in secrets.toml")
-            st.stop()
-
-    def extract_pdf_data(self, file) -> dict:
-        """Extract text, page count, and hyperlinks from PDF using PyMuPDF (fitz)."""
-        try:
-            # Read file bytes
-            file.seek(0)
-            pdf_bytes = file.read()
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            
-            text = ""
-            links = []
-            
-            for page in doc:
-                text += page.get_text() + "\n"
-                
-                # Extract Links (URI)
-                page_links = page.get_links()
-                for link in page_links:
-                    if "uri" in link:
-                        links.append(link["uri"])
-            
-            # Extract Text Links (Regex Fallback for non-hyperlinked text URLs)
-            raw_links = re.findall(r'(https?://[^\s\)\}\],]+)', text)
-            # Add https prefix to shorthand links if missing
-            raw_links += [f"https://{l}" if not l.startswith("http") else l for l in re.findall(r'(?:github\.com/[^\s\)\}\],]+)', text)]
-            raw_links += [f"https://{l}" if not l.startswith("http") else l for l in re.findall(r'(?:linkedin\.com/in/[^\s\)\}\],]+)', text)]
-            
-            all_links = sorted(list(set(links + raw_links)))
-            
-            return {
-                "text": text.strip(),
-                "pages": len(doc),
-                "links": all_links
-            }
-        except Exception as e:
-            st.error(f"Error reading PDF: {e}")
-            return {"text": "", "pages": 0, "links": []}
-
-    def analyze_resume(self, resume_text: str, jd_text: str) -> dict:
-        """
-        Perform deep analysis using the new Dynamic Strategy Engine.
-        Determines archetypes and creates a precise Execution Plan.
-        """
-        prompt = f"""
-        You are Tal, a brutal but genius career strategist.
-        
-        TASK 1: ARCHETYPE DETECTION (Using Search)
-        - Search Google for the company to determine its "Company Archetype":
-          - "Early Stage": <50 employees, chaos, needs builders/generalists.
-          - "Growth Stage": 50-500 employees, scaling, needs processes/specialists.
-          - "Corporate": >500 employees, stable, needs compliance/politics/depth.
-        - Determine the "Role Archetype" based on JD:
-          - "Engineering": Focus on stack, scale, complexity.
-          - "Product": Focus on user, metrics, strategy.
-          - "Growth/Marketing": Focus on CAC, revenue, experiments.
-          - "Research": Focus on patents, publications, novelty.
-          - "Generalist": Ops, Chief of Staff, Founder's Office.
-        
-        TASK 2: STRATEGY & CONTENT PLAN
-        - Define a "Role Translation Strategy": How to frame the candidate's past for *this* specific future.
-        - Create a strictly defined CONTENT PLAN for the resume generator to follow:
-          - **keep_sections**: Which sections MUST stay? (e.g. "Experience", "Projects").
-          - **drop_sections**: Which sections MUST go to save space? (e.g. "Volunteering", "Patents" if irrelevant).
-          - **top_projects**: Select exactly 2 strongest projects that match the JD best. Drop the rest.
-          - **bullet_strategy**: "Dense" (for corp), "Punchy" (for startup), "Technical" (for eng).
-        
-        TASK 3: GAP ANALYSIS
-        - **missing_hard_skills**: critical tech/tools missing (e.g. "Python", "Salesforce"). IGNORE soft skills.
-        - **irrelevant_terms**: Buzzwords to kill (e.g. "synergy", "kpi tracking").
-        
-        RESUME:
-        {resume_text[:10000]}
-        
-        JOB DESCRIPTION:
-        {jd_text[:5000]}
-        
-        Return a JSON object with this exact schema (all keys lowercase):
-        {{
-            "company_name": "extracted name",
-            "role_title": "extracted title",
-            "company_archetype": "early stage / growth stage / corporate",
-            "role_archetype": "engineering / product / growth / research / generalist",
-            "role_translation_strategy": "Direct strategy explanation to user (max 15 words)",
-            "content_plan": {{
-                "keep_sections": ["list", "of", "sections"],
-                "drop_sections": ["list", "of", "sections"],
-                "top_projects": ["project 1", "project 2"],
-                "bullet_guidelines": "specific instruction for bullet writing"
-            }},
-            "missing_keywords": ["list", "of", "hard", "skills"],
-            "irrelevant_skills": ["list", "of", "terms", "to", "cut"],
-            "good_points": [
-                {{"point": "strength", "why": "reason"}}
-            ],
-            "needs_fixing": [
-                {{"issue": "red flag", "impact": "consequence"}}
-            ],
-            "proposed_changes": [
-                {{"change": "action", "rationale": "reason"}}
-            ],
-            "score_before": 50,
-            "score_after": 90
-        }}
-        """
-        
-        try:
-            response = self.client.models.generate_content(
-                model=MODEL_NAME,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json",
-                    tools=[types.Tool(google_search=types.GoogleSearch())],
-                    temperature=0.3,
-                )
-            )
-            return json.loads(response.text)
-        except Exception as e:
-            st.error(f"Analysis failed: {e}")
-            return {
-                "company_name": "the company",
-                "role_title": "the role",
-                "company_archetype": "corporate",
-                "role_archetype": "generalist",
-                "role_translation_strategy": "Standard professional alignment",
-                "content_plan": {
-                    "keep_sections": ["Experience", "Education", "Projects"],
-                    "drop_sections": ["Volunteering"],
-                    "top_projects": ["Most recent project"],
-                    "bullet_guidelines": "Standard STAR method"
-                },
-                "missing_keywords": ["relevant skills"],
-                "irrelevant_skills": [],
-                "good_points": [{"point": "Experience matches", "why": "Relevant history"}],
-                "needs_fixing": [{"issue": "Generic descriptions", "impact": "Low impact"}],
-                "proposed_changes": [{"change": "Add metrics", "rationale": "Show value"}],
-                "score_before": 50,
-                "score_after": 80
-            }
-
-    def generate_cold_dm(self, resume_text: str, jd_text: str, company_name: str, analysis: dict = None) -> str:
-        """
-        Generate a highly targeted cold DM based on the Company Archetype.
-        """
-        
-        # Extract dynamic context
-        company_archetype = "growth stage"
-        role_archetype = "generalist"
-        strongest_point = "my background"
-        
-        if analysis:
-            company_archetype = analysis.get('company_archetype', 'growth stage').lower()
-            role_archetype = analysis.get('role_archetype', 'generalist').lower()
-            good_points = [p.get('point', '') for p in analysis.get('good_points', [])]
-            if good_points:
-                strongest_point = good_points[0].lower()
-
-        prompt = f"""
-        You are an elite career strategist.
-        
-        CONTEXT:
-        - Target Company: {company_name} ({company_archetype})
-        - Role: {role_archetype}
-        - Candidate's "Ace Card": "{strongest_point}"
-        
-        TASK: Write ONE high-impact Cold DM (max 50 words) to a Hiring Manager or Founder.
-        
-        TONE STRATEGY (Based on Archetype):
-        - If "Early Stage": "Builder Energy". Direct, slightly chaotic, "I ship fast", "I solve pain". Reference a specific problem they have.
-        - If "Growth Stage": "Value Energy". Quantitative, "I scaled X to Y", "I built the system you need". Reference their recent win/round.
-        - If "Corporate": "Professional Precision". Polished, "I specialize in [Domain]", "I led [Project] at [Top Firm]". Reference a strategic initiative.
-        
-        RESEARCH INSTRUCTIONS (Use Google Search):
-        1. Search for "{company_name} recent news", "{company_name} funding", "{company_name} product launch".
-        2. Find a SPECIFIC HOOK (e.g. "Series B raise", "New AI feature", "Expansion to US").
-        
-        STRUCTURE:
-        1. **The Hook**: "Saw you just launched X..." or "Congratz on the Series A..." (Show you know them).
-        2. **The Leverage**: "At [My Past Company], I built the exact system you need for Y..." (Connect YOUR ace card to THEIR problem).
-        3. **The Ask**: "Open to a 10-min intro?"
-        
-        CONSTRAINTS:
-        - NO fluff ("Hope you are well").
-        - NO generic praise ("Love what you're doing").
-        - STRICTLY under 50 words.
-        - All text must be lowercase (style choice).
-        
-        RESUME SUMMARY:
-        {resume_text[:2000]}
-        
-        JOB DESCRIPTION:
-        {jd_text[:2000]}
-        
-        Output only the message text.
-        """
-        
-        try:
-            response = self.client.models.generate_content(
-                model=MODEL_NAME,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    tools=[types.Tool(google_search=types.GoogleSearch())],
-                    temperature=0.7,
-                )
-            )
-            return response.text.strip().lower()
-        except Exception as e:
-            return f"hi [name], saw {company_name} is scaling {role_archetype} - i built similar systems at my last role. open to a 10-min chat? (search unavailable)"
-
-    def generate_latex_content(self, resume_text: str, jd_text: str, analysis: dict, links: list, max_pages: int = 1) -> str:
-        """
-        Generate LaTeX using the strict 'Brain & Hands' architecture.
-        The 'Hands' (this function) must purely execute the 'Brain's' (analysis) Content Plan.
-        """
-        
-        # Extract the Content Plan from the Brain
-        content_plan = analysis.get("content_plan", {})
-        keep_sections = content_plan.get("keep_sections", ["Experience", "Projects", "Education"])
-        drop_sections = content_plan.get("drop_sections", [])
-        top_projects = content_plan.get("top_projects", [])
-        bullet_guidelines = content_plan.get("bullet_guidelines", "Standard professional bullets")
-        
-        # Other Strategy Elements
-        company = analysis.get("company_name", "the company").lower()
-        role = analysis.get("role_title", "the role").lower()
-        strategy = analysis.get("role_translation_strategy", "Focus on impact").lower()
-        irrelevant_terms = [s.lower() for s in analysis.get("irrelevant_skills", [])]
-        
-        # Link Handling
-        clean_links = [str(l) for l in links if isinstance(l, str)]
-        links_str = "\n".join(clean_links)
-        
-        prompt = f"""
-        You are an obedient LaTeX generator. You have NO creative license. 
-        You must STRICTLY execute the provided CONTENT PLAN to build a 1-page resume.
-        
-        CONTENT PLAN (The Law):
-        1. **KEEP Sections**: {keep_sections} ONLY.
-        2. **DROP Sections**: {drop_sections} (Do NOT include these headers or content).
-        3. **PROJECTS**: Include ONLY these specific projects: {top_projects}. DELETE ALL OTHERS.
-        4. **BULLET STRATEGY**: {bullet_guidelines}.
-        5. **IRRELEVANT TERMS**: Remove mentions of: {irrelevant_terms}.
-        
-        STRATEGY ALIGNMENT:
-        - "Role Strategy": {strategy}
-        - "Anti-Hallucination": Do NOT invent skills. Only use what is in the input resume.
-        
-        LATEX RULES:
-        1. **One Page Limit (DRACONIAN)**:
-           - The resume MUST fit on exactly 1 page.
-           - **Project Limit**: STRICTLY MAX 2 PROJECTS. If the plan lists more, ignore them.
-           - **If content is DENSE**: Add `\\renewcommand{{\\resumeBulletSize}}{{\\footnotesize}}` immediately after `\\documentclass` to shrink bullet text.
-           - **If content is SPARSE (<85%)**: Write longer, more detailed descriptions to fill the page. Do NOT leave it empty.
-        2. **Header Formatting**:
-           - **Dynamic Icons**: Use `fontawesome5` icons ONLY for links that exist in the input.
-           - Format Example: `\\faEnvelope` email@domain.com $|$ `\\faLinkedin` LinkedIn $|$ `\\faGithub` GitHub
-           - **Rule**: If a link (like Portfolio) is missing, do NOT include its icon or separator.
-        3. **Formatting**:
-           - **Bold** key metrics (e.g. \\textbf{{$2M revenue}}, \\textbf{{30% growth}}).
-           - **Bold** hard skills (e.g. \\textbf{{Python}}, \\textbf{{React}}).
-           - Links: \\href{{url}}{{\\textbf{{display_text}}}} (Blue & Bold).
-        4. **Education Mandate**:
-           - Keep ALL education entries (University AND High School/Grade 12). Do not cut them.
-           - Keep ALL grades, CGPA, and percentages exactly as they appear in the input. Do NOT remove them.
-        5. **Links**:
-           - Use these links: {links_str}
-           - Exact match project names to links.
-        
-        INPUT RESUME:
-        {resume_text}
-        
-        TARGET JD:
-        {jd_text}
-        
-        LATEX TEMPLATE START:
-        {LATEX_TEMPLATE}
-        
-        OUTPUT:
-        Return ONLY the raw LaTeX code starting with \\documentclass.
-        """
-        
-        try:
-            response = self.client.models.generate_content(
-                model=MODEL_NAME,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.2, # Low temperature for strict execution
-                )
-            )
-            latex = response.text or ""
-            
-            # Post-processing cleanup
-            latex = re.sub(r"^```(?:latex|tex)?\s*\n", "", latex, flags=re.MULTILINE)
-            latex = re.sub(r"\n```\s*$", "", latex, flags=re.MULTILINE)
-            return latex.strip()
-            
-        except Exception as e:
-            st.error(f"Resume generation failed: {e}")
-            return LATEX_TEMPLATE.replace("FULL_NAME", "Error Generating Resume")
-
-    def compile_pdf(self, latex_content: str) -> tuple[bytes, str]:
-        """Try to compile LaTeX to PDF using external services."""
-        
-        # 1. Try latex.ytotech.com (Most robust for standard templates)
-        try:
-            resp = requests.post(
-                "https://latex.ytotech.com/builds/sync",
-                json={"compiler": "pdflatex", "resources": [{"main": True, "content": latex_content}]},
-                timeout=30
-            )
-            if resp.status_code in (200, 201):
-                return resp.content, None
-        except:
-            pass
-            
-        # 2. Try latexonline.cc
-        try:
-            import urllib.parse
-            encoded = urllib.parse.quote(latex_content)
-            # Check length to avoid 414
-            if len(encoded) < 8000:
-                url = f"https://latexonline.cc/compile?text={encoded}"
-                resp = requests.get(url, timeout=30)
-                if resp.status_code == 200:
-                    return resp.content, None
-        except:
-            pass
-            
-        return None, "Compilation failed. Please download the .tex file and use Overleaf."
-
 # ─────────────────────────────────────────────────────────────
 # UI HELPERS
 # ─────────────────────────────────────────────────────────────
 
+@st.cache_data(show_spinner=False)
 def img_to_base64(image_path):
     """Convert image to base64 for embedding in HTML."""
     try:
@@ -553,6 +106,92 @@ def img_to_base64(image_path):
     except Exception:
         return None
 
+@st.cache_resource(show_spinner=False)
+def load_agent(api_key: str) -> TalAgent:
+    """One agent per process; its Gemini client is created lazily on the first LLM call."""
+    start_metrics_server()  # no-op unless TAL_METRICS_PORT is set
+    agent = TalAgent(api_key=api_key, on_error=show_error)
+    company_profiles().start_refresher(agent.research_company_async, config.COMPANY_REFRESH_INTERVAL)
+    return agent
+
+def show_error(message: str):
+    """Agent errors. Jobs run on the background loop, with no page to show them on: there they fail the job."""
+    if not report_error(message):
+        st.error(message)
+
+@st.fragment(run_every=0.5)
+def follow_job(job_id: str, label: str):
+    """
+    Poll a background job and replay its progress. The script thread is free between polls, so other reruns
+    are served meanwhile; once the job finishes the whole app reruns to pick up the result.
+    """
+    job = jobs().get(job_id)
+    running = job is not None and job["status"] == "running"
+    with st.status(label, expanded=True, state="running" if running else "complete"):
+        for message in (job or {}).get("progress", []):
+            st.write(message)
+        if running and job["preview"]:
+            st.code("\n".join(job["preview"].splitlines()[-12:]), language="latex")
+    if not running:
+        st.rerun()
+
+def job_failed(key: str, job: dict) -> bool:
+    """Show a failed (or lost) job with a retry button; the retry submits it afresh."""
+    if job is not None and job["status"] != "failed":
+        return False
+    st.error(f"that didn't work: {job['error']}" if job else "lost track of that job (the server restarted?).")
+    if st.button("🔁 try again", use_container_width=True):
+        st.session_state.pop(key, None)
+        st.rerun()
+    return True
+
+def render_preview(pdf_bytes: bytes):
+    """
+    TAL_PREVIEW_MODE=images: page images rendered and cached server-side. A blurry low-res placeholder shows
+    at once; it is swapped for the full-resolution pages as soon as they are ready.
+    """
+    pending = request_pages(pdf_bytes)
+    slot = st.empty()
+    if not pending.done():
+        with slot.container():
+            for page in placeholder_pages(pdf_bytes):
+                st.image(page, use_container_width=True)
+    with slot.container():
+        for page in pending.result():
+            st.image(page, use_container_width=True)
+
+def load_pdf_viewer():
+    """streamlit_pdf_viewer is heavy to import and only needed on the result screen."""
+    try:
+        from streamlit_pdf_viewer import pdf_viewer
+    except ImportError:
+        return None
+    return pdf_viewer
+
+def render_debug_panel(trace_id: str, width: int = 24):
+    """Waterfall of this session's spans (TAL_DEBUG_PANEL=1)."""
+    spans = trace_spans(trace_id)
+    with st.sidebar.expander("debug: this session", expanded=False):
+        if not spans:
+            st.caption("no spans yet")
+            return
+        t0 = min(s["start"] for s in spans)
+        t1 = max(s["start"] + s["seconds"] for s in spans)
+        scale = width / max(t1 - t0, 1e-6)
+        depth = {}
+        rows = []
+        for s in sorted(spans, key=lambda s: s["start"]):
+            depth[s["span_id"]] = depth.get(s["parent_id"], -1) + 1
+            offset = int((s["start"] - t0) * scale)
+            bar = " " * offset + "█" * max(1, int(s["seconds"] * scale))
+            name = "  " * depth[s["span_id"]] + s["name"]
+            extra = " ".join(
+                f"{k}={s[k]}" for k in ("backend", "cache", "output_tokens", "retries") if k in s
+            )
+            flag = "" if s["status"] == "ok" else f" [{s['status']}]"
+            rows.append(f"{name[:30]:<30} {bar:<{width}} {s['seconds']:7.2f}s{flag} {extra}")
+        st.code("\n".join(rows), language="text")
+
 def render_chat_message(role, content, avatar=None):
     with st.chat_message(role, avatar=avatar):
         if role == "assistant":
@@ -625,6 +264,144 @@ def format_analysis_display(analysis: dict) -> str:
     lines.append(score_html)
     return "\n".join(lines)
 
+def stash(key: str, value):
+    """Keep a large value in the blob store; session state only holds its handle."""
+    store, session = blobs(), st.session_state.trace_id
+    if st.session_state.get(key):
+        store.release(session, st.session_state[key])
+    st.session_state[key] = store.put(value, session) if value is not None else None
+
+def unstash(key: str, default=None):
+    return blobs().get(st.session_state.get(key), default)
+
+def blob_file(handle: str):
+    """Deferred download data. An evicted blob raises, so the button reports a failed download, not an empty file."""
+    f = blobs().open(handle)
+    if f is None:
+        raise FileNotFoundError(f"{handle} has expired")
+    return f
+
+def restore_result(agent) -> bool:
+    """
+    Whether the result's blobs are still there. A tab left idle past TAL_BLOB_SESSION_TTL can have them swept:
+    the PDF is rebuilt from the LaTeX (usually straight from the compiled-PDF store); lost LaTeX can't be.
+    """
+    s = st.session_state
+    if s.latex_content and not blobs().exists(s.latex_content):
+        return False
+    if s.pdf_bytes and not blobs().exists(s.pdf_bytes):
+        pdf_bytes, s.compile_error = agent.compile_pdf(unstash("latex_content"))
+        stash("pdf_bytes", pdf_bytes)
+    return True
+
+def release_role(result: dict):
+    """Drop a multi-JD result's blobs."""
+    for field in ("pdf_bytes", "latex_content"):
+        if result.get(field):
+            blobs().release(st.session_state.trace_id, result[field])
+
+def jd_title(jd: str, width: int = 60) -> str:
+    """First non-empty line of a JD, as a placeholder role name until the analysis names it."""
+    line = next((l.strip() for l in jd.splitlines() if l.strip()), "")
+    return line if len(line) <= width else line[:width - 1] + "…"
+
+def render_role_result(result: dict):
+    """One role of a multi-JD run: downloads, compile errors and the cold dm."""
+    i = result["index"]
+    analysis = result.get("analysis") or {}
+    title = f"{i + 1}. {analysis.get('role_title', jd_title(st.session_state.jd_list[i]))} @ {analysis.get('company_name', '?')}"
+    with st.expander(title.lower()):
+        if result["status"] == "failed":
+            st.error(f"this one failed: {result.get('error')}")
+            return
+        st.caption(f"strategy: {analysis.get('role_translation_strategy', '').lower()}")
+        col1, col2 = st.columns(2)
+        with col1:
+            if result.get("pdf_bytes"):
+                st.download_button(
+                    "📥 download pdf", data=lambda: blob_file(result["pdf_bytes"]), file_name=f"Tal_Resume_{i + 1}.pdf",
+                    mime="application/pdf", use_container_width=True, type="primary", key=f"pdf_{i}",
+                )
+            else:
+                st.error("pdf compilation failed. grab the .tex (use overleaf).")
+        with col2:
+            st.download_button(
+                "📄 download .tex", data=lambda: blob_file(result["latex_content"]), file_name=f"Tal_Resume_{i + 1}.tex",
+                mime="text/plain", use_container_width=True, key=f"tex_{i}",
+            )
+        if result.get("cold_dm"):
+            st.code(result["cold_dm"], language="text")
+
+def start_new_role():
+    """Back to the inputs with the parsed resume kept: only the JD-specific state is dropped."""
+    for key in ("analysis_results", "latex_content", "pdf_bytes"):
+        stash(key, None)
+    for result in st.session_state.get("fanout_results", []):
+        release_role(result)
+    for key in (
+        "jd_list", "analysis_results", "latex_content", "pdf_bytes", "compile_error",
+        "cold_dm_draft", "fanout_results", "analysis_job", "resume_job",
+    ):
+        st.session_state.pop(key, None)
+    st.query_params.clear()
+    st.session_state.jd_text = ""
+    st.session_state.cold_dm = ""
+    st.session_state.company_name = ""
+    st.session_state.step = "upload"
+    st.session_state.messages.append({"role": "assistant", "content": "same resume, new role. paste the jd."})
+
+def submit_analysis(agent) -> str:
+    s = st.session_state
+    inputs = {
+        "resume_text": unstash("resume_text"), "jd_text": s.jd_text, "sections": unstash("resume_sections"),
+        "links": s.resume_links, "pages": s.resume_pages,
+    }
+
+    async def run(job):
+        job.progress("checking the vibe...")
+        return await agent.analyze_resume_async(inputs["resume_text"], inputs["jd_text"], sections=inputs["sections"])
+
+    return jobs().submit("analysis", inputs, run)
+
+def submit_resume(agent) -> str:
+    s = st.session_state
+    inputs = {
+        "resume_text": unstash("resume_text"), "jd_text": s.jd_text, "analysis": unstash("analysis_results"),
+        "links": s.resume_links, "pages": s.resume_pages, "sections": unstash("resume_sections"),
+        "draft_dm": config.PREFETCH_COLD_DM,
+    }
+    return jobs().submit("resume", inputs, lambda job: build_resume(
+        agent,
+        inputs["resume_text"],
+        inputs["jd_text"],
+        inputs["analysis"],
+        links=inputs["links"],
+        max_pages=inputs["pages"],
+        draft_dm=inputs["draft_dm"],
+        on_progress=job.progress,
+        on_chunk=job.preview if config.STREAM_LATEX else None,
+        sections=inputs["sections"],
+    ))
+
+def restore_job(job: dict):
+    """A refreshed tab (?job=...): rebuild the session from the job's inputs and re-attach to it."""
+    inputs = job["inputs"]
+    stash("resume_text", inputs["resume_text"])
+    st.session_state.resume_pages = inputs["pages"]
+    st.session_state.resume_links = inputs["links"]
+    stash("resume_sections", inputs["sections"])
+    st.session_state.jd_text = inputs["jd_text"]
+    if job["kind"] == "analysis":
+        st.session_state.analysis_job = job["id"]
+        st.session_state.step = "analysis"
+    else:
+        stash("analysis_results", inputs["analysis"])
+        st.session_state.company_name = inputs["analysis"].get("company_name", "the company")
+        st.session_state.messages.append({"role": "assistant", "content": format_analysis_display(inputs["analysis"])})
+        st.session_state.resume_job = job["id"]
+        st.session_state.step = "generating"
+    st.session_state.messages.append({"role": "assistant", "content": "welcome back. picking up where we left off."})
+
 # ─────────────────────────────────────────────────────────────
 # MAIN APP LOOP
 # ─────────────────────────────────────────────────────────────
@@ -635,24 +412,35 @@ def main():
         st.session_state.messages = []
         # Flow: upload -> analysis -> generating -> done
         st.session_state.step = "upload"
-        st.session_state.resume_text = ""
+        # Large values (resume text and sections, analysis, LaTeX, PDF) are blob handles: see stash() / unstash()
+        st.session_state.resume_text = None
         st.session_state.resume_pages = 1
         st.session_state.resume_links = []
+        st.session_state.resume_sections = None
         st.session_state.jd_text = ""
         st.session_state.cold_dm = ""
         st.session_state.company_name = ""
+        st.session_state.trace_id = new_trace_id()
         
         # Opening Line
         st.session_state.messages.append({
             "role": "assistant",
             "content": "yo. i'm tal.\n\ndrop your resume pdf below. let's fix it."
         })
+        # A refresh starts a new session; the job in the URL brings this one back
+        job = jobs().get(st.query_params["job"]) if "job" in st.query_params else None
+        if job and job["kind"] in ("analysis", "resume"):
+            restore_job(job)
     
     # Hot-reload safety: Ensure new keys exist even if session is old
     if "cold_dm" not in st.session_state:
         st.session_state.cold_dm = ""
     if "company_name" not in st.session_state:
         st.session_state.company_name = ""
+    if "trace_id" not in st.session_state:
+        st.session_state.trace_id = new_trace_id()
+    set_trace(st.session_state.trace_id)
+    blobs().touch(st.session_state.trace_id)
 
     # Header
     tal_img = img_to_base64(TAL_AVATAR)
@@ -665,52 +453,112 @@ def main():
         st.markdown('<div class="subtitle">ats-optimized. recruiter-approved. no fluff.</div>', unsafe_allow_html=True)
 
     # Agent Init
-    agent = TalAgent()
+    try:
+        # Replaying recorded sessions (load tests, profiling) doesn't need a key
+        api_key = None if config.CASSETTE_MODE == "replay" else st.secrets["GEMINI_API_KEY"]
+        agent = load_agent(api_key)
+    except Exception:
+        st.error("Missing GEMINI_API_KEY in secrets.toml")
+        st.stop()
+
+    # Cache stats (sidebar is collapsed by default)
+    stats = agent.analysis_cache.stats()
+    st.sidebar.caption(f"analysis cache: {stats['hits']} hits · {stats['misses']} misses · {stats['entries']} entries")
+    stats = agent.pdf_store.stats()
+    st.sidebar.caption(f"pdf cache: {stats['hits']} hits · {stats['misses']} misses · {stats['negative_hits']} known-bad")
+    for backend, health in compile_stats().items():
+        st.sidebar.caption(f"{backend}: {health['state']} · {health['successes']} ok · {health['failures']} failed")
+    usage = blobs().usage(st.session_state.trace_id)
+    st.sidebar.caption(f"this session: {usage['blobs']} blobs · {usage['bytes'] / 1024:.0f} kb")
+    if config.DEBUG_PANEL:
+        render_debug_panel(st.session_state.trace_id)
 
     # Chat History
     for msg in st.session_state.messages:
         avatar = TAL_AVATAR if msg["role"] == "assistant" else USER_AVATAR
         render_chat_message(msg["role"], msg["content"], avatar)
 
+    # One span per step run, so a slow session shows which step (and call) the time went to
+    with span(f"app.{st.session_state.step}"):
+        render_step(agent)
+
+def render_step(agent):
+    """The current step of the upload -> analysis -> generating -> done flow."""
     # ─── STEP 1: UPLOAD & JD ───
     if st.session_state.step == "upload":
         st.markdown("### 1. the inputs")
+        multi = st.toggle("applying to several roles? paste them all", key="multi_jd")
         col1, col2 = st.columns([1, 1])
         with col1:
             uploaded = st.file_uploader("upload resume (pdf)", type="pdf")
+            # "another role" keeps the parsed resume, so a new upload is optional
+            if not uploaded and st.session_state.resume_text:
+                st.caption("using the resume you already uploaded")
         with col2:
-            jd = st.text_area("paste job description", height=200, placeholder="paste full jd here...", label_visibility="visible")
+            if multi:
+                jd = st.text_area(
+                    "paste job descriptions", height=200, label_visibility="visible",
+                    placeholder="paste each jd, with a line of --- between them...",
+                )
+            else:
+                jd = st.text_area("paste job description", height=200, placeholder="paste full jd here...", label_visibility="visible")
             
         submitted = st.button("analyze match →", type="primary", use_container_width=True)
         
+        # Start reading the pdf as soon as it lands, while the user is still pasting the jd
+        if uploaded and st.session_state.get("prefetch_file_id") != uploaded.file_id:
+            st.session_state.prefetch_file_id = uploaded.file_id
+            st.session_state.prefetch_pdf = prefetch(agent.extract_pdf_data, uploaded)
+        
         if submitted:
-            if uploaded and jd and len(jd) > 50:
-                with st.spinner("reading pdf..."):
-                    data = agent.extract_pdf_data(uploaded)
-                    if len(data["text"]) > 50:
-                        st.session_state.resume_text = data["text"]
-                        st.session_state.resume_pages = data["pages"]
-                        st.session_state.resume_links = data["links"]
-                        st.session_state.jd_text = jd
-                        
-                        st.session_state.messages.append({"role": "user", "content": f"uploaded {uploaded.name} and jd."})
-                        st.session_state.step = "analysis"
-                        st.rerun()
-                    else:
-                        st.error("could not read pdf. is it an image scan?")
-            else:
+            jds = split_jds(jd) if multi else [jd] if jd else []
+            if not (uploaded or st.session_state.resume_text) or not jds or any(len(j) <= 50 for j in jds):
                 st.warning("please upload a resume and paste the jd.")
+            elif len(jds) > config.FANOUT_MAX_JDS:
+                st.warning(f"that's {len(jds)} jds. max is {config.FANOUT_MAX_JDS} at once.")
+            else:
+                data = None
+                if uploaded:
+                    with st.spinner("reading pdf..."):
+                        if st.session_state.get("prefetch_file_id") == uploaded.file_id:
+                            data = st.session_state.prefetch_pdf.result()
+                        else:
+                            data = agent.extract_pdf_data(uploaded)
+                    if len(data["text"]) <= 50:
+                        st.error("could not read pdf. is it an image scan?")
+                        st.stop()
+                    stash("resume_text", data["text"])
+                    st.session_state.resume_pages = data["pages"]
+                    st.session_state.resume_links = data["links"]
+                    stash("resume_sections", data["sections"])
+                
+                source = uploaded.name if uploaded else "my resume"
+                if multi:
+                    st.session_state.jd_list = jds
+                    st.session_state.messages.append({"role": "user", "content": f"uploaded {source} and {len(jds)} jds."})
+                    st.session_state.step = "fanout"
+                else:
+                    st.session_state.jd_text = jd
+                    st.session_state.messages.append({"role": "user", "content": f"uploaded {source} and jd."})
+                    st.session_state.step = "analysis"
+                st.rerun()
 
     # ─── STEP 3: ANALYSIS & STRATEGY ───
     elif st.session_state.step == "analysis":
-        # Run Analysis once, then immediately generate the resume
+        # Analysis runs as a background job; reruns and refreshes attach to it instead of re-running it
         if "analysis_results" not in st.session_state:
-            with st.status("🦊 tal is analyzing...", expanded=True) as status:
-                st.write("checking the vibe...")
-                analysis = agent.analyze_resume(st.session_state.resume_text, st.session_state.jd_text)
-                st.session_state.analysis_results = analysis
-                st.session_state.company_name = analysis.get("company_name", "the company")
-                status.update(label="analysis done!", state="complete")
+            if "analysis_job" not in st.session_state:
+                st.session_state.analysis_job = submit_analysis(agent)
+            st.query_params["job"] = st.session_state.analysis_job
+            job = jobs().get(st.session_state.analysis_job)
+            if job_failed("analysis_job", job):
+                return
+            if job["status"] == "running":
+                follow_job(job["id"], "🦊 tal is analyzing...")
+                return
+            analysis = job["result"]
+            stash("analysis_results", analysis)
+            st.session_state.company_name = analysis.get("company_name", "the company")
             
             # Show Strategy Message in chat
             analysis_msg = format_analysis_display(analysis)
@@ -723,37 +571,38 @@ def main():
 
     # ─── STEP 4: GENERATING RESUME ───
     elif st.session_state.step == "generating":
-        with st.status("🦊 cooking...", expanded=True) as status:
-            
-            # 1. Generate LaTeX
-            st.write("applying strategy...")
-            latex = agent.generate_latex_content(
-                st.session_state.resume_text, 
-                st.session_state.jd_text, 
-                st.session_state.analysis_results,
-                links=st.session_state.resume_links,
-                max_pages=st.session_state.resume_pages
-            )
-            st.session_state.latex_content = latex
-            
-            # 2. Compile
-            st.write("compiling pdf...")
-            pdf_bytes, error = agent.compile_pdf(latex)
-            st.session_state.pdf_bytes = pdf_bytes
-            st.session_state.compile_error = error
-            
-            status.update(label="done!", state="complete")
-            st.session_state.step = "done"
-            st.rerun()
+        # Generate + compile the resume (the cold dm is drafted concurrently) as a background job
+        if "resume_job" not in st.session_state:
+            st.session_state.resume_job = submit_resume(agent)
+        st.query_params["job"] = st.session_state.resume_job
+        job = jobs().get(st.session_state.resume_job)
+        if job_failed("resume_job", job):
+            return
+        if job["status"] == "running":
+            follow_job(job["id"], "🦊 cooking...")
+            return
+        result = job["result"]
+        stash("latex_content", result["latex_content"])
+        stash("pdf_bytes", result["pdf_bytes"])
+        if result["pdf_bytes"] and config.PREVIEW_MODE == "images":
+            request_pages(result["pdf_bytes"])  # rendering while the result screen loads
+        st.session_state.compile_error = result["compile_error"]
+        st.session_state.cold_dm_draft = result["cold_dm"]
+        st.session_state.step = "done"
+        st.rerun()
 
     # ─── STEP 4: RESULT ───
     elif st.session_state.step == "done":
         st.divider()
         
         # Display PDF
-        if st.session_state.pdf_bytes:
-            if pdf_viewer:
-                pdf_viewer(input=st.session_state.pdf_bytes, width=700)
+        if not restore_result(agent):
+            st.error("this resume expired while the tab sat idle. start over or try another role to cook a fresh one.")
+        elif st.session_state.pdf_bytes:
+            if config.PREVIEW_MODE == "images":
+                render_preview(unstash("pdf_bytes"))
+            elif pdf_viewer := load_pdf_viewer():
+                pdf_viewer(input=blobs().path(st.session_state.pdf_bytes), width=700)
             else:
                 st.info("preview unavailable (library missing). download below.")
                 
@@ -762,7 +611,7 @@ def main():
             with col1:
                 st.download_button(
                     "📥 download pdf",
-                    data=st.session_state.pdf_bytes,
+                    data=lambda handle=st.session_state.pdf_bytes: blob_file(handle),
                     file_name="Tal_Resume.pdf",
                     mime="application/pdf",
                     use_container_width=True,
@@ -771,7 +620,7 @@ def main():
             with col2:
                 st.download_button(
                     "📄 download .tex",
-                    data=st.session_state.latex_content,
+                    data=lambda handle=st.session_state.latex_content: blob_file(handle),
                     file_name="Tal_Resume.tex",
                     mime="text/plain",
                     use_container_width=True
@@ -784,7 +633,7 @@ def main():
             
             st.download_button(
                 "📄 download .tex source (use overleaf)",
-                data=st.session_state.latex_content,
+                data=lambda handle=st.session_state.latex_content: blob_file(handle),
                 file_name="Tal_Resume.tex",
                 mime="text/plain",
                 use_container_width=True
@@ -797,12 +646,17 @@ def main():
             st.markdown("### 📨 want to get hired faster?")
             st.write("tal can research the company and draft a high-impact cold dm to the founder.")
             if st.button("✨ draft cold dm (deep research)"):
+                # Usually drafted already, alongside the resume
+                if st.session_state.get("cold_dm_draft"):
+                    st.session_state.cold_dm = st.session_state.cold_dm_draft
+                    st.rerun()
                 with st.spinner("researching company strategy & drafting..."):
                     dm = agent.generate_cold_dm(
-                        st.session_state.resume_text, 
+                        unstash("resume_text"), 
                         st.session_state.jd_text, 
                         st.session_state.company_name,
-                        analysis=st.session_state.get('analysis_results')
+                        analysis=unstash("analysis_results"),
+                        sections=unstash("resume_sections"),
                     )
                     st.session_state.cold_dm = dm
                     st.rerun()
@@ -812,9 +666,72 @@ def main():
             st.info("💡 pro tip: tal researched the company to write this. send it to the founder/hm directly.")
             st.code(st.session_state.cold_dm, language="text")
             
-        if st.button("🔄 start over"):
-            st.session_state.clear()
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("🎯 another role (same resume)", use_container_width=True):
+                start_new_role()
+                st.rerun()
+        with col2:
+            if st.button("🔄 start over", use_container_width=True):
+                blobs().release(st.session_state.trace_id)
+                st.session_state.clear()
+                st.query_params.clear()
+                st.rerun()
+
+    # ─── MULTI-JD: ALL ROLES AT ONCE ───
+    elif st.session_state.step == "fanout":
+        if "fanout_results" not in st.session_state:
+            jds = st.session_state.jd_list
+            rows = [{"role": jd_title(jd), "company": "", "status": "queued", "pages": None, "seconds": None} for jd in jds]
+            table = st.empty()
+            table.dataframe(rows, use_container_width=True, hide_index=True)
+
+            def show(index: int, result: dict):
+                analysis = result.get("analysis") or {}
+                fit = result.get("page_fit") or {}
+                rows[index].update(
+                    role=analysis.get("role_title") or rows[index]["role"],
+                    company=analysis.get("company_name", ""),
+                    status="ready" if result.get("pdf_bytes") else result["status"] if result["status"] == "failed" else "tex only",
+                    pages=fit.get("pages"),
+                    seconds=result.get("seconds"),
+                )
+                table.dataframe(rows, use_container_width=True, hide_index=True)
+
+            with st.status(f"🦊 cooking {len(jds)} resumes...", expanded=True) as status:
+                data = {
+                    "text": unstash("resume_text"),
+                    "pages": st.session_state.resume_pages,
+                    "links": st.session_state.resume_links,
+                    "sections": unstash("resume_sections"),
+                }
+                results = run_in_loop(lambda relay: fan_out(
+                    agent, data, jds, draft_dm=config.PREFETCH_COLD_DM, on_result=relay(show),
+                ))
+                for result in results:
+                    for field in ("pdf_bytes", "latex_content"):
+                        if result.get(field):
+                            result[field] = blobs().put(result[field], st.session_state.trace_id)
+                st.session_state.fanout_results = results
+                status.update(label="done!", state="complete")
+            st.session_state.messages.append({"role": "assistant", "content": f"cooked {len(jds)} resumes. grab them below."})
             st.rerun()
 
+        for result in st.session_state.fanout_results:
+            render_role_result(result)
+
+        st.divider()
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("🎯 more roles (same resume)", use_container_width=True):
+                start_new_role()
+                st.rerun()
+        with col2:
+            if st.button("🔄 start over", use_container_width=True):
+                blobs().release(st.session_state.trace_id)
+                st.session_state.clear()
+                st.query_params.clear()
+                st.rerun()
+
 if __name__ == "__main__":
     main()
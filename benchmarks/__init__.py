@@ -0,0 +1,3 @@
+"""
+Offline benchmarks. Run from the repo root, e.g. `python -m benchmarks.extract_pdf`.
+"""
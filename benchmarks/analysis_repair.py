@@ -0,0 +1,93 @@
+"""
+Analysis-parsing benchmark: well-formed analysis answers corrupted the ways model output goes wrong (code
+fences, prose around the JSON, trailing commas, miscased keys, a wrong-typed field, truncation at random
+points). Compares the strict json.loads the agent used to do, where any defect meant the generic fallback and
+a re-run, with parse_analysis: answers usable without a re-run, fields kept, and parse time. Offline.
+
+    python -m benchmarks.analysis_repair [--answers 2000] [--seed 7]
+"""
+
+import argparse
+import json
+import random
+import time
+
+from benchmarks.fake_genai import _ANALYSIS
+from tal.analysis import Analysis, parse_analysis
+
+_CAMEL = {"role_title": "roleTitle", "company_name": "Company Name", "content_plan": "Content-Plan"}
+
+
+def _corrupt(rng: random.Random) -> tuple:
+    text = json.dumps(_ANALYSIS, indent=2)
+    defect = rng.choice(("clean", "fences", "prose", "trailing_commas", "keys", "wrong_type", "truncated"))
+    if defect == "fences":
+        text = f"```json\n{text}\n```"
+    elif defect == "prose":
+        text = f"Here is the analysis:\n{text}\nLet me know if you need more."
+    elif defect == "trailing_commas":
+        text = text.replace('"\n  }', '",\n  }').replace("}\n  ]", "},\n  ]")
+    elif defect == "keys":
+        for key, bad in _CAMEL.items():
+            text = text.replace(f'"{key}"', f'"{bad}"')
+    elif defect == "wrong_type":
+        text = text.replace('"role_archetype": "builder"', '"role_archetype": ["builder"]')
+    elif defect == "truncated":
+        text = text[:rng.randint(len(text) // 5, len(text) - 2)]
+    return defect, text
+
+
+def _strict(text: str):
+    try:
+        return Analysis.model_validate(json.loads(text)).model_dump()
+    except ValueError:
+        return None
+
+
+def run(answers: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    corpus = [_corrupt(rng) for _ in range(answers)]
+    fields = len(Analysis.model_fields)
+    results = {}
+    for name in ("strict", "repair"):
+        usable = kept = 0
+        by_defect = {}
+        started = time.perf_counter()
+        for defect, text in corpus:
+            if name == "strict":
+                analysis, lost = _strict(text), 0
+            else:
+                try:
+                    analysis, notes = parse_analysis(text)
+                    lost = len({path.split(".")[0] for path in notes["defaulted"]})
+                except ValueError:
+                    analysis = None
+            ok = by_defect.setdefault(defect, [0, 0])
+            ok[1] += 1
+            if analysis is not None:
+                usable += 1
+                kept += fields - lost
+                ok[0] += 1
+        seconds = time.perf_counter() - started
+        results[name] = {
+            "usable": round(usable / answers, 3),
+            "fields_kept": round(kept / (answers * fields), 3),
+            "parse_us": round(seconds / answers * 1e6, 1),
+            "by_defect": {d: f"{n}/{total}" for d, (n, total) in sorted(by_defect.items())},
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--answers", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    for name, r in run(args.answers, args.seed).items():
+        print(f"{name:<7} usable {r['usable']:>6.1%}   fields kept {r['fields_kept']:>6.1%}   parse {r['parse_us']:>7.1f} us")
+        print("        " + "  ".join(f"{d} {n}" for d, n in r["by_defect"].items()))
+
+
+if __name__ == "__main__":
+    main()
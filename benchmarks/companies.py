@@ -0,0 +1,86 @@
+"""
+Company-profile benchmark: many users applying to roles at a few popular companies, each analysis followed
+by a cold DM. Compares Google-Search-grounded calls and wall time with the shared company-profile store off
+(every call researches the company) and on. Offline: fake Gemini.
+
+    python -m benchmarks.companies [--users 20] [--companies 3] [--ttft 0.3] [--search-latency 1.5]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+from benchmarks.fake_genai import FakeGenaiClient
+from tal import config
+
+RESUME = (
+    "Candidate {n} ({mode})\nEXPERIENCE\nBackend Engineer, Globex 2020 -- Present\n"
+    "- Built Python and Go services on Kubernetes handling {n}M requests a day\n"
+    "SKILLS\nPython, Go, PostgreSQL, Kubernetes, AWS\n"
+)
+JD = (
+    "Backend Engineer at {mode}Company{company}\n"
+    "We are looking for engineers with Python, Go, PostgreSQL and Kubernetes experience.\n"
+    "Must have 3+ years of experience shipping production systems.\n"
+)
+
+
+async def _session(agent, client, mode: str, n: int, company: int, search_latency: float) -> None:
+    resume, jd = RESUME.format(n=n, mode=mode), JD.format(company=company, mode=mode.title())
+    searches = client.searches
+    analysis = await agent.analyze_resume_async(resume, jd)
+    if client.searches > searches:
+        await asyncio.sleep(search_latency)
+    searches = client.searches
+    await agent.generate_cold_dm_async(resume, jd, analysis["company_name"], analysis=analysis)
+    if client.searches > searches:
+        await asyncio.sleep(search_latency)
+
+
+def run(users: int, companies: int, ttft: float, search_latency: float) -> dict:
+    from tal.agent import TalAgent
+
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        config.CACHE_DIR = cache_dir
+        config.TELEMETRY_LOG = ""
+        for mode in ("off", "on"):
+            # Resumes and company names differ per mode, so the second run answers nothing from the first's caches
+            config.COMPANY_PROFILES = mode == "on"
+            client = FakeGenaiClient(ttft=ttft, tokens_per_second=300)
+            agent = TalAgent(client=client)
+
+            async def all_users():
+                # Users arrive in waves, a few at a time, as they would on the app
+                for wave in range(0, users, companies):
+                    await asyncio.gather(*(
+                        _session(agent, client, mode, n, n % companies, search_latency) for n in range(wave, min(users, wave + companies))
+                    ))
+
+            started = time.perf_counter()
+            asyncio.run(all_users())
+            results[mode] = {
+                "wall_s": round(time.perf_counter() - started, 2),
+                "llm_calls": len(client.calls),
+                "searches": client.searches,
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--companies", type=int, default=3)
+    parser.add_argument("--ttft", type=float, default=0.3, help="fake Gemini time to first token (s)")
+    parser.add_argument("--search-latency", type=float, default=1.5, help="extra seconds a grounded call spends searching")
+    args = parser.parse_args()
+
+    result = run(args.users, args.companies, args.ttft, args.search_latency)
+    for mode in ("off", "on"):
+        r = result[mode]
+        print(f"profiles {mode:<4} {r['wall_s']:>8.2f} s   {r['llm_calls']:>4} llm calls   {r['searches']:>4} searches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compile client under injected latency and failures: the old sequential walk vs the hedged, pooled client.
+
+    python -m benchmarks.compile_client [--repeat 20] [--hedge-delay 0.3] [--json]
+
+Two stand-in servers play ytotech (primary) and latexonline (secondary); each scenario degrades the primary.
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import requests
+
+from benchmarks.standin import StandInServer
+from tal.compile_client import CompileClient, RemoteBackend, _send_latexonline, _send_ytotech
+
+DOCUMENT = r"\documentclass{article}\begin{document}hello\end{document}"
+TIMEOUT = 5.0
+
+SCENARIOS = {
+    # name: (primary settings, secondary settings)
+    "healthy": ({"latency": 0.05}, {"latency": 0.05}),
+    "slow primary": ({"latency": 1.5}, {"latency": 0.05}),
+    "flaky primary": ({"latency": 0.05, "failure_rate": 0.5}, {"latency": 0.05}),
+    "dead primary": ({"latency": TIMEOUT + 1}, {"latency": 0.05}),
+}
+
+
+def legacy_compile(primary: str, secondary: str) -> bool:
+    """The original walk: a fresh connection per call, one backend after the other."""
+    for send in (_send_ytotech(primary), _send_latexonline(secondary)):
+        try:
+            resp = send(requests, DOCUMENT, TIMEOUT)
+            if resp.status_code in (200, 201):
+                return True
+        except Exception:
+            pass
+    return False
+
+
+def _time(fn, repeat: int) -> dict:
+    samples, ok = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        ok += bool(fn())
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(samples), 1), "max_ms": round(max(samples), 1), "ok": ok}
+
+
+def run(repeat: int, hedge_delay: float) -> list:
+    results = []
+    for name, (primary_opts, secondary_opts) in SCENARIOS.items():
+        with StandInServer(**primary_opts) as primary, StandInServer(**secondary_opts) as secondary:
+            before = _time(lambda: legacy_compile(primary.url, secondary.url), repeat)
+            client = CompileClient(
+                [RemoteBackend("ytotech", _send_ytotech(primary.url)),
+                 RemoteBackend("latexonline", _send_latexonline(secondary.url))],
+                hedge_delay=hedge_delay,
+                timeout=TIMEOUT,
+            )
+            after = _time(lambda: client.compile(DOCUMENT)[0], repeat)
+            results.append({"scenario": name, "before": before, "after": after, "health": client.stats()})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--hedge-delay", type=float, default=0.3)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.hedge_delay)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'scenario':<14}  {'before ms':>9}  {'before max':>10}  {'after ms':>8}  {'after max':>9}  {'primary wins':>12}")
+    for row in results:
+        b, a = row["before"], row["after"]
+        print(f"{row['scenario']:<14}  {b['median_ms']:>9}  {b['max_ms']:>10}  {a['median_ms']:>8}  "
+              f"{a['max_ms']:>9}  {row['health']['ytotech']['wins']:>12}")
+
+
+if __name__ == "__main__":
+    main()
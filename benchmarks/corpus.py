@@ -0,0 +1,42 @@
+"""
+Synthetic resume PDFs for benchmarks: realistic-looking text, URI annotations and bare text links.
+"""
+
+import random
+
+import fitz  # PyMuPDF
+
+_SKILLS = ["Python", "Go", "React", "PostgreSQL", "Kubernetes", "AWS", "Terraform", "Kafka", "PyTorch", "SQL"]
+_VERBS = ["Built", "Scaled", "Led", "Shipped", "Cut", "Designed", "Migrated", "Automated"]
+
+
+def _bullet(rng: random.Random) -> str:
+    return (
+        f"{rng.choice(_VERBS)} a {rng.choice(_SKILLS)} service handling {rng.randint(2, 900)}k requests/day, "
+        f"improving latency by {rng.randint(5, 70)}% using {rng.choice(_SKILLS)} and {rng.choice(_SKILLS)}."
+    )
+
+
+def make_resume_pdf(pages: int, seed: int = 0) -> bytes:
+    """A `pages`-page resume with ~45 lines per page."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for page_no in range(pages):
+        page = doc.new_page(width=612, height=792)
+        y = 54
+        if page_no == 0:
+            page.insert_text((54, y), f"Candidate {seed}", fontsize=20)
+            y += 24
+            header = f"candidate{seed}@mail.com | github.com/cand{seed} | linkedin.com/in/cand{seed}"
+            page.insert_text((54, y), header, fontsize=9)
+            page.insert_link({"kind": fitz.LINK_URI, "from": fitz.Rect(54, y - 9, 300, y), "uri": f"https://github.com/cand{seed}"})
+            y += 20
+        page.insert_text((54, y), ["EXPERIENCE", "PROJECTS", "EDUCATION", "SKILLS"][page_no % 4], fontsize=12)
+        y += 16
+        while y < 750:
+            line = _bullet(rng)
+            if rng.random() < 0.1:
+                line += f" Demo: https://demo{rng.randint(1, 99)}.example.com/p{page_no}"
+            page.insert_text((60, y), line, fontsize=8)
+            y += 15
+    return doc.tobytes()
@@ -0,0 +1,193 @@
+"""
+End-to-end benchmark: extract_pdf_data -> analyze -> (generate LaTeX -> compile) || cold DM, fully offline.
+Gemini is a FakeGenaiClient with modelled latency / token throughput; compiles go to a local stand-in server.
+
+    python -m benchmarks.e2e [--sessions 40] [--concurrency 4] [--pages 1-10] [--ttft 0.3] [--tps 150]
+                             [--compile-latency 0.2] [--stream] [--out results.json] [--compare baseline.json]
+
+Per-stage p50/p95/p99 come from the telemetry spans of each session; --out writes the JSON report so
+runs can be compared across commits (--compare prints the deltas against an earlier report).
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import resource
+import subprocess
+import tempfile
+import time
+
+from benchmarks.corpus import make_resume_pdf
+from benchmarks.fake_genai import FakeGenaiClient
+from benchmarks.standin import StandInServer
+from tal import config, telemetry
+
+STAGES = (
+    "session",
+    "agent.extract_pdf_data",
+    "agent.analyze_resume",
+    "agent.generate_latex_content",
+    "agent.generate_cold_dm",
+    "compile_pdf",
+)
+JD_TEMPLATE = (
+    "Backend Engineer at Acme ({n})\n"
+    "We are looking for engineers with Python, Go, PostgreSQL and Kubernetes experience.\n"
+    "You will design services on AWS, own Terraform infrastructure and Kafka pipelines.\n"
+    "Must have 3+ years of experience shipping production systems.\n"
+)
+
+
+def _percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = q * (len(ordered) - 1)
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _summary(seconds: list) -> dict:
+    ms = [s * 1000 for s in seconds]
+    return {
+        "n": len(ms),
+        "p50_ms": round(_percentile(ms, 0.50), 2),
+        "p95_ms": round(_percentile(ms, 0.95), 2),
+        "p99_ms": round(_percentile(ms, 0.99), 2),
+        "mean_ms": round(sum(ms) / len(ms), 2),
+    } if ms else {"n": 0}
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process and its (waited-for) children; ru_maxrss is KiB on Linux."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) / 1024, 1)
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _session(agent, pdf_bytes: bytes, jd_text: str, stream: bool) -> str:
+    """One user session, traced; returns its trace id."""
+    from tal.pipeline import build_resume
+
+    trace_id = telemetry.new_trace_id()
+    telemetry.set_trace(trace_id)
+    with telemetry.span("session"):
+        data = await asyncio.to_thread(agent.extract_pdf_data, io.BytesIO(pdf_bytes))
+        analysis = await agent.analyze_resume_async(data["text"], jd_text, sections=data["sections"])
+        await build_resume(
+            agent, data["text"], jd_text, analysis,
+            links=data["links"], max_pages=data["pages"], sections=data["sections"],
+            on_chunk=(lambda latex: None) if stream else None,
+        )
+    return trace_id
+
+
+async def _drive(agent, corpus: list, sessions: int, concurrency: int, stream: bool) -> tuple[list, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(i):
+        async with semaphore:
+            # A distinct JD per session, so the analysis cache never answers for the model
+            return await _session(agent, corpus[i % len(corpus)], JD_TEMPLATE.format(n=i), stream)
+
+    started = time.perf_counter()
+    trace_ids = await asyncio.gather(*(bounded(i) for i in range(sessions)))
+    return trace_ids, time.perf_counter() - started
+
+
+def run(sessions: int, concurrency: int, pages: range, ttft: float, tps: float,
+        compile_latency: float, stream: bool) -> dict:
+    from tal.agent import TalAgent
+
+    corpus = [make_resume_pdf(n, seed=n) for n in pages]
+    with tempfile.TemporaryDirectory() as cache_dir, StandInServer(latency=compile_latency) as compile_server:
+        # Isolated caches and the stand-in as the only compile backend (set before any singleton is built)
+        config.CACHE_DIR = cache_dir
+        config.TELEMETRY_LOG = ""
+        config.COMPILE_BACKENDS = ["ytotech"]
+        config.YTOTECH_URL = compile_server.url
+        config.TELEMETRY_TRACES = max(config.TELEMETRY_TRACES, sessions)
+
+        client = FakeGenaiClient(ttft=ttft, tokens_per_second=tps)
+        agent = TalAgent(client=client)
+        trace_ids, wall = asyncio.run(_drive(agent, corpus, sessions, concurrency, stream))
+
+    durations = {stage: [] for stage in STAGES}
+    for trace_id in trace_ids:
+        for span in telemetry.trace_spans(trace_id):
+            if span["name"] in durations:
+                durations[span["name"]].append(span["seconds"])
+
+    return {
+        "commit": _git_commit(),
+        "params": {
+            "sessions": sessions, "concurrency": concurrency, "pages": [pages.start, pages.stop - 1],
+            "ttft": ttft, "tokens_per_second": tps, "compile_latency": compile_latency, "stream": stream,
+        },
+        "stages": {stage: _summary(values) for stage, values in durations.items()},
+        "throughput_sessions_per_s": round(sessions / wall, 3),
+        "wall_s": round(wall, 3),
+        "peak_rss_mb": _peak_rss_mb(),
+        "llm_calls": len(client.calls),
+    }
+
+
+def _compare(result: dict, baseline: dict) -> list:
+    rows = []
+    for stage, now in result["stages"].items():
+        before = baseline.get("stages", {}).get(stage, {})
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if before.get(key) and now.get(key) is not None:
+                rows.append((f"{stage} {key}", before[key], now[key], (now[key] - before[key]) / before[key]))
+    for key in ("throughput_sessions_per_s", "peak_rss_mb"):
+        if baseline.get(key):
+            rows.append((key, baseline[key], result[key], (result[key] - baseline[key]) / baseline[key]))
+    return rows
+
+
+def _parse_pages(value: str) -> range:
+    low, _, high = value.partition("-")
+    return range(int(low), int(high or low) + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--pages", type=_parse_pages, default=range(1, 11), help="resume page range, e.g. 1-10")
+    parser.add_argument("--ttft", type=float, default=0.3, help="fake Gemini time to first token (s)")
+    parser.add_argument("--tps", type=float, default=150.0, help="fake Gemini output tokens per second")
+    parser.add_argument("--compile-latency", type=float, default=0.2, help="stand-in compile server latency (s)")
+    parser.add_argument("--stream", action="store_true", help="stream LaTeX generation, like the app")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", help="earlier JSON report to diff against")
+    args = parser.parse_args()
+
+    result = run(args.sessions, args.concurrency, args.pages, args.ttft, args.tps, args.compile_latency, args.stream)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    print(json.dumps(result, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nvs {baseline.get('commit') or args.compare}:")
+        for name, before, now, change in _compare(result, baseline):
+            print(f"  {name:<44} {before:>10} -> {now:<10} {change:+.1%}")
+
+
+if __name__ == "__main__":
+    main()
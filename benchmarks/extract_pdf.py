@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: extract_pdf_data before/after the single-pass, zero-copy rewrite.
+
+    python -m benchmarks.extract_pdf [--repeat 50] [--json]
+"""
+
+import argparse
+import io
+import json
+import re
+import statistics
+import time
+
+import fitz  # PyMuPDF
+
+from benchmarks.corpus import make_resume_pdf
+from tal.pdf import extract_pdf_data
+
+
+def legacy_extract_pdf_data(file) -> dict:
+    """The original implementation, kept verbatim as the baseline."""
+    file.seek(0)
+    pdf_bytes = file.read()
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    text = ""
+    links = []
+    for page in doc:
+        text += page.get_text() + "\n"
+        page_links = page.get_links()
+        for link in page_links:
+            if "uri" in link:
+                links.append(link["uri"])
+    raw_links = re.findall(r'(https?://[^\s\)\}\],]+)', text)
+    raw_links += [f"https://{l}" if not l.startswith("http") else l for l in re.findall(r'(?:github\.com/[^\s\)\}\],]+)', text)]
+    raw_links += [f"https://{l}" if not l.startswith("http") else l for l in re.findall(r'(?:linkedin\.com/in/[^\s\)\}\],]+)', text)]
+    all_links = sorted(list(set(links + raw_links)))
+    return {"text": text.strip(), "pages": len(doc), "links": all_links}
+
+
+def _time(fn, pdf_bytes: bytes, repeat: int) -> dict:
+    upload = io.BytesIO(pdf_bytes)
+    fn(upload)  # warm-up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(upload)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3)}
+
+
+def run(repeat: int, page_counts=(1, 2, 10, 40)) -> list:
+    results = []
+    for pages in page_counts:
+        pdf_bytes = make_resume_pdf(pages)
+        before = _time(legacy_extract_pdf_data, pdf_bytes, repeat)
+        after = _time(extract_pdf_data, pdf_bytes, repeat)
+        row = {"pages": pages, "before": before, "after": after,
+               "speedup": round(before["median_ms"] / after["median_ms"], 2)}
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'pages':>5}  {'before ms':>10}  {'after ms':>10}  {'speedup':>7}")
+    for row in results:
+        print(f"{row['pages']:>5}  {row['before']['median_ms']:>10}  {row['after']['median_ms']:>10}  "
+              f"{row['speedup']:>6}x")
+
+
+if __name__ == "__main__":
+    main()
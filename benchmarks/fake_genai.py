@@ -0,0 +1,170 @@
+"""
+A stand-in for google.genai.Client: same call shapes as the parts TalAgent uses (models / aio.models,
+generate_content and generate_content_stream), canned but well-formed answers, and latency modelled as
+time-to-first-token plus output tokens / throughput. No network, no key.
+
+    agent = TalAgent(client=FakeGenaiClient(ttft=0.4, tokens_per_second=120))
+"""
+
+import asyncio
+import itertools
+import json
+import re
+import time
+from types import SimpleNamespace
+
+from tal.latex import BEGIN_DOCUMENT, LATEX_TEMPLATE
+
+STREAM_CHUNK_TOKENS = 40
+
+_ANALYSIS = {
+    "company_name": "acme",
+    "role_title": "backend engineer",
+    "company_archetype": "growth stage",
+    "role_archetype": "builder",
+    "role_translation_strategy": "lead with shipped systems and scale",
+    "content_plan": {
+        "keep_sections": ["Experience", "Projects", "Education", "Skills"],
+        "drop_sections": [],
+        "top_projects": ["the most recent project"],
+        "bullet_guidelines": "impact first, one metric per bullet",
+    },
+    "good_points": [{"point": "relevant backend experience", "why": "matches the core stack"}],
+    "needs_fixing": [{"issue": "bullets lack metrics", "impact": "reads as generic"}],
+    "proposed_changes": [{"change": "quantify the top bullets", "rationale": "shows scale"}],
+}
+_RESUME = {
+    "name": "Candidate",
+    "contact": [{"kind": "email", "text": "candidate@example.com"}, {"kind": "github", "text": "github.com/candidate"}],
+    "education": [{"institution": "State University", "location": "Pune", "degree": "B.Tech Computer Science, CGPA 8.9", "dates": "2016 -- 2020"}],
+    "experience": [{
+        "title": "Backend Engineer", "company": "Globex", "location": "Remote", "dates": "2020 -- Present",
+        "bullets": ["Cut p95 latency by **40%** moving hot paths to **Go**", "Owned **Kafka** pipelines at **2M events/day**"],
+    }],
+    "projects": [{"name": "Ledger", "tech": "Python, PostgreSQL", "dates": "2021", "bullets": ["Double-entry ledger with **100%** audit coverage"]}],
+    "skills": [{"category": "Languages", "items": "Python, Go, SQL"}, {"category": "Infra", "items": "AWS, Terraform, Kubernetes"}],
+}
+_COMPANY = {
+    "archetype": "growth stage",
+    "size_band": "50-500",
+    "news": [{"date": "2026-09", "hook": "raised a series b to expand the platform team"}],
+}
+_COLD_DM = "hi [name], saw acme is scaling its platform team - i shipped similar systems at my last role. open to a 10-min chat?"
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _classify(contents, config) -> str:
+    if "COMPANY RESEARCH" in str(contents):
+        return "company"
+    if getattr(config, "response_mime_type", None) == "application/json":
+        return "resume_part" if "RESUME PART INPUT" in str(contents) else "analysis"
+    if "LATEX TEMPLATE START" in str(contents):
+        return "latex"
+    return "cold_dm"
+
+
+class FakeGenaiClient:
+    """
+    ttft: seconds before the first token; tokens_per_second: output throughput.
+    Every resume answer is unique (a counter in a comment or a bullet), so compiled-PDF caching doesn't hide
+    compile cost.
+    """
+
+    def __init__(self, ttft: float = 0.3, tokens_per_second: float = 150.0):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.calls = []
+        self.searches = 0  # calls that asked for the Google Search tool
+        self._serial = itertools.count()
+        self.models = _Models(self)
+        self.aio = SimpleNamespace(models=_AsyncModels(self))
+
+    def _answer(self, contents, config) -> tuple[str, str]:
+        kind = _classify(contents, config)
+        self.calls.append(kind)
+        self.searches += bool(getattr(config, "tools", None))
+        if kind == "company":
+            name = re.search(r"COMPANY RESEARCH: (.+)", str(contents)).group(1).strip()
+            return kind, json.dumps({**_COMPANY, "name": name})
+        if kind == "analysis":
+            # The company named in the JD ("... at Acme"), so per-company work can be told apart
+            company = re.search(r" at ([A-Z]\w+)", str(contents))
+            analysis = {**_ANALYSIS, "company_name": company.group(1).lower() if company else "acme"}
+            if '"company_news"' in str(contents):  # no company profile yet: the search fills one
+                analysis.update(company_size_band=_COMPANY["size_band"], company_news=_COMPANY["news"])
+            return kind, json.dumps(analysis)
+        if kind == "resume_part":
+            # Every part's fields in one answer; the agent keeps the ones the part owns
+            serial = next(self._serial)
+            experience = [{**e, "bullets": [*e["bullets"], f"Shipped build {serial}"]} for e in _RESUME["experience"]]
+            return kind, json.dumps({**_RESUME, "name": f"Candidate {serial}", "experience": experience})
+        if kind == "latex":
+            latex = LATEX_TEMPLATE.replace("FULL_NAME", "Candidate")
+            return kind, latex.replace(BEGIN_DOCUMENT, f"{BEGIN_DOCUMENT}\n% build {next(self._serial)}", 1)
+        return kind, _COLD_DM
+
+    def _response(self, text: str, contents) -> SimpleNamespace:
+        usage = SimpleNamespace(
+            prompt_token_count=_estimate_tokens(str(contents)),
+            candidates_token_count=_estimate_tokens(text),
+            thoughts_token_count=0,
+            cached_content_token_count=0,
+            tool_use_prompt_token_count=0,
+        )
+        return SimpleNamespace(text=text, usage_metadata=usage, candidates=[])
+
+    def _chunks(self, text: str) -> list:
+        size = STREAM_CHUNK_TOKENS * 4
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _generation_seconds(self, text: str) -> float:
+        return _estimate_tokens(text) / self.tokens_per_second
+
+
+class _Models:
+    def __init__(self, client: FakeGenaiClient):
+        self._client = client
+
+    def generate_content(self, model=None, contents=None, config=None):
+        _, text = self._client._answer(contents, config)
+        time.sleep(self._client.ttft + self._client._generation_seconds(text))
+        return self._client._response(text, contents)
+
+    def generate_content_stream(self, model=None, contents=None, config=None):
+        _, text = self._client._answer(contents, config)
+        client = self._client
+
+        def chunks():
+            time.sleep(client.ttft)
+            parts = client._chunks(text)
+            for i, part in enumerate(parts):
+                time.sleep(client._generation_seconds(part))
+                last = i == len(parts) - 1
+                yield client._response(part, contents) if last else SimpleNamespace(text=part, usage_metadata=None)
+        return chunks()
+
+
+class _AsyncModels:
+    def __init__(self, client: FakeGenaiClient):
+        self._client = client
+
+    async def generate_content(self, model=None, contents=None, config=None):
+        _, text = self._client._answer(contents, config)
+        await asyncio.sleep(self._client.ttft + self._client._generation_seconds(text))
+        return self._client._response(text, contents)
+
+    async def generate_content_stream(self, model=None, contents=None, config=None):
+        _, text = self._client._answer(contents, config)
+        client = self._client
+
+        async def chunks():
+            await asyncio.sleep(client.ttft)
+            parts = client._chunks(text)
+            for i, part in enumerate(parts):
+                await asyncio.sleep(client._generation_seconds(part))
+                last = i == len(parts) - 1
+                yield client._response(part, contents) if last else SimpleNamespace(text=part, usage_metadata=None)
+        return chunks()
@@ -0,0 +1,80 @@
+"""
+Multi-JD benchmark: one resume against N job descriptions, one role after another (what the single-JD
+flow costs a user applying to N roles) vs pipeline.fan_out. Offline: fake Gemini, stand-in compile server.
+
+    python -m benchmarks.fanout [--roles 10] [--companies 4] [--ttft 0.3] [--tps 150] [--compile-latency 0.2]
+"""
+
+import argparse
+import asyncio
+import io
+import tempfile
+import time
+
+from benchmarks.corpus import make_resume_pdf
+from benchmarks.fake_genai import FakeGenaiClient
+from benchmarks.standin import StandInServer
+from tal import config
+
+JD_TEMPLATE = (
+    "Backend Engineer ({n}) at Company{company}\n"
+    "We are looking for engineers with Python, Go, PostgreSQL and Kubernetes experience.\n"
+    "You will design services on AWS, own Terraform infrastructure and Kafka pipelines.\n"
+    "Must have 3+ years of experience shipping production systems.\n"
+)
+
+
+async def _one_by_one(agent, data: dict, jds: list) -> None:
+    from tal.pipeline import build_resume
+
+    for jd in jds:
+        analysis = await agent.analyze_resume_async(data["text"], jd, sections=data["sections"])
+        await build_resume(
+            agent, data["text"], jd, analysis,
+            links=data["links"], max_pages=data["pages"], sections=data["sections"],
+        )
+
+
+def run(roles: int, companies: int, ttft: float, tps: float, compile_latency: float) -> dict:
+    from tal.agent import TalAgent
+    from tal.pipeline import fan_out
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as cache_dir, StandInServer(latency=compile_latency) as compile_server:
+        config.CACHE_DIR = cache_dir
+        config.TELEMETRY_LOG = ""
+        config.COMPILE_BACKENDS = ["ytotech"]
+        config.YTOTECH_URL = compile_server.url
+        for seed, mode in enumerate(("one_by_one", "fan_out")):
+            # A different resume and JD set per mode, so neither run answers from the other's cached results
+            jds = [JD_TEMPLATE.format(n=f"{mode}-{i}", company=i % companies) for i in range(roles)]
+            client = FakeGenaiClient(ttft=ttft, tokens_per_second=tps)
+            agent = TalAgent(client=client)
+            data = agent.extract_pdf_data(io.BytesIO(make_resume_pdf(2, seed=seed)))
+            started = time.perf_counter()
+            if mode == "fan_out":
+                asyncio.run(fan_out(agent, data, jds))
+            else:
+                asyncio.run(_one_by_one(agent, data, jds))
+            timings[mode] = {"wall_s": round(time.perf_counter() - started, 3), "llm_calls": len(client.calls)}
+    timings["speedup"] = round(timings["one_by_one"]["wall_s"] / timings["fan_out"]["wall_s"], 2)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--roles", type=int, default=10)
+    parser.add_argument("--companies", type=int, default=4, help="distinct companies among the roles")
+    parser.add_argument("--ttft", type=float, default=0.3, help="fake Gemini time to first token (s)")
+    parser.add_argument("--tps", type=float, default=150.0, help="fake Gemini output tokens per second")
+    parser.add_argument("--compile-latency", type=float, default=0.2, help="stand-in compile server latency (s)")
+    args = parser.parse_args()
+
+    result = run(args.roles, args.companies, args.ttft, args.tps, args.compile_latency)
+    for mode in ("one_by_one", "fan_out"):
+        print(f"{mode:<12} {result[mode]['wall_s']:>8.2f} s   {result[mode]['llm_calls']:>4} llm calls")
+    print(f"speedup      {result['speedup']:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Streamlit script cost: cold start (first run in a fresh process) and per-rerun time on the upload screen.
+
+    python -m benchmarks.rerun [--app app.py] [--reruns 30] [--json]
+
+Runs the app headlessly with streamlit's AppTest; the API key is a dummy, no request leaves the machine.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+
+def _measure(app_path: str, reruns: int) -> dict:
+    """Runs inside a fresh interpreter, so the first run pays every import."""
+    at = AppTest.from_file(os.path.abspath(app_path), default_timeout=60)
+    at.secrets["GEMINI_API_KEY"] = "benchmark-dummy-key"
+    started = time.perf_counter()
+    at.run()
+    cold_ms = (time.perf_counter() - started) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    samples = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - started) * 1000)
+    heavy = ("google.genai", "fitz", "streamlit_pdf_viewer")
+    return {
+        "cold_start_ms": round(cold_ms, 1),
+        "rerun_median_ms": round(statistics.median(samples), 2),
+        "rerun_p95_ms": round(sorted(samples)[int(0.95 * (len(samples) - 1))], 2),
+        "loaded_on_upload_screen": [m for m in heavy if m in sys.modules],
+    }
+
+
+def run(app_path: str, reruns: int) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.rerun", "--app", app_path, "--reruns", str(reruns), "--child"],
+        capture_output=True, text=True, check=True, env={**os.environ, "PYTHONWARNINGS": "ignore"},
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default="app.py")
+    parser.add_argument("--reruns", type=int, default=30)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_measure(args.app, args.reruns)))
+        return
+    result = run(args.app, args.reruns)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for key, value in result.items():
+        print(f"{key:<24} {value}")
+
+
+if __name__ == "__main__":
+    main()
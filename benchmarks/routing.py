@@ -0,0 +1,111 @@
+"""
+Model-routing benchmark: analysis, cold DM and resume generation for a few users, with every task on the pro
+tier, on the default tiered routes, and on the tiered routes while the pro model is degraded (its first token
+arrives after the resume-part budget, so parts fall back to the fast tier). Offline: fake Gemini, one per tier.
+
+    python -m benchmarks.routing [--users 6] [--pro-ttft 2.0] [--degraded-ttft 20] [--part-budget 8]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks.fake_genai import FakeGenaiClient
+from tal import config
+from tal.telemetry import metrics
+
+RESUME = (
+    "Candidate {n} ({mode})\nEXPERIENCE\nBackend Engineer, Globex 2020 -- Present\n"
+    "- Built Python and Go services on Kubernetes handling {n}M requests a day ({mode})\n"
+    "SKILLS\nPython, Go, PostgreSQL, Kubernetes, AWS, {mode}\n"
+)
+JD = "Backend Engineer at Acme\nWe are looking for engineers with Python, Go, PostgreSQL and Kubernetes experience.\n"
+
+
+class TieredFake:
+    """Routes each call to the fake for its model, so tiers can be given different latencies."""
+
+    def __init__(self, fakes: dict):
+        self.fakes = fakes  # model -> FakeGenaiClient
+        self.models = SimpleNamespace(
+            generate_content=lambda model=None, **kw: fakes[model].models.generate_content(model=model, **kw),
+            generate_content_stream=lambda model=None, **kw: fakes[model].models.generate_content_stream(model=model, **kw),
+        )
+        self.aio = SimpleNamespace(models=SimpleNamespace(
+            generate_content=lambda model=None, **kw: fakes[model].aio.models.generate_content(model=model, **kw),
+            generate_content_stream=lambda model=None, **kw: fakes[model].aio.models.generate_content_stream(model=model, **kw),
+        ))
+
+
+async def _session(agent, mode: str, n: int, timings: dict) -> None:
+    resume = RESUME.format(n=n, mode=mode)
+    started = time.perf_counter()
+    analysis = await agent.analyze_resume_async(resume, JD)
+    timings["analysis"].append(time.perf_counter() - started)
+    started = time.perf_counter()
+    await agent.generate_cold_dm_async(resume, JD, analysis["company_name"], analysis=analysis)
+    timings["cold_dm"].append(time.perf_counter() - started)
+    started = time.perf_counter()
+    await agent.generate_latex_content_async(resume, JD, analysis, [])
+    timings["resume"].append(time.perf_counter() - started)
+
+
+def _fallbacks() -> int:
+    return int(metrics.total("tal_route_total", task="resume_part", tier="fast", outcome="ok"))
+
+
+def run(users: int, pro_ttft: float, degraded_ttft: float, part_budget: float) -> dict:
+    from tal.agent import TalAgent
+
+    results = {}
+    routes, budgets = dict(config.MODEL_ROUTES), dict(config.LATENCY_BUDGETS)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        config.CACHE_DIR = cache_dir
+        config.TELEMETRY_LOG = ""
+        config.COMPANY_PROFILES = False
+        config.LATENCY_BUDGETS = {**budgets, "resume_part": part_budget}
+        for mode in ("pro-only", "tiered", "degraded"):
+            config.MODEL_ROUTES = {task: ["pro"] for task in routes} if mode == "pro-only" else routes
+            fakes = {
+                config.MODEL_TIERS["pro"]: FakeGenaiClient(ttft=degraded_ttft if mode == "degraded" else pro_ttft, tokens_per_second=80),
+                config.MODEL_TIERS["fast"]: FakeGenaiClient(ttft=0.5, tokens_per_second=250),
+                config.MODEL_TIERS["lite"]: FakeGenaiClient(ttft=0.25, tokens_per_second=400),
+            }
+            agent = TalAgent(client=TieredFake(fakes))
+            timings = {"analysis": [], "cold_dm": [], "resume": []}
+            fallbacks = _fallbacks()
+
+            async def all_users():
+                await asyncio.gather(*(_session(agent, mode, n, timings) for n in range(users)))
+
+            started = time.perf_counter()
+            asyncio.run(all_users())
+            results[mode] = {
+                "wall_s": round(time.perf_counter() - started, 2),
+                **{step: round(sum(t) / len(t), 2) for step, t in timings.items()},
+                "part_fallbacks": _fallbacks() - fallbacks,
+            }
+    config.MODEL_ROUTES, config.LATENCY_BUDGETS = routes, budgets
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=6)
+    parser.add_argument("--pro-ttft", type=float, default=2.0, help="pro tier time to first token (s)")
+    parser.add_argument("--degraded-ttft", type=float, default=20.0, help="pro tier time to first token while degraded (s)")
+    parser.add_argument("--part-budget", type=float, default=8.0, help="resume-part latency budget (s)")
+    args = parser.parse_args()
+
+    result = run(args.users, args.pro_ttft, args.degraded_ttft, args.part_budget)
+    for mode, r in result.items():
+        print(
+            f"{mode:<9} wall {r['wall_s']:>6.2f} s   analysis {r['analysis']:>5.2f} s   cold dm {r['cold_dm']:>5.2f} s"
+            f"   resume {r['resume']:>5.2f} s   part fallbacks {r['part_fallbacks']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
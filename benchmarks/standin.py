@@ -0,0 +1,106 @@
+"""
+Local stand-ins for the remote compile services, with injectable latency and failures.
+Both endpoints are served (`POST /builds/sync` like ytotech, `GET /compile?text=` like latexonline)
+and answer with a tiny valid PDF, so the compile client can be exercised without the network.
+
+    with StandInServer(latency=0.5, failure_rate=0.2) as server:
+        os.environ["TAL_YTOTECH_URL"] = server.url
+"""
+
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fitz  # PyMuPDF
+
+
+def _tiny_pdf() -> bytes:
+    with fitz.open() as doc:
+        doc.new_page().insert_text((72, 72), "stand-in")
+        return doc.tobytes()
+
+
+STAND_IN_PDF = _tiny_pdf()
+
+
+class StandInServer:
+    """
+    Threaded HTTP server on 127.0.0.1 (random port).
+    latency: seconds before answering (a callable returning seconds works too, for jitter)
+    failure_rate: share of requests answered with `failure_status`
+    failure_status: HTTP status for failures, or None to drop the connection instead
+    """
+
+    def __init__(self, latency=0.0, failure_rate: float = 0.0, failure_status: int = 503, seed: int = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real services
+            disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self):
+                with server._lock:
+                    server.requests += 1
+                    fail = server._rng.random() < server.failure_rate
+                delay = server.latency() if callable(server.latency) else server.latency
+                time.sleep(delay)
+                if fail and server.failure_status is None:
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                status, body, ctype = (
+                    (server.failure_status, b"stand-in failure", "text/plain") if fail
+                    else (200, STAND_IN_PDF, "application/pdf")
+                )
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up (timeout or a lost hedge)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self._respond()
+
+            def do_GET(self):
+                self._respond()
+
+        return Handler
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
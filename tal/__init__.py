@@ -0,0 +1,4 @@
+"""
+Tal Resume Fixer - supporting modules.
+The Streamlit UI lives in app.py; everything here is UI-agnostic.
+"""
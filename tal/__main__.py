@@ -0,0 +1,25 @@
+"""
+Command-line entry point: python -m tal <command>
+
+    batch    run many resume x JD pairs headlessly
+"""
+
+import argparse
+import logging
+import sys
+
+from tal import batch
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tal", description="Tal Resume Fixer - headless tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    batch.add_parser(commands)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,732 @@
+"""
+TalAgent - the Gemini-backed core of Tal Resume Fixer.
+Prompts, generation and compilation, with no Streamlit dependency so the app and the CLI share it.
+"""
+
+import asyncio
+import contextvars
+import copy
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tal import config
+from tal.analysis import GENERIC_ANALYSIS, Analysis, AnalysisWithCompany, parse_analysis, schema_block
+from tal.cache import content_key, normalize_text, open_cache
+from tal.cassette import wrap_client
+from tal.companies import company_key, company_profiles, guess_company, profile_block
+from tal.compile import compile_pdf, pdf_store
+from tal.latex import LATEX_TEMPLATE, LatexStream, LatexStreamAborted
+from tal.parts import merge_parts, plan_parts
+from tal.render import render_resume, resume_schema
+from tal.resources import get_genai_client
+from tal.routing import primary_model, route, route_async, stream_model
+from tal.scheduler import ScheduledClient, priority
+from tal.sections import compact_jd, compact_resume
+from tal.skills import facts_block, gap_report
+from tal.telemetry import annotate, metrics, record_fallback, record_retry, record_usage, span, traced
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the analysis prompt or schema changes so stale cached analyses are ignored
+ANALYSIS_PROMPT_VERSION = "analysis-v6"
+# Same for the structured resume-part prompts (cached parts are keyed on it)
+RESUME_PARTS_PROMPT_VERSION = "parts-v1"
+
+_PART_BRIEFS = {
+    "profile": "the header (name and contact items) and ALL education entries",
+    "experience": "the work experience entries, with bullets aligned to the role strategy",
+    "projects": "the projects - ONLY the plan's top projects, max 2",
+    "skills": "the technical skills, grouped by category, JD-relevant ones first",
+    "extra": "sections the plan keeps beyond education / experience / projects / skills (e.g. Achievements); leave it empty if there are none",
+}
+
+
+class TalAgent:
+    """
+    The brain: analysis, LaTeX generation, cold DMs and compilation.
+    UI-agnostic; user-facing errors go to `on_error` (st.error in the app, the log elsewhere).
+    """
+
+    def __init__(self, api_key: str = None, client=None, on_error=None):
+        self._client = wrap_client(lambda: ScheduledClient(client)) if client else None
+        self._api_key = api_key
+        self.on_error = on_error or logger.error
+        self.analysis_cache = open_cache(
+            "analysis", ttl=config.ANALYSIS_CACHE_TTL, max_bytes=config.ANALYSIS_CACHE_MAX_BYTES
+        )
+        self.section_cache = open_cache(
+            "sections", ttl=config.SECTION_CACHE_TTL, max_bytes=config.SECTION_CACHE_MAX_BYTES
+        )
+        self.pdf_store = pdf_store()
+        self._part_tasks = {}  # part key -> in-flight generation (async path)
+
+    @property
+    def client(self):
+        """
+        The shared Gemini client, created (and google.genai imported) on first use.
+        Calls queue in the process-wide scheduler (rate limits, priorities, 429 retries);
+        with TAL_CASSETTE_MODE set, they go through the record / replay layer first.
+        """
+        if self._client is None:
+            self._client = wrap_client(lambda: ScheduledClient(get_genai_client(self._api_key or config.load_api_key())))
+        return self._client
+
+    @traced("agent.extract_pdf_data")
+    def extract_pdf_data(self, file) -> dict:
+        """Extract text, page count, and hyperlinks from PDF using PyMuPDF (fitz)."""
+        from tal.pdf import extract_pdf_data  # PyMuPDF is only loaded once a PDF shows up
+
+        try:
+            data = extract_pdf_data(file)
+            annotate(pages=data["pages"], chars=len(data["text"]), sections=len(data["sections"]))
+            return data
+        except Exception as e:
+            record_fallback("extract_pdf_data", e)
+            self.on_error(f"Error reading PDF: {e}")
+            return {"text": "", "pages": 0, "links": [], "sections": []}
+
+    @traced("agent.analyze_resume")
+    def analyze_resume(self, resume_text: str, jd_text: str, sections: list = None) -> dict:
+        """
+        Perform deep analysis using the new Dynamic Strategy Engine.
+        Determines archetypes and creates a precise Execution Plan.
+        Results are cached by content, so repeat analyses skip the Gemini call.
+        Keyword gaps and scores come from the local skills index, not the model.
+        """
+        cache_key = self._analysis_cache_key(resume_text, jd_text)
+        cached = self.analysis_cache.get(cache_key)
+        annotate(cache="hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
+
+        report = gap_report(resume_text, jd_text)
+        guess = guess_company(jd_text)
+        profile = company_profiles().get(guess)
+        try:
+            response, fell_back = route(
+                "analysis", self._analysis_request(resume_text, jd_text, report, sections, profile),
+                self.client.models.generate_content, check=lambda r: self._parse_analysis(r, profile),
+            )
+            return self._finish_analysis(cache_key, response, report, profile, guess, cache=not fell_back)
+        except Exception as e:
+            return self._analysis_fallback(e, report)
+
+    @traced("agent.analyze_resume")
+    async def analyze_resume_async(self, resume_text: str, jd_text: str, sections: list = None) -> dict:
+        """Async twin of analyze_resume, on the google-genai async client."""
+        cache_key = self._analysis_cache_key(resume_text, jd_text)
+        cached = self.analysis_cache.get(cache_key)
+        annotate(cache="hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
+
+        report = gap_report(resume_text, jd_text)
+        guess = guess_company(jd_text)
+        profile = company_profiles().get(guess)
+        try:
+            response, fell_back = await route_async(
+                "analysis", self._analysis_request(resume_text, jd_text, report, sections, profile),
+                self.client.aio.models.generate_content, check=lambda r: self._parse_analysis(r, profile),
+            )
+            return self._finish_analysis(cache_key, response, report, profile, guess, cache=not fell_back)
+        except Exception as e:
+            return self._analysis_fallback(e, report)
+
+    def _analysis_cache_key(self, resume_text: str, jd_text: str) -> str:
+        return content_key(
+            normalize_text(resume_text), normalize_text(jd_text), primary_model("analysis"), ANALYSIS_PROMPT_VERSION
+        )
+
+    def _analysis_request(self, resume_text: str, jd_text: str, report: dict, sections: list = None, profile: dict = None) -> dict:
+        """
+        Prompt + config for the analysis call (shared by the sync and async paths).
+        With a fresh company profile the archetype comes from it and Google Search is skipped; without one,
+        the search results also fill a new profile (size band, news hooks) for later calls.
+        """
+        resume = compact_resume(resume_text, config.ANALYSIS_RESUME_TOKENS, "analysis", sections)
+        jd = compact_jd(jd_text, config.ANALYSIS_JD_TOKENS)
+        if profile:
+            research = f"- Use the COMPANY PROFILE for the \"Company Archetype\" (do not search):\n{profile_block(profile)}"
+        else:
+            research = "- Search Google for the company to determine its \"Company Archetype\":"
+        prompt = f"""
+        You are Tal, a brutal but genius career strategist.
+        
+        TASK 1: ARCHETYPE DETECTION{"" if profile else " (Using Search)"}
+        {research}
+          - "Early Stage": <50 employees, chaos, needs builders/generalists.
+          - "Growth Stage": 50-500 employees, scaling, needs processes/specialists.
+          - "Corporate": >500 employees, stable, needs compliance/politics/depth.
+        - Determine the "Role Archetype" based on JD:
+          - "Engineering": Focus on stack, scale, complexity.
+          - "Product": Focus on user, metrics, strategy.
+          - "Growth/Marketing": Focus on CAC, revenue, experiments.
+          - "Research": Focus on patents, publications, novelty.
+          - "Generalist": Ops, Chief of Staff, Founder's Office.
+        
+        TASK 2: STRATEGY & CONTENT PLAN
+        - Define a "Role Translation Strategy": How to frame the candidate's past for *this* specific future.
+        - Create a strictly defined CONTENT PLAN for the resume generator to follow:
+          - **keep_sections**: Which sections MUST stay? (e.g. "Experience", "Projects").
+          - **drop_sections**: Which sections MUST go to save space? (e.g. "Volunteering", "Patents" if irrelevant).
+          - **top_projects**: Select exactly 2 strongest projects that match the JD best. Drop the rest.
+          - **bullet_strategy**: "Dense" (for corp), "Punchy" (for startup), "Technical" (for eng).
+        - Use the KEYWORD FACTS below when picking projects and writing bullet guidelines.
+        
+        KEYWORD FACTS (computed from a skills lexicon - treat as ground truth, do NOT redo the gap analysis):
+        {facts_block(report)}
+        
+        RESUME:
+        {resume}
+        
+        JOB DESCRIPTION:
+        {jd}
+        
+        Return a JSON object with this exact schema (all keys lowercase):
+        {schema_block(AnalysisWithCompany if profile is None else Analysis)}
+        """
+        
+        from google.genai import types
+
+        return {
+            "model": primary_model("analysis"),
+            "contents": prompt,
+            "config": types.GenerateContentConfig(
+                response_mime_type="application/json",
+                # The SDK can enforce the schema, but not together with Google Search
+                response_schema=Analysis if profile else None,
+                tools=None if profile else [types.Tool(google_search=types.GoogleSearch())],
+                temperature=0.3,
+            ),
+        }
+
+    def _finish_analysis(self, cache_key: str, response, report: dict, profile: dict = None, guess: str = "", cache: bool = True) -> dict:
+        record_usage("analyze_resume", response)
+        analysis, notes = self._parse_analysis(response, profile)
+        for repair in notes["repairs"]:
+            metrics.inc("tal_analysis_repairs_total", repair=repair)
+        for path in notes["defaulted"]:
+            metrics.inc("tal_analysis_defaulted_total", field=path.split(".")[0])
+        annotate(analysis_repairs=",".join(notes["repairs"]), analysis_defaulted=len(notes["defaulted"]))
+        size_band, news = analysis.pop("company_size_band", None), analysis.pop("company_news", None)
+        if profile:
+            analysis["company_archetype"] = profile["archetype"]
+        elif "company_name" not in notes["defaulted"]:
+            # The local guess is only an alias when it names the same company (it can misfire: "apply at LinkedIn")
+            same = company_key(guess) == company_key(analysis["company_name"])
+            company_profiles().put({
+                "name": analysis["company_name"],
+                "archetype": analysis.get("company_archetype"),
+                "size_band": size_band,
+                "news": [h for h in news or [] if isinstance(h, dict)],
+            }, *([guess] if same else []))
+        analysis.update(report)
+        # A partial analysis is used, but not kept: the next request asks again
+        partial = any(path.split(".")[0] in Analysis.model_fields for path in notes["defaulted"])
+        if cache and not partial:
+            self.analysis_cache.set(cache_key, analysis)
+        return analysis
+
+    @staticmethod
+    def _parse_analysis(response, profile: dict = None) -> tuple[dict, dict]:
+        return parse_analysis(response.text, AnalysisWithCompany if profile is None else Analysis)
+
+    def _analysis_fallback(self, error: Exception, report: dict) -> dict:
+        """Generic strategy, but a real keyword gap report (it doesn't need Gemini)."""
+        record_fallback("analyze_resume", error)
+        self.on_error(f"Analysis failed: {error}")
+        return {**copy.deepcopy(GENERIC_ANALYSIS), **report}
+
+    @traced("agent.generate_cold_dm")
+    def generate_cold_dm(self, resume_text: str, jd_text: str, company_name: str, analysis: dict = None, sections: list = None) -> str:
+        """
+        Generate a highly targeted cold DM based on the Company Archetype.
+        """
+        try:
+            with priority("optional"):
+                response, _ = route(
+                    "cold_dm", self._cold_dm_request(resume_text, jd_text, company_name, analysis, sections),
+                    self.client.models.generate_content, check=self._text_answer,
+                )
+            record_usage("generate_cold_dm", response)
+            return response.text.strip().lower()
+        except Exception as e:
+            record_fallback("generate_cold_dm", e)
+            return self._cold_dm_fallback(company_name, analysis)
+
+    @traced("agent.generate_cold_dm")
+    async def generate_cold_dm_async(self, resume_text: str, jd_text: str, company_name: str, analysis: dict = None, sections: list = None) -> str:
+        """Async twin of generate_cold_dm."""
+        try:
+            with priority("optional"):
+                response, _ = await route_async(
+                    "cold_dm", self._cold_dm_request(resume_text, jd_text, company_name, analysis, sections),
+                    self.client.aio.models.generate_content, check=self._text_answer,
+                )
+            record_usage("generate_cold_dm", response)
+            return response.text.strip().lower()
+        except Exception as e:
+            record_fallback("generate_cold_dm", e)
+            return self._cold_dm_fallback(company_name, analysis)
+
+    def _cold_dm_request(self, resume_text: str, jd_text: str, company_name: str, analysis: dict = None, sections: list = None) -> dict:
+        resume = compact_resume(resume_text, config.COLD_DM_RESUME_TOKENS, "cold_dm", sections)
+        jd = compact_jd(jd_text, config.COLD_DM_JD_TOKENS)
+        # News hooks from a fresh company profile replace the live search
+        profile = company_profiles().get(company_name)
+        if profile and profile.get("news"):
+            research = f"""RESEARCH (already done - do NOT search):
+        {profile_block(profile)}
+        Pick the most recent SPECIFIC HOOK from the profile."""
+        else:
+            profile = None
+            research = f"""RESEARCH INSTRUCTIONS (Use Google Search):
+        1. Search for "{company_name} recent news", "{company_name} funding", "{company_name} product launch".
+        2. Find a SPECIFIC HOOK (e.g. "Series B raise", "New AI feature", "Expansion to US")."""
+
+        # Extract dynamic context
+        company_archetype = "growth stage"
+        role_archetype = "generalist"
+        strongest_point = "my background"
+        
+        if analysis:
+            company_archetype = analysis.get('company_archetype', 'growth stage').lower()
+            role_archetype = analysis.get('role_archetype', 'generalist').lower()
+            good_points = [p.get('point', '') for p in analysis.get('good_points', [])]
+            if good_points:
+                strongest_point = good_points[0].lower()
+
+        prompt = f"""
+        You are an elite career strategist.
+        
+        CONTEXT:
+        - Target Company: {company_name} ({company_archetype})
+        - Role: {role_archetype}
+        - Candidate's "Ace Card": "{strongest_point}"
+        
+        TASK: Write ONE high-impact Cold DM (max 50 words) to a Hiring Manager or Founder.
+        
+        TONE STRATEGY (Based on Archetype):
+        - If "Early Stage": "Builder Energy". Direct, slightly chaotic, "I ship fast", "I solve pain". Reference a specific problem they have.
+        - If "Growth Stage": "Value Energy". Quantitative, "I scaled X to Y", "I built the system you need". Reference their recent win/round.
+        - If "Corporate": "Professional Precision". Polished, "I specialize in [Domain]", "I led [Project] at [Top Firm]". Reference a strategic initiative.
+        
+        {research}
+        
+        STRUCTURE:
+        1. **The Hook**: "Saw you just launched X..." or "Congratz on the Series A..." (Show you know them).
+        2. **The Leverage**: "At [My Past Company], I built the exact system you need for Y..." (Connect YOUR ace card to THEIR problem).
+        3. **The Ask**: "Open to a 10-min intro?"
+        
+        CONSTRAINTS:
+        - NO fluff ("Hope you are well").
+        - NO generic praise ("Love what you're doing").
+        - STRICTLY under 50 words.
+        - All text must be lowercase (style choice).
+        
+        RESUME SUMMARY:
+        {resume}
+        
+        JOB DESCRIPTION:
+        {jd}
+        
+        Output only the message text.
+        """
+        
+        from google.genai import types
+
+        return {
+            "model": primary_model("cold_dm"),
+            "contents": prompt,
+            "config": types.GenerateContentConfig(
+                tools=None if profile else [types.Tool(google_search=types.GoogleSearch())],
+                temperature=0.7,
+            ),
+        }
+
+    @traced("agent.research_company")
+    async def research_company_async(self, company_name: str) -> dict:
+        """A fresh company profile from Google Search (the background refresher's call)."""
+        response, _ = await route_async(
+            "research", self._company_request(company_name), self.client.aio.models.generate_content, check=self._json_answer
+        )
+        record_usage("research_company", response)
+        profile = self._json_answer(response)
+        profile["news"] = [h for h in profile.get("news") or [] if isinstance(h, dict)]
+        return {**profile, "name": profile.get("name") or company_name}
+
+    def _company_request(self, company_name: str) -> dict:
+        prompt = f"""
+        COMPANY RESEARCH: {company_name}
+        Search Google for the company and return a JSON object:
+        {{
+            "name": "the company's usual name",
+            "archetype": "early stage (<50 employees) / growth stage (50-500) / corporate (500+)",
+            "size_band": "<50 / 50-500 / 500+",
+            "news": [{{"date": "YYYY-MM", "hook": "one specific recent funding round, launch or expansion"}}]
+        }}
+        At most 3 news items, most recent first, from the last 12 months only.
+        """
+
+        from google.genai import types
+
+        return {
+            "model": primary_model("research"),
+            "contents": prompt,
+            "config": types.GenerateContentConfig(
+                response_mime_type="application/json",
+                tools=[types.Tool(google_search=types.GoogleSearch())],
+                temperature=0.2,
+            ),
+        }
+
+    def _cold_dm_fallback(self, company_name: str, analysis: dict = None) -> str:
+        role_archetype = (analysis or {}).get('role_archetype', 'generalist').lower()
+        return f"hi [name], saw {company_name} is scaling {role_archetype} - i built similar systems at my last role. open to a 10-min chat? (search unavailable)"
+
+    @traced("agent.generate_latex_content")
+    def generate_latex_content(self, resume_text: str, jd_text: str, analysis: dict, links: list, max_pages: int = 1, sections: list = None, notes: dict = None) -> str:
+        """
+        Generate LaTeX using the strict 'Brain & Hands' architecture.
+        The 'Hands' (this function) must purely execute the 'Brain's' (analysis) Content Plan.
+        In structured mode the resume is built part by part; `notes` ({part: instruction}) refines single parts.
+        """
+        try:
+            if config.LATEX_OUTPUT == "structured":
+                return self._generate_parts(self._resume_parts(resume_text, jd_text, analysis, links, sections, notes))
+            response, _ = route(
+                "latex", self._latex_request(resume_text, jd_text, analysis, links, max_pages, sections),
+                self.client.models.generate_content, check=self._text_answer,
+            )
+            record_usage("generate_latex_content", response)
+            return self._clean_latex(response.text)
+        except Exception as e:
+            return self._latex_fallback(e)
+
+    @traced("agent.generate_latex_content")
+    async def generate_latex_content_async(self, resume_text: str, jd_text: str, analysis: dict, links: list, max_pages: int = 1, sections: list = None, notes: dict = None) -> str:
+        """Async twin of generate_latex_content."""
+        try:
+            if config.LATEX_OUTPUT == "structured":
+                return await self._generate_parts_async(self._resume_parts(resume_text, jd_text, analysis, links, sections, notes))
+            response, _ = await route_async(
+                "latex", self._latex_request(resume_text, jd_text, analysis, links, max_pages, sections),
+                self.client.aio.models.generate_content, check=self._text_answer,
+            )
+            record_usage("generate_latex_content", response)
+            return self._clean_latex(response.text)
+        except Exception as e:
+            return self._latex_fallback(e)
+
+    @traced("agent.generate_latex_content")
+    def generate_latex_content_stream(self, resume_text: str, jd_text: str, analysis: dict, links: list, max_pages: int = 1, on_chunk=None, sections: list = None, notes: dict = None) -> str:
+        """
+        Streaming generate_latex_content: calls on_chunk(latex_so_far) as tokens arrive
+        and cuts the stream short as soon as the output breaks the document structure.
+        In structured mode the document grows a part at a time instead.
+        """
+        if config.LATEX_OUTPUT == "structured":
+            try:
+                return self._generate_parts(self._resume_parts(resume_text, jd_text, analysis, links, sections, notes), on_chunk)
+            except Exception as e:
+                return self._latex_fallback(e)
+        request = self._latex_request(resume_text, jd_text, analysis, links, max_pages, sections)
+        annotate(stream=True)
+        error = None
+        for attempt in range(config.LATEX_STREAM_RETRIES + 1):
+            stream = LatexStream()
+            chunks = last_chunk = None
+            try:
+                chunks = self.client.models.generate_content_stream(**{**request, "model": stream_model("latex", attempt)})
+                for chunk in chunks:
+                    last_chunk = chunk
+                    if stream.feed(chunk.text or "") and on_chunk:
+                        on_chunk(stream.text)
+                    if stream.done:
+                        break
+                record_usage("generate_latex_content", last_chunk)
+                return self._clean_latex(stream.text)
+            except LatexStreamAborted as e:
+                record_retry("generate_latex_content", e)
+                error = e
+            except Exception as e:
+                return self._latex_fallback(e)
+            finally:
+                # Closing the iterator drops the HTTP stream, so we stop paying for tokens
+                if hasattr(chunks, "close"):
+                    chunks.close()
+        return self._latex_fallback(error)
+
+    @traced("agent.generate_latex_content")
+    async def generate_latex_content_stream_async(self, resume_text: str, jd_text: str, analysis: dict, links: list, max_pages: int = 1, on_chunk=None, sections: list = None, notes: dict = None) -> str:
+        """Async twin of generate_latex_content_stream."""
+        if config.LATEX_OUTPUT == "structured":
+            try:
+                return await self._generate_parts_async(
+                    self._resume_parts(resume_text, jd_text, analysis, links, sections, notes), on_chunk
+                )
+            except Exception as e:
+                return self._latex_fallback(e)
+        request = self._latex_request(resume_text, jd_text, analysis, links, max_pages, sections)
+        annotate(stream=True)
+        error = None
+        for attempt in range(config.LATEX_STREAM_RETRIES + 1):
+            stream = LatexStream()
+            chunks = last_chunk = None
+            try:
+                chunks = await self.client.aio.models.generate_content_stream(**{**request, "model": stream_model("latex", attempt)})
+                async for chunk in chunks:
+                    last_chunk = chunk
+                    if stream.feed(chunk.text or "") and on_chunk:
+                        on_chunk(stream.text)
+                    if stream.done:
+                        break
+                record_usage("generate_latex_content", last_chunk)
+                return self._clean_latex(stream.text)
+            except LatexStreamAborted as e:
+                record_retry("generate_latex_content", e)
+                error = e
+            except Exception as e:
+                return self._latex_fallback(e)
+            finally:
+                if hasattr(chunks, "aclose"):
+                    await chunks.aclose()
+        return self._latex_fallback(error)
+
+    def _latex_request(self, resume_text: str, jd_text: str, analysis: dict, links: list, max_pages: int = 1, sections: list = None) -> dict:
+        # Extract the Content Plan from the Brain
+        content_plan = analysis.get("content_plan", {})
+        keep_sections = content_plan.get("keep_sections", ["Experience", "Projects", "Education"])
+        drop_sections = content_plan.get("drop_sections", [])
+        top_projects = content_plan.get("top_projects", [])
+        bullet_guidelines = content_plan.get("bullet_guidelines", "Standard professional bullets")
+        
+        # Other Strategy Elements
+        company = analysis.get("company_name", "the company").lower()
+        role = analysis.get("role_title", "the role").lower()
+        strategy = analysis.get("role_translation_strategy", "Focus on impact").lower()
+        irrelevant_terms = [s.lower() for s in analysis.get("irrelevant_skills", [])]
+        
+        # Link Handling
+        clean_links = [str(l) for l in links if isinstance(l, str)]
+        links_str = "\n".join(clean_links)
+
+        # Budgeted resume / JD (the generator must see every section, so nothing is dropped by type)
+        resume = compact_resume(resume_text, config.LATEX_RESUME_TOKENS, "latex", sections)
+        jd = compact_jd(jd_text, config.LATEX_JD_TOKENS)
+        
+        prompt = f"""
+        You are an obedient LaTeX generator. You have NO creative license. 
+        You must STRICTLY execute the provided CONTENT PLAN to build a 1-page resume.
+        
+        CONTENT PLAN (The Law):
+        1. **KEEP Sections**: {keep_sections} ONLY.
+        2. **DROP Sections**: {drop_sections} (Do NOT include these headers or content).
+        3. **PROJECTS**: Include ONLY these specific projects: {top_projects}. DELETE ALL OTHERS.
+        4. **BULLET STRATEGY**: {bullet_guidelines}.
+        5. **IRRELEVANT TERMS**: Remove mentions of: {irrelevant_terms}.
+        
+        STRATEGY ALIGNMENT:
+        - "Role Strategy": {strategy}
+        - "Anti-Hallucination": Do NOT invent skills. Only use what is in the input resume.
+        
+        LATEX RULES:
+        1. **One Page Limit (DRACONIAN)**:
+           - The resume MUST fit on exactly 1 page.
+           - **Project Limit**: STRICTLY MAX 2 PROJECTS. If the plan lists more, ignore them.
+           - **If content is DENSE**: Add `\\renewcommand{{\\resumeBulletSize}}{{\\footnotesize}}` immediately after `\\documentclass` to shrink bullet text.
+           - **If content is SPARSE (<85%)**: Write longer, more detailed descriptions to fill the page. Do NOT leave it empty.
+        2. **Header Formatting**:
+           - **Dynamic Icons**: Use `fontawesome5` icons ONLY for links that exist in the input.
+           - Format Example: `\\faEnvelope` email@domain.com $|$ `\\faLinkedin` LinkedIn $|$ `\\faGithub` GitHub
+           - **Rule**: If a link (like Portfolio) is missing, do NOT include its icon or separator.
+        3. **Formatting**:
+           - **Bold** key metrics (e.g. \\textbf{{$2M revenue}}, \\textbf{{30% growth}}).
+           - **Bold** hard skills (e.g. \\textbf{{Python}}, \\textbf{{React}}).
+           - Links: \\href{{url}}{{\\textbf{{display_text}}}} (Blue & Bold).
+        4. **Education Mandate**:
+           - Keep ALL education entries (University AND High School/Grade 12). Do not cut them.
+           - Keep ALL grades, CGPA, and percentages exactly as they appear in the input. Do NOT remove them.
+        5. **Links**:
+           - Use these links: {links_str}
+           - Exact match project names to links.
+        
+        INPUT RESUME:
+        {resume}
+        
+        TARGET JD:
+        {jd}
+        
+        LATEX TEMPLATE START:
+        {LATEX_TEMPLATE}
+        
+        OUTPUT:
+        Return ONLY the raw LaTeX code starting with \\documentclass.
+        """
+        
+        from google.genai import types
+
+        return {
+            "model": primary_model("latex"),
+            "contents": prompt,
+            "config": types.GenerateContentConfig(
+                temperature=0.2, # Low temperature for strict execution
+            ),
+        }
+
+    # ─── Structured resume parts ───
+
+    def _resume_parts(self, resume_text: str, jd_text: str, analysis: dict, links: list, sections: list = None, notes: dict = None) -> list:
+        return plan_parts(
+            resume_text, jd_text, analysis, links, sections, notes, version=f"{primary_model('resume_part')}:{RESUME_PARTS_PROMPT_VERSION}"
+        )
+
+    def _cached_parts(self, parts: list) -> tuple[dict, list]:
+        """({name: cached result}, parts still to generate)."""
+        results, misses = {}, []
+        for part in parts:
+            cached = self.section_cache.get(part["key"])
+            if cached is None:
+                misses.append(part)
+            else:
+                results[part["name"]] = cached
+        annotate(parts=len(parts), parts_cached=len(results))
+        return results, misses
+
+    def _generate_parts(self, parts: list, on_chunk=None) -> str:
+        """Generate the uncached parts concurrently and render the resume; on_chunk sees it grow part by part."""
+        results, misses = self._cached_parts(parts)
+        with ThreadPoolExecutor(max_workers=max(len(misses), 1), thread_name_prefix="resume-part") as pool:
+            futures = [pool.submit(contextvars.copy_context().run, self._generate_part, part) for part in misses]
+            for future in as_completed(futures):
+                name, data = future.result()
+                results[name] = data
+                if on_chunk:
+                    on_chunk(render_resume(merge_parts(results)))
+        return render_resume(merge_parts(results))
+
+    async def _generate_parts_async(self, parts: list, on_chunk=None) -> str:
+        """
+        Async twin of _generate_parts. Concurrent generations that need the same part (e.g. the profile,
+        when one resume fans out to many JDs) share a single call.
+        """
+        results, misses = self._cached_parts(parts)
+
+        async def generate(part):
+            task = self._part_tasks.get(part["key"])
+            if task is None:
+                task = self._part_tasks[part["key"]] = asyncio.ensure_future(self._generate_part_async(part))
+                task.add_done_callback(lambda _: self._part_tasks.pop(part["key"], None))
+            name, data = await asyncio.shield(task)
+            results[name] = data
+            if on_chunk:
+                on_chunk(render_resume(merge_parts(results)))
+
+        await asyncio.gather(*(generate(part) for part in misses))
+        return render_resume(merge_parts(results))
+
+    def _generate_part(self, part: dict) -> tuple[str, dict]:
+        with span("agent.resume_part", part=part["name"]):
+            response, fell_back = route(
+                "resume_part", self._part_request(part), self.client.models.generate_content, check=self._json_answer
+            )
+            record_usage("generate_latex_content", response)
+            return part["name"], self._finish_part(part, response, cache=not fell_back)
+
+    async def _generate_part_async(self, part: dict) -> tuple[str, dict]:
+        with span("agent.resume_part", part=part["name"]):
+            response, fell_back = await route_async(
+                "resume_part", self._part_request(part), self.client.aio.models.generate_content, check=self._json_answer
+            )
+            record_usage("generate_latex_content", response)
+            return part["name"], self._finish_part(part, response, cache=not fell_back)
+
+    def _finish_part(self, part: dict, response, cache: bool = True) -> dict:
+        """Keep only the part's own fields (a part can't overwrite another) and cache them."""
+        data = self._json_answer(response)
+        data = {field: data[field] for field in part["fields"] if data.get(field)}
+        if cache:
+            self.section_cache.set(part["key"], data)
+        return data
+
+    def _part_request(self, part: dict) -> dict:
+        inputs = part["inputs"]
+        plan = "\n".join(f"        - {field}: {value}" for field, value in inputs["plan"].items()) or "        - (none for this part)"
+        links = f"\n        - Use these links (exact match names to links, put them in \"url\"): {inputs['links']}" if inputs["links"] else ""
+        note = f"\n        REFINEMENT (apply this to the part, keep everything else as is):\n        {inputs['note']}\n" if inputs["note"] else ""
+        jd = f"\n        TARGET JD:\n        {inputs['jd']}\n" if inputs["jd"] else ""
+        prompt = f"""
+        You are an obedient resume writer. You have NO creative license.
+        You write ONE PART of a 1-page resume: {_PART_BRIEFS[part["name"]]}. The other parts are written separately.
+        
+        CONTENT PLAN (The Law):
+{plan}
+        
+        RULES:
+        - "Anti-Hallucination": Do NOT invent skills, numbers or links. Only use what is in the input resume.
+        - Plain text only, NO LaTeX. Wrap key metrics and hard skills in **double asterisks** (e.g. **$2M revenue**, **Python**).
+        - The whole resume MUST fit on exactly 1 page: keep bullets tight. STRICTLY MAX 2 PROJECTS.
+        - Education: keep ALL entries (University AND High School/Grade 12) and ALL grades, CGPA and percentages exactly as in the input.{links}
+        {note}
+        RESUME PART INPUT:
+        {inputs["resume"]}
+        {jd}
+        OUTPUT:
+        Return ONLY a JSON object with this exact schema (leave out empty lists):
+        {resume_schema(part["fields"])}
+        """
+
+        from google.genai import types
+
+        return {
+            "model": primary_model("resume_part"),
+            "contents": prompt,
+            "config": types.GenerateContentConfig(
+                response_mime_type="application/json",
+                temperature=0.2,
+            ),
+        }
+
+    @staticmethod
+    def _strip_fences(text: str) -> str:
+        text = re.sub(r"^```(?:json)?\s*\n", "", (text or "").strip())
+        return re.sub(r"\n```\s*$", "", text)
+
+    @classmethod
+    def _json_answer(cls, response) -> dict:
+        """The answer's JSON object; ValueError (routing then tries the next tier) if it isn't one."""
+        data = json.loads(cls._strip_fences(response.text))
+        if not isinstance(data, dict):
+            raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+        return data
+
+    @staticmethod
+    def _text_answer(response) -> str:
+        if not (response.text or "").strip():
+            raise ValueError("empty answer")
+        return response.text
+
+    def _clean_latex(self, text: str) -> str:
+        latex = text or ""
+        
+        # Post-processing cleanup
+        latex = re.sub(r"^```(?:latex|tex)?\s*\n", "", latex, flags=re.MULTILINE)
+        latex = re.sub(r"\n```\s*$", "", latex, flags=re.MULTILINE)
+        return latex.strip()
+
+    def _latex_fallback(self, error: Exception) -> str:
+        record_fallback("generate_latex_content", error)
+        self.on_error(f"Resume generation failed: {error}")
+        return LATEX_TEMPLATE.replace("FULL_NAME", "Error Generating Resume")
+
+    def compile_pdf(self, latex_content: str) -> tuple[bytes, str]:
+        """Compile LaTeX to PDF (local engine first, then external services; results cached by source hash)."""
+        return compile_pdf(latex_content)
+
+    def fit_pages(self, latex_content: str, pdf_bytes: bytes, max_pages: int) -> tuple[str, bytes, dict]:
+        """Tighten the layout locally until the compiled PDF fits in max_pages; returns (latex, pdf, report)."""
+        from tal.fit import fit_pages_locally
+
+        return fit_pages_locally(latex_content, pdf_bytes, max_pages)
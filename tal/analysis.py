@@ -0,0 +1,248 @@
+"""
+Analysis schema and parser.
+The analysis JSON is defined once, as the Analysis model: it is the prompt's schema description, the SDK
+response schema (when the call runs without Google Search, which can't be combined with one) and what answers
+are validated against. The parser repairs the usual defects (code fences, trailing commas, a truncated tail,
+miscased keys) and validates field by field, so a bad field costs that field - it gets the generic plan's
+value - instead of the whole analysis.
+"""
+
+import json
+import re
+import typing
+
+from pydantic import BaseModel, Field, ValidationError
+
+
+class ContentPlan(BaseModel):
+    keep_sections: list[str] = Field(description="sections that MUST stay")
+    drop_sections: list[str] = Field(description="sections that MUST go to save space")
+    top_projects: list[str] = Field(description="the 2 projects that match the JD best")
+    bullet_guidelines: str = Field(description="specific instruction for bullet writing")
+
+
+class Strength(BaseModel):
+    point: str = Field(description="strength")
+    why: str = Field(description="reason")
+
+
+class Issue(BaseModel):
+    issue: str = Field(description="red flag")
+    impact: str = Field(description="consequence")
+
+
+class Change(BaseModel):
+    change: str = Field(description="action")
+    rationale: str = Field(description="reason")
+
+
+class NewsHook(BaseModel):
+    date: str = Field(description="YYYY-MM")
+    hook: str = Field(description="funding round, launch or expansion from the search results")
+
+
+class Analysis(BaseModel):
+    company_name: str = Field(description="extracted name")
+    role_title: str = Field(description="extracted title")
+    company_archetype: str = Field(description="early stage / growth stage / corporate")
+    role_archetype: str = Field(description="engineering / product / growth / research / generalist")
+    role_translation_strategy: str = Field(description="Direct strategy explanation to user (max 15 words)")
+    content_plan: ContentPlan
+    good_points: list[Strength]
+    needs_fixing: list[Issue]
+    proposed_changes: list[Change]
+
+
+class AnalysisWithCompany(Analysis):
+    """Without a company profile the search results also fill a new one."""
+
+    company_size_band: str = Field(description="<50 / 50-500 / 500+")
+    company_news: list[NewsHook]
+
+
+# The generic strategy: the whole answer when the call fails, single fields when they can't be read
+GENERIC_ANALYSIS = Analysis(
+    company_name="the company",
+    role_title="the role",
+    company_archetype="corporate",
+    role_archetype="generalist",
+    role_translation_strategy="Standard professional alignment",
+    content_plan=ContentPlan(
+        keep_sections=["Experience", "Education", "Projects"],
+        drop_sections=["Volunteering"],
+        top_projects=["Most recent project"],
+        bullet_guidelines="Standard STAR method",
+    ),
+    good_points=[Strength(point="Experience matches", why="Relevant history")],
+    needs_fixing=[Issue(issue="Generic descriptions", impact="Low impact")],
+    proposed_changes=[Change(change="Add metrics", rationale="Show value")],
+).model_dump()
+_GENERIC = {**GENERIC_ANALYSIS, "company_size_band": None, "company_news": []}
+
+
+# ─── Prompt schema ───
+
+def _shape(annotation, description: str = None):
+    if typing.get_origin(annotation) is list:
+        return [_shape(typing.get_args(annotation)[0], description)]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return {name: _shape(field.annotation, field.description) for name, field in annotation.model_fields.items()}
+    return description or ""
+
+
+def schema_block(model=Analysis) -> str:
+    """The model as the JSON example the prompt shows ("key": "what goes here")."""
+    return json.dumps(_shape(model), indent=4, ensure_ascii=False)
+
+
+# ─── Repair ───
+
+_FENCE = re.compile(r"```(?:json)?\s*\n?(.*?)(?:\n?```|$)", re.DOTALL)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_MAX_CUTS = 64  # truncation: how many element boundaries to back off over
+_DECODER = json.JSONDecoder()
+
+
+def _loads(text: str):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _decode(text: str) -> tuple:
+    """(object `text` starts with, whether anything follows it) - prose after the JSON is not truncation."""
+    try:
+        value, end = _DECODER.raw_decode(text)
+    except ValueError:
+        return None, False
+    return (value, bool(text[end:].strip())) if isinstance(value, dict) else (None, False)
+
+
+def _close(text: str):
+    """A truncated document made whole: open brackets closed, backing off to earlier elements until it parses."""
+    stack, cuts = [], []
+    in_string = escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+        elif ch == ",":
+            cuts.append((i, "".join(reversed(stack))))
+    # Cut off inside a string, the last value is half a sentence: back off to the last whole element instead
+    candidates = [] if in_string else [text + "".join(reversed(stack))]
+    candidates += [text[:i] + closers for i, closers in reversed(cuts[-_MAX_CUTS:])]
+    for candidate in candidates:
+        value = _loads(_TRAILING_COMMA.sub(r"\1", candidate))
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def repair_json(text: str) -> tuple:
+    """(object, repairs made) from a model answer; ValueError if no JSON object can be recovered."""
+    repairs = []
+    text = (text or "").strip()
+    fenced = _FENCE.search(text)
+    if fenced:
+        text, repairs = fenced.group(1).strip(), ["fences"]
+    start = text.find("{")
+    if start > 0:
+        text, repairs = text[start:], [*repairs, "prose"]
+    value, trailing = _decode(text)
+    if value is None:
+        value, trailing = _decode(_TRAILING_COMMA.sub(r"\1", text))
+        if value is not None:
+            repairs.append("trailing_commas")
+    if trailing and "prose" not in repairs:
+        repairs.append("prose")
+    if not isinstance(value, dict) and start >= 0:
+        value = _close(text)
+        repairs.append("truncated")
+    if not isinstance(value, dict):
+        raise ValueError("no JSON object in the answer")
+    return value, repairs
+
+
+# ─── Field-by-field validation ───
+
+_MISSING = object()
+
+
+def _key(name) -> str:
+    """"Company Name" / "companyName" / "company-name" -> "company_name"."""
+    name = re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", str(name).strip())
+    return re.sub(r"[\s\-]+", "_", name).lower()
+
+
+def _keyed(value: dict) -> dict:
+    return {_key(k): v for k, v in value.items()}
+
+
+def _coerce(annotation, value, default, path: str, defaulted: list):
+    """`value` checked against `annotation`; invalid parts become `default` (and their path is noted)."""
+    if value is _MISSING:
+        defaulted.append(path)
+        return default
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        if not isinstance(value, dict):
+            defaulted.append(path)
+            return default
+        value = _keyed(value)
+        return {
+            name: _coerce(field.annotation, value.get(name, _MISSING), (default or {}).get(name), f"{path}.{name}", defaulted)
+            for name, field in annotation.model_fields.items()
+        }
+    if typing.get_origin(annotation) is list:
+        item = typing.get_args(annotation)[0]
+        if isinstance(value, str) and item is str:
+            value = [value]
+        if not isinstance(value, list):
+            defaulted.append(path)
+            return default
+        kept = []
+        for entry in value:
+            try:
+                if isinstance(item, type) and issubclass(item, BaseModel):
+                    kept.append(item.model_validate(_keyed(entry) if isinstance(entry, dict) else entry).model_dump())
+                elif isinstance(entry, item):
+                    kept.append(entry)
+            except ValidationError:
+                pass  # one bad entry doesn't cost the list
+        if value and not kept:
+            defaulted.append(path)
+            return default
+        return kept
+    if isinstance(value, annotation):
+        return value
+    defaulted.append(path)
+    return default
+
+
+def parse_analysis(text: str, model=Analysis) -> tuple:
+    """
+    (analysis, notes) from a model answer. notes = {"repairs": [...], "defaulted": [field paths]}; defaulted
+    fields hold the generic plan's values. ValueError if nothing at all could be read.
+    """
+    value, repairs = repair_json(text)
+    keyed = _keyed(value)
+    if set(keyed) != set(value):
+        repairs.append("keys")
+    defaulted = []
+    analysis = {
+        name: _coerce(field.annotation, keyed.get(name, _MISSING), _GENERIC.get(name), name, defaulted)
+        for name, field in model.model_fields.items()
+    }
+    if all(any(path == name or path.startswith(f"{name}.") for path in defaulted) for name in model.model_fields):
+        raise ValueError("no usable analysis fields in the answer")
+    return analysis, {"repairs": repairs, "defaulted": defaulted}
@@ -0,0 +1,197 @@
+"""
+Content-addressed artifact store.
+Maps the SHA-256 of a source (e.g. LaTeX) to its build output (e.g. PDF bytes), on disk with an
+optional in-memory tier. Failures are remembered for a short negative-cache TTL.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from tal import config
+
+
+class ArtifactStore:
+    """
+    Disk layout: <directory>/<key[:2]>/<key>.bin for artifacts, <key>.err for recent failures.
+    Files are touched on read, and the least recently used are evicted once the store exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, memory_bytes: int = 0, negative_ttl: float = 0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._disk_size = sum(size for _, size, _ in self._scan())
+
+    @staticmethod
+    def key(source) -> str:
+        if isinstance(source, str):
+            source = source.encode("utf-8")
+        return hashlib.sha256(source).hexdigest()
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.{ext}")
+
+    # ─── Artifacts ───
+
+    def get(self, key: str) -> bytes:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return data
+
+        path = self._path(key, "bin")
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key, "bin")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        existed = os.path.exists(path)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._discard(self._path(key, "err"))
+
+        with self._lock:
+            if not existed:
+                self._disk_size += len(data)
+            self._remember(key, data)
+            if self._disk_size > self.max_bytes:
+                self._evict()
+
+    def _remember(self, key: str, data: bytes) -> None:
+        """Insert into the memory tier (caller holds the lock)."""
+        if not self.memory_bytes or len(data) > self.memory_bytes or key in self._memory:
+            return
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_size -= len(old)
+
+    def _scan(self) -> list:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".bin"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((os.path.join(root, name), st.st_size, st.st_mtime))
+        return entries
+
+    def _evict(self) -> None:
+        """Delete least recently used artifacts until the disk tier fits (caller holds the lock)."""
+        entries = self._scan()
+        self._disk_size = sum(size for _, size, _ in entries)
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if self._disk_size <= self.max_bytes:
+                break
+            self._discard(path)
+            key = os.path.basename(path)[:-4]
+            if key in self._memory:
+                self._memory_size -= len(self._memory.pop(key))
+            self._disk_size -= size
+            self.evictions += 1
+
+    # ─── Negative cache ───
+
+    def get_failure(self, key: str) -> str:
+        """Return the recorded error if this source failed within the negative TTL."""
+        if not self.negative_ttl:
+            return None
+        path = self._path(key, "err")
+        try:
+            if time.time() - os.path.getmtime(path) > self.negative_ttl:
+                self._discard(path)
+                return None
+            with open(path, encoding="utf-8") as f:
+                error = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            self.negative_hits += 1
+        return error
+
+    def put_failure(self, key: str, error: str) -> None:
+        if not self.negative_ttl:
+            return
+        path = self._path(key, "err")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(error or "unknown error")
+
+    @staticmethod
+    def _discard(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "misses": self.misses,
+                "negative_hits": self.negative_hits,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "disk_bytes": self._disk_size,
+                "memory_bytes": self._memory_size,
+            }
+
+
+# ─────────────────────────────────────────────────────────────
+# PROCESS-WIDE INSTANCES
+# ─────────────────────────────────────────────────────────────
+
+_stores: dict = {}
+_stores_lock = threading.Lock()
+
+
+def open_artifact_store(name: str, max_bytes: int, memory_bytes: int = 0, negative_ttl: float = 0) -> ArtifactStore:
+    """Return the shared store rooted at CACHE_DIR/<name>, opening it on first use."""
+    with _stores_lock:
+        if name not in _stores:
+            _stores[name] = ArtifactStore(
+                os.path.join(config.CACHE_DIR, name),
+                max_bytes=max_bytes,
+                memory_bytes=memory_bytes,
+                negative_ttl=negative_ttl,
+            )
+        return _stores[name]
@@ -0,0 +1,229 @@
+"""
+Headless batch runner: many resume x JD pairs through TalAgent, no UI.
+
+    python -m tal batch INPUT_DIR --out OUT_DIR [--jds JD_DIR] [--concurrency 8] [--workers 4]
+
+PDFs in INPUT_DIR are resumes; .txt / .md files (in INPUT_DIR, or --jds) are job descriptions, and
+every resume runs against every JD. PDF parsing and compilation run in a process pool, LLM calls are
+async with bounded concurrency. Finished items are appended to OUT_DIR/manifest.jsonl, so rerunning
+the same command after a crash only does the remaining work.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from tal import config
+from tal.agent import TalAgent
+from tal.cache import content_key
+from tal.compile import compile_pdf_classified
+from tal.fit import fit_pages_locally
+from tal.pdf import extract_pdf_path
+from tal.scheduler import set_priority
+from tal.telemetry import new_trace_id, set_trace, span, start_metrics_server
+
+logger = logging.getLogger(__name__)
+
+JD_EXTENSIONS = (".txt", ".md")
+MANIFEST_NAME = "manifest.jsonl"
+
+# Errors the agent reports while working on the current item (each item runs in its own task context)
+_item_errors = contextvars.ContextVar("item_errors", default=None)
+
+
+def _record_error(message: str) -> None:
+    errors = _item_errors.get()
+    if errors is not None:
+        errors.append(message)
+    logger.warning(message)
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write(path: str, data) -> None:
+    """Atomic write, so a crash never leaves a half-written output behind."""
+    tmp_path = f"{path}.tmp"
+    mode = "wb" if isinstance(data, bytes) else "w"
+    with open(tmp_path, mode, **({} if mode == "wb" else {"encoding": "utf-8"})) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def discover(input_dir: str, jd_dir: str = None) -> list:
+    """Every resume PDF x every JD file, as work items with a content digest of both inputs."""
+    jd_dir = jd_dir or input_dir
+    resumes = sorted(f for f in os.listdir(input_dir) if f.lower().endswith(".pdf"))
+    jds = sorted(f for f in os.listdir(jd_dir) if f.lower().endswith(JD_EXTENSIONS))
+    digests = {}
+
+    def digest(path):
+        if path not in digests:
+            digests[path] = _file_digest(path)
+        return digests[path]
+
+    items = []
+    for resume in resumes:
+        for jd in jds:
+            resume_path = os.path.join(input_dir, resume)
+            jd_path = os.path.join(jd_dir, jd)
+            items.append({
+                "id": f"{os.path.splitext(resume)[0]}__{os.path.splitext(jd)[0]}",
+                "resume": resume_path,
+                "jd": jd_path,
+                "digest": content_key(digest(resume_path), digest(jd_path)),
+            })
+    return items
+
+
+class Manifest:
+    """Append-only JSONL log of finished items; the last record per id wins."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from a crash
+                    self.records[record["id"]] = record
+
+    def is_done(self, item: dict) -> bool:
+        record = self.records.get(item["id"])
+        return bool(record) and record.get("status") == "done" and record.get("digest") == item["digest"]
+
+    def record(self, record: dict) -> None:
+        self.records[record["id"]] = record
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+async def _process_item(agent: TalAgent, item: dict, out_dir: str, pool, extract) -> dict:
+    errors = []
+    _item_errors.set(errors)
+    set_priority("batch")  # interactive sessions sharing the process go first
+    trace_id = new_trace_id()
+    set_trace(trace_id)  # spans of this item are grouped in the telemetry log
+    started = time.monotonic()
+    record = {"id": item["id"], "digest": item["digest"], "resume": item["resume"], "jd": item["jd"], "trace_id": trace_id}
+    loop = asyncio.get_running_loop()
+
+    try:
+        data = await extract(item["resume"])
+        if len(data["text"]) <= 50:
+            raise ValueError("could not read pdf text (image scan?)")
+        with open(item["jd"], encoding="utf-8") as f:
+            jd_text = f.read()
+
+        analysis = await agent.analyze_resume_async(data["text"], jd_text, sections=data["sections"])
+        latex = await agent.generate_latex_content_async(
+            data["text"], jd_text, analysis, links=data["links"], max_pages=data["pages"], sections=data["sections"]
+        )
+        with span("batch.compile_pdf"):
+            pdf_bytes, compile_error, broken = await loop.run_in_executor(pool, compile_pdf_classified, latex)
+            latex, pdf_bytes, fit = await loop.run_in_executor(pool, fit_pages_locally, latex, pdf_bytes, data["pages"])
+
+        item_dir = os.path.join(out_dir, item["id"])
+        os.makedirs(item_dir, exist_ok=True)
+        _write(os.path.join(item_dir, "analysis.json"), json.dumps(analysis, indent=2, ensure_ascii=False))
+        _write(os.path.join(item_dir, "resume.tex"), latex)
+        if pdf_bytes:
+            _write(os.path.join(item_dir, "resume.pdf"), pdf_bytes)
+
+        # A fallback analysis / resume is not a result, nor is a PDF missing for a passing reason (timeout,
+        # 5xx, 429): leave the item for the next run. A LaTeX error would only come back, so that one is done
+        if compile_error and not broken:
+            errors.append(compile_error)
+        record["status"] = "failed" if errors else "done"
+        record["compile_error"] = compile_error
+        record["pages"] = fit["pages"]
+    except Exception as e:
+        errors.append(str(e))
+        record["status"] = "failed"
+
+    record["errors"] = errors
+    record["seconds"] = round(time.monotonic() - started, 2)
+    return record
+
+
+async def run_batch(items: list, out_dir: str, agent: TalAgent, concurrency: int = 4, workers: int = None) -> dict:
+    """Process every item not already done in the manifest; returns a summary."""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = Manifest(os.path.join(out_dir, MANIFEST_NAME))
+    todo = [item for item in items if not manifest.is_done(item)]
+    summary = {"total": len(items), "skipped": len(items) - len(todo), "done": 0, "failed": 0}
+    if not todo:
+        return summary
+
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Each resume is parsed once, however many JDs it runs against
+        extractions = {}
+
+        def extract(path):
+            if path not in extractions:
+                extractions[path] = loop.run_in_executor(pool, extract_pdf_path, path)
+            return extractions[path]
+
+        async def bounded(item):
+            async with semaphore:
+                return await _process_item(agent, item, out_dir, pool, extract)
+
+        tasks = [asyncio.create_task(bounded(item)) for item in todo]
+        for finished, task in enumerate(asyncio.as_completed(tasks), 1):
+            record = await task
+            manifest.record(record)
+            summary[record["status"]] += 1
+            logger.info("[%d/%d] %s %s (%.1fs)", finished, len(todo), record["id"], record["status"], record["seconds"])
+
+    summary["seconds"] = round(time.monotonic() - started, 2)
+    return summary
+
+
+# ─────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────
+
+def add_parser(commands) -> None:
+    parser = commands.add_parser("batch", help="run many resume x JD pairs headlessly")
+    parser.add_argument("input_dir", help="directory of resume PDFs (and JD .txt/.md files unless --jds is given)")
+    parser.add_argument("--jds", dest="jd_dir", help="directory of JD .txt/.md files")
+    parser.add_argument("--out", dest="out_dir", required=True, help="output directory (holds the manifest)")
+    parser.add_argument("--concurrency", type=int, default=4, help="items in flight at once (default: 4)")
+    parser.add_argument("--workers", type=int, default=None, help="processes for PDF parsing and compiling")
+    parser.set_defaults(handler=main)
+
+
+def main(args) -> int:
+    items = discover(args.input_dir, args.jd_dir)
+    if not items:
+        logger.error("no resume x JD pairs found in %s", args.input_dir)
+        return 1
+    # The client is built lazily, on the first call; without a key every item would fail one by one
+    if config.CASSETTE_MODE != "replay" and not config.load_api_key():
+        logger.error("GEMINI_API_KEY is not set (environment or .streamlit/secrets.toml)")
+        return 2
+    agent = TalAgent(on_error=_record_error)
+
+    start_metrics_server()  # no-op unless TAL_METRICS_PORT is set
+    summary = asyncio.run(run_batch(items, args.out_dir, agent, concurrency=args.concurrency, workers=args.workers))
+    logger.info("batch finished: %s", json.dumps(summary))
+    return 0 if summary["failed"] == 0 else 1
@@ -0,0 +1,252 @@
+"""
+Session blob store.
+Large per-session values (resume text, analysis, LaTeX, PDF bytes) live here instead of st.session_state:
+content-addressed files read back through read-only mmaps, so they sit in the OS page cache rather than the
+Python heap, and identical values from different sessions are stored once. Session state keeps only handles.
+Bytes come back as memoryviews over the map (no copy); text and JSON are decoded, which is a copy by nature.
+
+Every session holding a handle is one reference. Streamlit has no session-end hook, so a session that hasn't
+been seen for `session_ttl` drops its references; blobs nobody references are deleted after `idle_ttl`.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+
+from tal import config
+from tal.telemetry import metrics
+
+KINDS = ("bytes", "text", "json")  # handle = "<kind>:<sha256>"
+
+
+class BlobStore:
+    def __init__(self, directory: str, idle_ttl: float, session_ttl: float, sweep_interval: float = 30):
+        self.directory = directory
+        self.idle_ttl = idle_ttl
+        self.session_ttl = session_ttl
+        self.sweep_interval = sweep_interval
+        self._refs = {}  # key -> sessions holding it
+        self._sessions = {}  # session -> {"keys": {key: size}, "seen": time}
+        self._unreferenced = {}  # key -> time its last reference went away
+        self._maps = {}  # key -> [mmap, last access]
+        self._lock = threading.Lock()
+        self._swept = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+
+    # ─── Handles ───
+
+    @staticmethod
+    def _split(handle: str) -> tuple:
+        kind, _, key = handle.partition(":")
+        if kind not in KINDS or not key:
+            raise ValueError(f"not a blob handle: {handle!r}")
+        return kind, key
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def put(self, value, session: str) -> str:
+        """Store `value` (bytes, str or JSON-able) for `session` and return its handle."""
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            kind, data = "bytes", bytes(value)
+        elif isinstance(value, str):
+            kind, data = "text", value.encode("utf-8")
+        else:
+            kind, data = "json", json.dumps(value, ensure_ascii=False).encode("utf-8")
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        handle = f"{kind}:{key}"
+        self.retain(handle, session, size=len(data))
+        self._maybe_sweep()
+        return handle
+
+    def retain(self, handle: str, session: str, size: int = None) -> None:
+        _, key = self._split(handle)
+        if size is None:
+            size = self.size(handle)
+        with self._lock:
+            entry = self._sessions.setdefault(session, {"keys": {}, "seen": time.monotonic()})
+            entry["keys"][key] = size
+            entry["seen"] = time.monotonic()
+            self._refs.setdefault(key, set()).add(session)
+            self._unreferenced.pop(key, None)
+
+    def release(self, session: str, handle: str = None) -> None:
+        """Drop `session`'s reference to `handle`, or to everything it holds."""
+        with self._lock:
+            entry = self._sessions.get(session)
+            if entry is None:
+                return
+            keys = [self._split(handle)[1]] if handle else list(entry["keys"])
+            for key in keys:
+                entry["keys"].pop(key, None)
+                self._unref(key, session)
+            if not handle:
+                del self._sessions[session]
+
+    def _unref(self, key: str, session: str) -> None:
+        """Caller holds the lock."""
+        holders = self._refs.get(key)
+        if holders is None:
+            return
+        holders.discard(session)
+        if not holders:
+            del self._refs[key]
+            self._unreferenced[key] = time.monotonic()
+
+    def touch(self, session: str) -> None:
+        """Mark `session` alive (once per script run) so its references aren't expired."""
+        with self._lock:
+            if session in self._sessions:
+                self._sessions[session]["seen"] = time.monotonic()
+
+    # ─── Reading ───
+
+    def view(self, handle: str) -> memoryview:
+        """Zero-copy read-only view of the blob (None if it has been evicted)."""
+        _, key = self._split(handle)
+        with self._lock:
+            mapped = self._maps.get(key)
+            if mapped is None:
+                try:
+                    with open(self._path(key), "rb") as f:
+                        mapped = [mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), 0.0]
+                except (OSError, ValueError):  # ValueError: empty file, which can't be mapped
+                    return memoryview(b"") if os.path.exists(self._path(key)) else None
+                self._maps[key] = mapped
+            mapped[1] = time.monotonic()
+            return memoryview(mapped[0])
+
+    def get(self, handle: str, default=None):
+        """
+        The stored value: a read-only memoryview for bytes (call .tobytes() for an owned copy), otherwise the
+        original str or JSON value. `default` if the blob has been evicted.
+        """
+        if not handle:
+            return default
+        kind = self._split(handle)[0]
+        view = self.view(handle)
+        if view is None:
+            return default
+        if kind == "bytes":
+            return view
+        text = str(view, "utf-8")
+        return text if kind == "text" else json.loads(text)
+
+    def open(self, handle: str):
+        """A file object over the blob, for APIs that stream (st.download_button's deferred data); None if evicted."""
+        try:
+            return open(self.path(handle), "rb")
+        except OSError:
+            return None
+
+    def exists(self, handle: str) -> bool:
+        return bool(handle) and os.path.exists(self.path(handle))
+
+    def path(self, handle: str) -> str:
+        return self._path(self._split(handle)[1])
+
+    def size(self, handle: str) -> int:
+        try:
+            return os.path.getsize(self.path(handle))
+        except OSError:
+            return 0
+
+    # ─── Eviction and accounting ───
+
+    def _maybe_sweep(self) -> None:
+        if time.monotonic() - self._swept >= self.sweep_interval:
+            self.sweep()
+
+    def sweep(self) -> None:
+        """Expire idle sessions, unmap idle blobs and delete blobs nobody has referenced for `idle_ttl`."""
+        now = time.monotonic()
+        with self._lock:
+            self._swept = now
+            for session in [s for s, e in self._sessions.items() if now - e["seen"] > self.session_ttl]:
+                for key in self._sessions.pop(session)["keys"]:
+                    self._unref(key, session)
+            for key in [k for k, (_, used) in self._maps.items() if now - used > self.idle_ttl or k in self._unreferenced]:
+                try:
+                    self._maps[key][0].close()
+                except BufferError:  # a view is still exported; try again next sweep
+                    continue
+                del self._maps[key]
+            expired = [k for k, since in self._unreferenced.items() if now - since > self.idle_ttl]
+            for key in expired:
+                del self._unreferenced[key]
+                if key not in self._maps:
+                    self._discard(self._path(key))
+        # Blobs left on disk by an earlier process have no references at all
+        cutoff = time.time() - self.idle_ttl
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name in self._refs or name in self._unreferenced:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
+        stats = self.stats()
+        metrics.set("tal_blob_bytes", stats["bytes"])
+        metrics.set("tal_blob_mapped_bytes", stats["mapped_bytes"])
+        metrics.set("tal_blob_sessions", stats["sessions"])
+
+    @staticmethod
+    def _discard(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def usage(self, session: str) -> dict:
+        """What one session holds: blob count and bytes (shared blobs are counted in full for every holder)."""
+        with self._lock:
+            keys = self._sessions.get(session, {}).get("keys", {})
+            return {"blobs": len(keys), "bytes": sum(keys.values())}
+
+    def stats(self) -> dict:
+        """Store-wide totals plus the per-session spread, for sizing pods."""
+        with self._lock:
+            per_session = sorted(sum(e["keys"].values()) for e in self._sessions.values())
+            sizes = {}
+            for entry in self._sessions.values():
+                sizes.update(entry["keys"])
+            mapped = sum(len(m) for m, _ in self._maps.values() if not m.closed)
+        return {
+            "sessions": len(per_session),
+            "blobs": len(sizes),
+            "bytes": sum(sizes.values()),
+            "mapped_bytes": mapped,
+            "unreferenced": len(self._unreferenced),
+            "session_bytes_mean": round(sum(per_session) / len(per_session)) if per_session else 0,
+            "session_bytes_max": per_session[-1] if per_session else 0,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def blobs() -> BlobStore:
+    """The process-wide blob store at CACHE_DIR/blobs."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore(
+                os.path.join(config.CACHE_DIR, "blobs"),
+                idle_ttl=config.BLOB_IDLE_TTL,
+                session_ttl=config.BLOB_SESSION_TTL,
+            )
+        return _store
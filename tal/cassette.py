@@ -0,0 +1,271 @@
+"""
+Record / replay for Gemini calls.
+CassetteClient sits where TalAgent expects a genai.Client (models / aio.models, generate_content and
+generate_content_stream) and, depending on the mode:
+
+    record       call Gemini and write every completed response to the cassette directory
+    replay       answer from the cassettes only (no key, no network); a miss raises CassetteMiss
+    passthrough  call Gemini, write nothing
+
+Requests are matched on a fingerprint of the model, the whitespace-normalized prompt and the generation
+config, so cosmetic prompt edits still hit. Cassettes hold the prompt, i.e. resume text: keep them out of git.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+from tal import config
+from tal.cache import content_key, normalize_text
+from tal.telemetry import annotate
+
+MODES = ("off", "record", "replay", "passthrough")
+
+
+class CassetteMiss(LookupError):
+    """Replay mode got a request that was never recorded."""
+
+
+def fingerprint(model: str, contents, gen_config=None) -> str:
+    if hasattr(gen_config, "model_dump"):
+        schema = gen_config.response_schema
+        # http_options carries the routing latency budget, which doesn't change the answer
+        gen_config = gen_config.model_dump(mode="json", exclude_none=True, exclude={"http_options", "response_schema"})
+        if schema is not None:  # a pydantic model class doesn't serialize; its JSON schema does
+            gen_config["response_schema"] = schema.model_json_schema() if hasattr(schema, "model_json_schema") else str(schema)
+    prompt = contents if isinstance(contents, str) else json.dumps(contents, sort_keys=True, default=str)
+    return content_key(model, normalize_text(prompt), json.dumps(gen_config or {}, sort_keys=True, default=str))
+
+
+def _dump(response) -> dict:
+    """A genai response (or anything with .text) as JSON-able data."""
+    if hasattr(response, "model_dump"):
+        return response.model_dump(mode="json", exclude_none=True)
+    data = {"candidates": [{"content": {"role": "model", "parts": [{"text": response.text or ""}]}}]}
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        data["usage_metadata"] = {k: v for k, v in vars(usage).items() if v is not None}
+    return data
+
+
+def _load(data: dict):
+    from google.genai import types
+
+    return types.GenerateContentResponse.model_validate(data)
+
+
+class CassetteStore:
+    """One JSON file per fingerprint: <directory>/<fp[:2]>/<fp>.json."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, fp: str) -> str:
+        return os.path.join(self.directory, fp[:2], f"{fp}.json")
+
+    def get(self, fp: str) -> dict:
+        try:
+            with open(self._path(fp), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put(self, fp: str, record: dict) -> None:
+        path = self._path(fp)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+
+class CassetteClient:
+    """
+    `inner` is the real client (unused in replay mode). `latency_scale` stretches replayed calls relative
+    to the recorded latency: 0 answers instantly, 1 reproduces the original timing.
+    """
+
+    def __init__(self, inner, mode: str, directory: str, latency_scale: float = 0.0):
+        if mode not in MODES[1:]:
+            raise ValueError(f"unknown cassette mode {mode!r}")
+        self.inner = inner
+        self.mode = mode
+        self.store = CassetteStore(directory)
+        self.latency_scale = latency_scale
+        self.models = _Models(self)
+        self.aio = _Aio(self)
+
+    # ─── shared bookkeeping ───
+
+    def _lookup(self, fp: str, kind: str) -> dict:
+        record = self.store.get(fp)
+        if record is None or record.get("kind") != kind:
+            annotate(cassette="miss")
+            raise CassetteMiss(f"no {kind} cassette for request {fp[:12]} in {self.store.directory}")
+        annotate(cassette="hit")
+        return record
+
+    def _record(self, fp: str, kind: str, model: str, contents, seconds: float, **payload) -> None:
+        if self.mode != "record":
+            return
+        self.store.put(fp, {
+            "fingerprint": fp,
+            "kind": kind,
+            "model": model,
+            "contents": contents if isinstance(contents, str) else json.loads(json.dumps(contents, default=str)),
+            "recorded_at": time.time(),
+            "seconds": round(seconds, 4),
+            **payload,
+        })
+        annotate(cassette="recorded")
+
+    def _delay(self, seconds: float) -> float:
+        return max(0.0, seconds * self.latency_scale)
+
+
+class _Models:
+    def __init__(self, owner: CassetteClient):
+        self._owner = owner
+
+    def generate_content(self, model=None, contents=None, config=None, **kwargs):
+        owner = self._owner
+        fp = fingerprint(model, contents, config)
+        if owner.mode == "replay":
+            record = owner._lookup(fp, "generate")
+            time.sleep(owner._delay(record["seconds"]))
+            return _load(record["response"])
+        started = time.perf_counter()
+        response = owner.inner.models.generate_content(model=model, contents=contents, config=config, **kwargs)
+        owner._record(fp, "generate", model, contents, time.perf_counter() - started, response=_dump(response))
+        return response
+
+    def generate_content_stream(self, model=None, contents=None, config=None, **kwargs):
+        owner = self._owner
+        fp = fingerprint(model, contents, config)
+        if owner.mode == "replay":
+            record = owner._lookup(fp, "stream")
+            return _replay_stream(record, owner._delay)
+        started = time.perf_counter()
+        chunks = owner.inner.models.generate_content_stream(model=model, contents=contents, config=config, **kwargs)
+        return _RecordingStream(owner, fp, model, contents, chunks, started)
+
+
+class _AsyncModels:
+    def __init__(self, owner: CassetteClient):
+        self._owner = owner
+
+    async def generate_content(self, model=None, contents=None, config=None, **kwargs):
+        owner = self._owner
+        fp = fingerprint(model, contents, config)
+        if owner.mode == "replay":
+            record = owner._lookup(fp, "generate")
+            await asyncio.sleep(owner._delay(record["seconds"]))
+            return _load(record["response"])
+        started = time.perf_counter()
+        response = await owner.inner.aio.models.generate_content(model=model, contents=contents, config=config, **kwargs)
+        owner._record(fp, "generate", model, contents, time.perf_counter() - started, response=_dump(response))
+        return response
+
+    async def generate_content_stream(self, model=None, contents=None, config=None, **kwargs):
+        owner = self._owner
+        fp = fingerprint(model, contents, config)
+        if owner.mode == "replay":
+            record = owner._lookup(fp, "stream")
+            return _replay_stream_async(record, owner._delay)
+        started = time.perf_counter()
+        chunks = await owner.inner.aio.models.generate_content_stream(
+            model=model, contents=contents, config=config, **kwargs
+        )
+        return _AsyncRecordingStream(owner, fp, model, contents, chunks, started)
+
+
+class _Aio:
+    def __init__(self, owner: CassetteClient):
+        self.models = _AsyncModels(owner)
+
+
+# ─────────────────────────────────────────────────────────────
+# STREAMS
+# ─────────────────────────────────────────────────────────────
+
+def _replay_stream(record: dict, delay):
+    """Generator over recorded chunks, each released at its recorded offset (scaled)."""
+    elapsed = 0.0
+    for chunk in record["chunks"]:
+        time.sleep(delay(chunk["at"] - elapsed))
+        elapsed = chunk["at"]
+        yield _load(chunk["response"])
+
+
+async def _replay_stream_async(record: dict, delay):
+    elapsed = 0.0
+    for chunk in record["chunks"]:
+        await asyncio.sleep(delay(chunk["at"] - elapsed))
+        elapsed = chunk["at"]
+        yield _load(chunk["response"])
+
+
+class _RecordingStream:
+    """
+    Passes chunks through and writes what the caller consumed once the stream ends or is closed
+    (TalAgent stops reading at \\end{document}), so replay reproduces exactly what the caller saw.
+    """
+
+    def __init__(self, owner, fp, model, contents, chunks, started):
+        self._owner, self._fp, self._model, self._contents = owner, fp, model, contents
+        self._chunks, self._started = chunks, started
+        self._recorded = []
+        self._finished = False
+
+    def _keep(self, chunk) -> None:
+        self._recorded.append({"at": round(time.perf_counter() - self._started, 4), "response": _dump(chunk)})
+
+    def _finish(self) -> None:
+        if self._finished or not self._recorded:
+            return
+        self._finished = True
+        self._owner._record(
+            self._fp, "stream", self._model, self._contents,
+            time.perf_counter() - self._started, chunks=self._recorded,
+        )
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            self._keep(chunk)
+            yield chunk
+        self._finish()
+
+    def close(self):
+        self._finish()
+        if hasattr(self._chunks, "close"):
+            self._chunks.close()
+
+
+class _AsyncRecordingStream(_RecordingStream):
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        async for chunk in self._chunks:
+            self._keep(chunk)
+            yield chunk
+        self._finish()
+
+    async def aclose(self):
+        self._finish()
+        if hasattr(self._chunks, "aclose"):
+            await self._chunks.aclose()
+
+
+def wrap_client(make_client, mode: str = None):
+    """
+    The client TalAgent should use: make_client() itself when cassettes are off, otherwise a CassetteClient
+    around it (replay never calls make_client, so it runs without an API key).
+    """
+    mode = mode or config.CASSETTE_MODE
+    if mode == "off":
+        return make_client()
+    inner = None if mode == "replay" else make_client()
+    return CassetteClient(inner, mode, config.CASSETTE_DIR, config.CASSETTE_LATENCY_SCALE)
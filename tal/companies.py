@@ -0,0 +1,166 @@
+"""
+Company profiles.
+analyze_resume (archetype) and generate_cold_dm (news hooks) both need to know the employer, and popular
+employers come up for user after user. A researched profile (archetype, size band, dated news hooks) is kept
+per normalized company name; while it is fresh, both prompts get it as context and run without the Google
+Search tool. A background refresher re-researches hot companies before their profile goes stale.
+"""
+
+import asyncio
+import re
+import threading
+import time
+
+from tal import config
+from tal.cache import normalize_text, open_cache
+from tal.resources import submit_to_loop
+from tal.scheduler import priority
+from tal.telemetry import annotate, metrics, record_fallback
+
+_SUFFIXES = re.compile(
+    r"[,.]?\s+(inc|incorporated|llc|ltd|limited|corp|corporation|co|gmbh|plc|pvt|private|technologies|labs)\.?$"
+)
+_NAME = r"([A-Z][\w&.'\-]*(?:[ \t]+(?:[A-Z][\w&.'\-]*|of|and|&)){0,3})"
+_ROLE_WORDS = (
+    "engineer|developer|designer|manager|analyst|scientist|architect|lead|intern|consultant|specialist|"
+    "associate|director|head|role|position|opening|opportunity"
+)
+_JD_COMPANY = (
+    re.compile(rf"^\s*(?:company|employer|organization)\s*:\s*{_NAME}", re.MULTILINE | re.IGNORECASE),
+    re.compile(rf"\bAbout\s+{_NAME}\b"),
+    re.compile(rf"\b{_NAME}\s+is\s+(?:hiring|looking|seeking)\b"),
+    # "Engineer at Acme" / "join Acme", not "apply at LinkedIn" or "available at Indeed"
+    re.compile(rf"\b(?i:{_ROLE_WORDS})s?\s+at\s+{_NAME}"),
+    re.compile(rf"\b[Jj]oin(?:ing)?\s+{_NAME}"),
+)
+_NOT_COMPANIES = {"the", "our", "we", "us", "you", "the company", "the role", "a", "an", "this"}
+
+
+def company_key(name: str) -> str:
+    """"Acme, Inc." / "ACME" / " acme " -> "acme"."""
+    key = normalize_text(name).lower().strip(" .,")
+    previous = None
+    while key != previous:
+        previous, key = key, _SUFFIXES.sub("", key).strip(" .,")
+    return key
+
+
+def guess_company(jd_text: str) -> str:
+    """The employer named in a JD, found locally (so the profile can be looked up before the analysis call)."""
+    for pattern in _JD_COMPANY:
+        for match in pattern.finditer(jd_text or ""):
+            name = re.sub(r"['’]s$", "", match.group(1).strip(" .,"))
+            if company_key(name) not in _NOT_COMPANIES:
+                return name
+    return ""
+
+
+def profile_block(profile: dict) -> str:
+    """The profile as prompt context."""
+    hooks = "\n".join(f"  - ({h.get('date') or 'recent'}) {h.get('hook')}" for h in profile.get("news") or [] if h.get("hook"))
+    researched = time.strftime("%Y-%m-%d", time.gmtime(profile.get("researched", time.time())))
+    return (
+        f"COMPANY PROFILE (researched {researched}; treat as ground truth, no need to search):\n"
+        f"- Name: {profile.get('name')}\n"
+        f"- Archetype: {profile.get('archetype')}\n"
+        f"- Size: {profile.get('size_band') or 'unknown'} employees\n"
+        f"- Recent news hooks:\n{hooks or '  - none found'}"
+    )
+
+
+class CompanyProfiles:
+    """Profiles in the "companies" result cache, fresh for `ttl` seconds. Lookups are counted per company to find the hot ones."""
+
+    def __init__(self, store, ttl: float):
+        self.store = store
+        self.ttl = ttl
+        self._hits = {}  # key -> {"name": ..., "count": ..., "last": ...}
+        self._lock = threading.Lock()
+        self._refresher = None
+
+    def get(self, name: str) -> dict:
+        key = company_key(name)
+        if not config.COMPANY_PROFILES or not key or key in _NOT_COMPANIES:
+            return None
+        with self._lock:
+            hits = self._hits.setdefault(key, {"name": name, "count": 0, "last": 0.0})
+            hits["count"] += 1
+            hits["last"] = time.time()
+        profile = self.store.get(key)
+        metrics.inc("tal_company_profiles_total", outcome="hit" if profile else "miss")
+        annotate(company_profile="hit" if profile else "miss")
+        return profile
+
+    def put(self, profile: dict, *aliases: str) -> dict:
+        """Store under the profile's own name and any other names it was looked up by."""
+        if not config.COMPANY_PROFILES:
+            return profile
+        profile = {**profile, "researched": profile.get("researched") or time.time()}
+        for name in {profile.get("name"), *aliases}:
+            key = company_key(name or "")
+            if key and key not in _NOT_COMPANIES:
+                self.store.set(key, profile)
+        return profile
+
+    def hot(self, min_hits: int, window: float) -> list:
+        """(key, name) of companies looked up at least `min_hits` times in the last `window` seconds."""
+        cutoff = time.time() - window
+        with self._lock:
+            for key in [k for k, h in self._hits.items() if h["last"] < cutoff]:
+                del self._hits[key]
+            return [(k, h["name"]) for k, h in self._hits.items() if h["count"] >= min_hits]
+
+    def due(self, key: str, refresh_at: float) -> bool:
+        """True if the profile is missing or past `refresh_at` (a fraction) of its TTL."""
+        profile = self.store.get(key)
+        return profile is None or time.time() - profile.get("researched", 0) > self.ttl * refresh_at
+
+    # ─── Background refresh ───
+
+    def start_refresher(self, research_async, interval: float) -> None:
+        """Every `interval` seconds, re-research hot companies whose profile is due (once per process)."""
+        with self._lock:
+            if self._refresher is not None or interval <= 0:
+                return
+            self._refresher = submit_to_loop(self._refresh_forever(research_async, interval))
+
+    async def _refresh_forever(self, research_async, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh(research_async)
+            except Exception as e:  # a bad pass must not end the refresher
+                record_fallback("refresh_companies", e)
+
+    async def refresh(self, research_async) -> int:
+        """One refresher pass; returns the number of profiles re-researched."""
+        refreshed = 0
+        hot = self.hot(config.COMPANY_HOT_HITS, config.COMPANY_HOT_WINDOW)
+        for key, name in hot:
+            if not self.due(key, config.COMPANY_REFRESH_AT):
+                continue
+            try:
+                with priority("batch"):
+                    profile = await research_async(name)
+            except Exception as e:
+                record_fallback("research_company", e)
+                continue
+            if profile:
+                self.put(profile, name)
+                refreshed += 1
+                metrics.inc("tal_company_refreshes_total")
+        return refreshed
+
+
+_profiles = None
+_profiles_lock = threading.Lock()
+
+
+def company_profiles() -> CompanyProfiles:
+    """The process-wide profile store."""
+    global _profiles
+    with _profiles_lock:
+        if _profiles is None:
+            store = open_cache("companies", ttl=config.COMPANY_PROFILE_TTL, max_bytes=config.COMPANY_PROFILE_MAX_BYTES)
+            _profiles = CompanyProfiles(store, ttl=config.COMPANY_PROFILE_TTL)
+        return _profiles
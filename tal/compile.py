@@ -0,0 +1,115 @@
+"""
+PDF compilation.
+Tries the local engine, then races the remote services, behind the compiled-PDF artifact store.
+Kept free of Streamlit and Gemini so it can run in worker processes.
+"""
+
+import re
+
+from tal import config
+from tal.artifacts import open_artifact_store
+from tal.compile_client import get_compile_client
+from tal.latex import get_local_compiler, is_document_error
+from tal.telemetry import annotate, metrics, set_status, traced
+
+# A remote 4xx other than 429 is the service refusing this document, not a passing fault
+_REMOTE_DOCUMENT_ERROR = re.compile(r": HTTP 4(?!29)\d\d$")
+
+
+def pdf_store():
+    return open_artifact_store(
+        "pdf",
+        max_bytes=config.PDF_CACHE_MAX_BYTES,
+        memory_bytes=config.PDF_CACHE_MEMORY_BYTES,
+        negative_ttl=config.COMPILE_NEGATIVE_TTL,
+    )
+
+
+def compile_pdf(latex_content: str) -> tuple[bytes, str]:
+    """
+    Compile LaTeX to PDF: the local engine if there is one, then a hedged race of the remote backends.
+    Byte-identical sources are served from the artifact store; a source that recently failed with a LaTeX
+    error is not retried.
+    """
+    pdf_bytes, error, _ = compile_pdf_classified(latex_content)
+    return pdf_bytes, error
+
+
+@traced("compile_pdf")
+def compile_pdf_classified(latex_content: str) -> tuple[bytes, str, bool]:
+    """
+    compile_pdf plus whether a failure is deterministic (a LaTeX error the same source will hit again), for
+    callers that must tell "this document is broken" from "try again later".
+    """
+    store = pdf_store()
+    key = store.key(latex_content)
+    pdf_bytes = store.get(key)
+    if pdf_bytes:
+        _served_by("cache", True)
+        return pdf_bytes, None, False
+    error = store.get_failure(key)
+    if error:
+        _served_by("negative-cache", False)
+        return None, error, True
+
+    errors, deterministic = [], False
+    if local_compiler_available():
+        pdf_bytes, error = get_local_compiler().compile(latex_content)
+        if pdf_bytes:
+            _served_by("local", True)
+            store.put(key, pdf_bytes)
+            return pdf_bytes, None, False
+        errors.append(f"local: {error}")
+        deterministic = is_document_error(error)
+
+    pdf_bytes, remote_errors = get_compile_client().compile(latex_content)
+    if pdf_bytes:
+        # The client has annotated the span with the winning backend
+        store.put(key, pdf_bytes)
+        return pdf_bytes, None, False
+    errors.extend(remote_errors)
+
+    detail = f" ({'; '.join(errors)})" if errors else ""
+    error = f"Compilation failed. Please download the .tex file and use Overleaf.{detail}"
+    # Only failures the same source would hit again are remembered; timeouts, 5xx and open circuits are not
+    deterministic = deterministic or any(_REMOTE_DOCUMENT_ERROR.search(e) for e in remote_errors)
+    if deterministic:
+        store.put_failure(key, error)
+    _served_by("none", False)
+    set_status("error", "; ".join(errors))
+    return None, error, deterministic
+
+
+def local_compiler_available() -> bool:
+    return "local" in config.COMPILE_BACKENDS and get_local_compiler().available
+
+
+@traced("compile_pdf_local")
+def compile_pdf_local(latex_content: str) -> tuple[bytes, str]:
+    """
+    compile_pdf with the local engine only, for callers that recompile in a loop (page fitting):
+    a ladder of remote compiles would cost far more than the layout it saves.
+    """
+    if not local_compiler_available():
+        return None, "no local LaTeX engine installed"
+    store = pdf_store()
+    key = store.key(latex_content)
+    pdf_bytes = store.get(key)
+    if pdf_bytes:
+        _served_by("cache", True)
+        return pdf_bytes, None
+    pdf_bytes, error = get_local_compiler().compile(latex_content)
+    _served_by("local", bool(pdf_bytes))
+    if pdf_bytes:
+        store.put(key, pdf_bytes)
+    return pdf_bytes, error
+
+
+def _served_by(backend: str, ok: bool) -> None:
+    annotate(backend=backend)
+    metrics.inc("tal_compile_total", backend=backend, outcome="ok" if ok else "error")
+
+
+def compile_stats() -> dict:
+    """Health of the remote backends (circuit state, successes / failures, hedge wins, latency)."""
+    return get_compile_client().stats()
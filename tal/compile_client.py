@@ -0,0 +1,256 @@
+"""
+Remote LaTeX compile client.
+One pooled keep-alive session for every remote backend, hedged requests (the next backend joins the race
+if the current one hasn't answered within a short delay; the first valid PDF wins) and a circuit breaker
+per backend so an unhealthy service is skipped instead of costing a full timeout on every compile.
+"""
+
+import logging
+import threading
+import time
+import urllib.parse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tal import config
+from tal.telemetry import annotate, metrics
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_OPEN = "circuit open"
+PDF_MAGIC = b"%PDF-"
+LATEXONLINE_MAX_URL = 8000  # longer GET URLs get a 414
+
+
+class DocumentRejected(Exception):
+    """The backend can't take this document (e.g. too large for a GET); not a sign of ill health."""
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failures` consecutive failures; open -> half-open after `cooldown` seconds,
+    where a single probe request decides between closed and open again.
+    """
+
+    def __init__(self, failures: int = None, cooldown: float = None):
+        self.max_failures = failures or config.BREAKER_FAILURES
+        self.cooldown = cooldown if cooldown is not None else config.BREAKER_COOLDOWN
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half-open"
+            if self.state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release(self) -> None:
+        """Give back a probe slot that was never used (no request went out), without deciding anything."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            self._probing = False
+            if ok:
+                self.state = "closed"
+                self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            if self.state == "half-open" or self.consecutive_failures >= self.max_failures:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class RemoteBackend:
+    """One compile service: how to call it, plus its breaker and health counters."""
+
+    def __init__(self, name: str, send, breaker: CircuitBreaker = None):
+        self.name = name
+        self._send = send  # (session, latex, timeout) -> requests.Response
+        self.breaker = breaker or CircuitBreaker()
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.wins = 0
+        self.latency = None  # EWMA seconds of completed requests
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def compile(self, session: requests.Session, latex_content: str, timeout: float) -> tuple[bytes, str]:
+        """
+        Returns (pdf bytes, None) or (None, error). Transport errors, 5xx, 429 and non-PDF bodies count
+        against the breaker; another 4xx means the document was rejected, which says nothing about the
+        service's health. A document refused before sending (DocumentRejected) leaves breaker and stats alone.
+        """
+        started = time.monotonic()
+        pdf_bytes, error, healthy = None, None, False
+        try:
+            resp = self._send(session, latex_content, timeout)
+            if resp.status_code not in (200, 201):
+                error, healthy = f"HTTP {resp.status_code}", 400 <= resp.status_code < 500 and resp.status_code != 429
+            elif not resp.content.startswith(PDF_MAGIC):
+                error = "response is not a PDF"
+            else:
+                pdf_bytes, healthy = resp.content, True
+        except DocumentRejected as e:
+            self.breaker.release()
+            metrics.inc("tal_compile_requests_total", backend=self.name, outcome="rejected")
+            return None, str(e)
+        except requests.RequestException as e:
+            error = str(e)
+        seconds = time.monotonic() - started
+        self._record(healthy, seconds, error)
+        outcome = "ok" if pdf_bytes else ("rejected" if healthy else "error")
+        metrics.inc("tal_compile_requests_total", backend=self.name, outcome=outcome)
+        metrics.observe("tal_compile_request_seconds", seconds, backend=self.name)
+        return pdf_bytes, error
+
+    def _record(self, healthy: bool, seconds: float, error: str) -> None:
+        was = self.breaker.state
+        self.breaker.record(healthy)
+        if self.breaker.state != was:
+            logger.warning("compile backend %s: circuit %s -> %s (%s)", self.name, was, self.breaker.state, error)
+        with self._lock:
+            self.requests += 1
+            if healthy:
+                self.successes += 1
+            else:
+                self.failures += 1
+            if error:
+                self.last_error = error
+            self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+
+    def record_win(self) -> None:
+        with self._lock:
+            self.wins += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.breaker.state,
+                "requests": self.requests,
+                "successes": self.successes,
+                "failures": self.failures,
+                "wins": self.wins,
+                "latency": round(self.latency, 3) if self.latency is not None else None,
+                "last_error": self.last_error,
+            }
+
+
+def _send_ytotech(base_url: str):
+    """latex.ytotech.com (Most robust for standard templates)."""
+    url = f"{base_url.rstrip('/')}/builds/sync"
+
+    def send(session, latex_content, timeout):
+        return session.post(
+            url,
+            json={"compiler": "pdflatex", "resources": [{"main": True, "content": latex_content}]},
+            timeout=timeout,
+        )
+    return send
+
+
+def _send_latexonline(base_url: str):
+    """latexonline.cc (GET only, so small documents only)."""
+    url = f"{base_url.rstrip('/')}/compile"
+
+    def send(session, latex_content, timeout):
+        encoded = urllib.parse.quote(latex_content)
+        if len(encoded) >= LATEXONLINE_MAX_URL:
+            raise DocumentRejected("document too large")
+        return session.get(f"{url}?text={encoded}", timeout=timeout)
+    return send
+
+
+_BACKEND_FACTORIES = {
+    "ytotech": lambda: _send_ytotech(config.YTOTECH_URL),
+    "latexonline": lambda: _send_latexonline(config.LATEXONLINE_URL),
+}
+
+
+class CompileClient:
+    """Hedged compiles across remote backends over one pooled session."""
+
+    def __init__(self, backends: list, hedge_delay: float = None, timeout: float = None, pool_size: int = None):
+        self.backends = backends
+        self.hedge_delay = hedge_delay if hedge_delay is not None else config.COMPILE_HEDGE_DELAY
+        self.timeout = timeout or config.REMOTE_COMPILE_TIMEOUT
+        pool_size = pool_size or config.COMPILE_POOL_SIZE
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(len(backends), 1), pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Losing hedges keep running to completion (their outcome still feeds the breaker)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="compile")
+
+    def compile(self, latex_content: str) -> tuple[bytes, list]:
+        """
+        Race the backends: start the first healthy one, add the next whenever the race has gone
+        `hedge_delay` without an answer or a runner fails. Returns (pdf bytes or None, ["name: error", ...]).
+        """
+        queue = list(self.backends)
+        errors, pending, launched = [], {}, []
+
+        def launch() -> bool:
+            # The breaker is asked only when a backend is about to run, so a half-open probe is never left unused
+            while queue:
+                backend = queue.pop(0)
+                if backend.breaker.allow():
+                    future = self._executor.submit(backend.compile, self.session, latex_content, self.timeout)
+                    pending[future] = backend
+                    launched.append(backend.name)
+                    return True
+                errors.append(f"{backend.name}: {CIRCUIT_OPEN}")
+            return False
+
+        launch()
+        while pending:
+            done, _ = wait(pending, timeout=self.hedge_delay if queue else None, return_when=FIRST_COMPLETED)
+            if not done:
+                launch()  # hedge: nobody has answered in time
+                continue
+            for future in done:
+                backend = pending.pop(future)
+                pdf_bytes, error = future.result()
+                if pdf_bytes:
+                    backend.record_win()
+                    annotate(backend=backend.name, attempts=launched)
+                    metrics.inc("tal_compile_total", backend=backend.name, outcome="ok")
+                    return pdf_bytes, []
+                errors.append(f"{backend.name}: {error}")
+            if not pending:
+                launch()
+        return None, errors
+
+    def stats(self) -> dict:
+        return {b.name: b.stats() for b in self.backends}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_compile_client() -> CompileClient:
+    """Shared client for the remote backends named in config.COMPILE_BACKENDS (in that order)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            backends = [
+                RemoteBackend(name, _BACKEND_FACTORIES[name]())
+                for name in config.COMPILE_BACKENDS
+                if name in _BACKEND_FACTORIES
+            ]
+            _client = CompileClient(backends)
+        return _client
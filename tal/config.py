@@ -0,0 +1,165 @@
+"""
+Runtime settings.
+Every knob has a sane default and can be overridden with a TAL_* environment variable.
+"""
+
+import os
+import tomllib
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def load_api_key() -> str:
+    """GEMINI_API_KEY from the environment, falling back to .streamlit/secrets.toml."""
+    key = os.environ.get("GEMINI_API_KEY")
+    if key:
+        return key
+    try:
+        with open(os.path.join(".streamlit", "secrets.toml"), "rb") as f:
+            return tomllib.load(f).get("GEMINI_API_KEY")
+    except (OSError, tomllib.TOMLDecodeError):
+        return None
+
+
+# ─── Caching ───
+CACHE_DIR = os.environ.get("TAL_CACHE_DIR", ".tal_cache")
+
+ANALYSIS_CACHE_TTL = _env_float("TAL_ANALYSIS_CACHE_TTL", 7 * 24 * 3600)  # 1 week
+ANALYSIS_CACHE_MAX_BYTES = _env_int("TAL_ANALYSIS_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+# Generated resume parts (structured mode), keyed by their inputs so refinements only redo what changed
+SECTION_CACHE_TTL = _env_float("TAL_SECTION_CACHE_TTL", 7 * 24 * 3600)
+SECTION_CACHE_MAX_BYTES = _env_int("TAL_SECTION_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+# ─── PDF compilation ───
+# "local" runs first when a TeX engine is installed; the remote backends are then raced in the listed order.
+COMPILE_BACKENDS = [
+    b.strip() for b in os.environ.get("TAL_COMPILE_BACKENDS", "local,ytotech,latexonline").split(",") if b.strip()
+]
+LATEX_ENGINE = os.environ.get("TAL_LATEX_ENGINE", "auto")  # auto / pdflatex / tectonic
+LATEX_WORKERS = _env_int("TAL_LATEX_WORKERS", min(4, os.cpu_count() or 1))
+LATEX_TIMEOUT = _env_float("TAL_LATEX_TIMEOUT", 20)
+LATEX_MEMORY_LIMIT = _env_int("TAL_LATEX_MEMORY_LIMIT", 1024 * 1024 * 1024)  # bytes per worker
+REMOTE_COMPILE_TIMEOUT = _env_float("TAL_REMOTE_COMPILE_TIMEOUT", 30)
+YTOTECH_URL = os.environ.get("TAL_YTOTECH_URL", "https://latex.ytotech.com")
+LATEXONLINE_URL = os.environ.get("TAL_LATEXONLINE_URL", "https://latexonline.cc")
+# The next remote backend joins the race when nobody has answered within this many seconds
+COMPILE_HEDGE_DELAY = _env_float("TAL_COMPILE_HEDGE_DELAY", 3)
+COMPILE_POOL_SIZE = _env_int("TAL_COMPILE_POOL_SIZE", 8)  # keep-alive connections / in-flight requests
+# A backend is skipped for BREAKER_COOLDOWN seconds after BREAKER_FAILURES consecutive failures
+BREAKER_FAILURES = _env_int("TAL_BREAKER_FAILURES", 3)
+BREAKER_COOLDOWN = _env_float("TAL_BREAKER_COOLDOWN", 60)
+
+# ─── Compiled PDF artifacts ───
+PDF_CACHE_MAX_BYTES = _env_int("TAL_PDF_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+PDF_CACHE_MEMORY_BYTES = _env_int("TAL_PDF_CACHE_MEMORY_BYTES", 32 * 1024 * 1024)  # 0 disables the memory tier
+# Seconds a source that failed with a LaTeX error (local, or a remote 4xx) is not recompiled
+COMPILE_NEGATIVE_TTL = _env_float("TAL_COMPILE_NEGATIVE_TTL", 120)
+
+# ─── Pipeline ───
+# Draft the cold DM alongside resume generation so it is ready when the user asks for it
+PREFETCH_COLD_DM = os.environ.get("TAL_PREFETCH_COLD_DM", "1") not in ("0", "false", "no")
+# "structured": the generator returns resume JSON that tal.render fills into the template (no preamble in
+# the prompt or the output); "latex": it writes the whole document itself
+LATEX_OUTPUT = os.environ.get("TAL_LATEX_OUTPUT", "structured")
+# Stream LaTeX generation into the UI and abort early when the output goes off the rails
+STREAM_LATEX = os.environ.get("TAL_STREAM_LATEX", "1") not in ("0", "false", "no")
+LATEX_STREAM_RETRIES = _env_int("TAL_LATEX_STREAM_RETRIES", 1)
+# Multi-JD mode: roles worked on at once, and how many JDs one session may submit
+FANOUT_CONCURRENCY = _env_int("TAL_FANOUT_CONCURRENCY", 8)
+FANOUT_MAX_JDS = _env_int("TAL_FANOUT_MAX_JDS", 20)
+# Tighten spacing / bullet size / margins locally (recompiling) when the resume overflows its page budget
+FIT_PAGES = os.environ.get("TAL_FIT_PAGES", "1") not in ("0", "false", "no")
+
+# ─── Company profiles ───
+COMPANY_PROFILES = os.environ.get("TAL_COMPANY_PROFILES", "1") not in ("0", "false", "no")
+COMPANY_PROFILE_TTL = _env_float("TAL_COMPANY_PROFILE_TTL", 3 * 24 * 3600)  # fresh profiles skip Google Search
+COMPANY_PROFILE_MAX_BYTES = _env_int("TAL_COMPANY_PROFILE_MAX_BYTES", 16 * 1024 * 1024)
+COMPANY_REFRESH_INTERVAL = _env_float("TAL_COMPANY_REFRESH_INTERVAL", 900)  # refresher pass every N seconds, 0 = off
+COMPANY_HOT_HITS = _env_int("TAL_COMPANY_HOT_HITS", 3)  # lookups within the window that make a company hot
+COMPANY_HOT_WINDOW = _env_float("TAL_COMPANY_HOT_WINDOW", 24 * 3600)
+COMPANY_REFRESH_AT = _env_float("TAL_COMPANY_REFRESH_AT", 0.8)  # re-research hot profiles past this fraction of the TTL
+
+# ─── Result preview ───
+PREVIEW_MODE = os.environ.get("TAL_PREVIEW_MODE", "viewer")  # viewer: PDF rendered in the browser; images: server-side
+PREVIEW_DPI = _env_int("TAL_PREVIEW_DPI", 110)
+PREVIEW_FORMAT = os.environ.get("TAL_PREVIEW_FORMAT", "webp")  # webp or png
+PREVIEW_QUALITY = _env_int("TAL_PREVIEW_QUALITY", 80)  # webp only
+PREVIEW_PLACEHOLDER_DPI = _env_int("TAL_PREVIEW_PLACEHOLDER_DPI", 24)
+PREVIEW_CACHE_MAX_BYTES = _env_int("TAL_PREVIEW_CACHE_MAX_BYTES", 128 * 1024 * 1024)
+
+# ─── Session blobs ───
+BLOB_IDLE_TTL = _env_float("TAL_BLOB_IDLE_TTL", 3600)  # unreferenced blobs are deleted after this
+BLOB_SESSION_TTL = _env_float("TAL_BLOB_SESSION_TTL", 6 * 3600)  # a session not seen this long drops its blobs
+
+# ─── Background jobs ───
+JOB_WORKERS = _env_int("TAL_JOB_WORKERS", 16)  # analysis / generation jobs running at once
+JOB_RESULT_TTL = _env_float("TAL_JOB_RESULT_TTL", 24 * 3600)  # finished jobs a refreshed session can re-attach to
+JOB_RESULT_MAX_BYTES = _env_int("TAL_JOB_RESULT_MAX_BYTES", 256 * 1024 * 1024)
+
+# ─── Gemini scheduler ───
+# Shared by every session in the process; 0 disables a limit
+GEMINI_RPM = _env_int("TAL_GEMINI_RPM", 0)
+GEMINI_TPM = _env_int("TAL_GEMINI_TPM", 0)
+GEMINI_MAX_INFLIGHT = _env_int("TAL_GEMINI_MAX_INFLIGHT", 32)
+GEMINI_QUEUE_LIMIT = _env_int("TAL_GEMINI_QUEUE_LIMIT", 256)  # waiting calls per priority class
+GEMINI_RETRIES = _env_int("TAL_GEMINI_RETRIES", 3)  # on 429 / 5xx
+GEMINI_BACKOFF = _env_float("TAL_GEMINI_BACKOFF", 1)  # seconds, doubled per attempt, full jitter
+GEMINI_BACKOFF_MAX = _env_float("TAL_GEMINI_BACKOFF_MAX", 30)
+
+# ─── Model routing ───
+MODEL_TIERS = {
+    "pro": os.environ.get("TAL_MODEL_PRO", "gemini-3-pro-preview"),
+    "fast": os.environ.get("TAL_MODEL_FAST", "gemini-2.5-flash"),
+    "lite": os.environ.get("TAL_MODEL_LITE", "gemini-2.5-flash-lite"),
+}
+# Per task: tiers tried in order (TAL_ROUTE_<TASK>), and seconds each attempt gets (TAL_BUDGET_<TASK>, 0 = no limit)
+MODEL_ROUTES = {
+    task: [t.strip() for t in os.environ.get(f"TAL_ROUTE_{task.upper()}", tiers).split(",") if t.strip()]
+    for task, tiers in {
+        "analysis": "fast,lite",
+        "cold_dm": "fast,lite",
+        "research": "fast,lite",
+        "resume_part": "pro,fast",
+        "latex": "pro,fast",
+    }.items()
+}
+LATENCY_BUDGETS = {
+    task: _env_float(f"TAL_BUDGET_{task.upper()}", seconds)
+    for task, seconds in {"analysis": 30, "cold_dm": 15, "research": 45, "resume_part": 45, "latex": 120}.items()
+}
+
+# ─── Prompt budgets (approximate tokens) ───
+ANALYSIS_RESUME_TOKENS = _env_int("TAL_ANALYSIS_RESUME_TOKENS", 2500)
+ANALYSIS_JD_TOKENS = _env_int("TAL_ANALYSIS_JD_TOKENS", 1250)
+LATEX_RESUME_TOKENS = _env_int("TAL_LATEX_RESUME_TOKENS", 4000)
+LATEX_JD_TOKENS = _env_int("TAL_LATEX_JD_TOKENS", 1250)
+COLD_DM_RESUME_TOKENS = _env_int("TAL_COLD_DM_RESUME_TOKENS", 500)
+COLD_DM_JD_TOKENS = _env_int("TAL_COLD_DM_JD_TOKENS", 500)
+
+# ─── Telemetry ───
+# Finished spans are appended here as JSON lines ("" disables the log)
+TELEMETRY_LOG = os.environ.get("TAL_TELEMETRY_LOG", os.path.join(CACHE_DIR, "telemetry.jsonl"))
+TELEMETRY_LOG_MAX_BYTES = _env_int("TAL_TELEMETRY_LOG_MAX_BYTES", 64 * 1024 * 1024)  # then rotated to .1, .2, ...
+TELEMETRY_LOG_BACKUPS = _env_int("TAL_TELEMETRY_LOG_BACKUPS", 3)
+TELEMETRY_TRACES = _env_int("TAL_TELEMETRY_TRACES", 200)  # recent traces kept in memory for the debug panel
+TELEMETRY_TRACE_SPANS = _env_int("TAL_TELEMETRY_TRACE_SPANS", 500)
+METRICS_PORT = _env_int("TAL_METRICS_PORT", 0)  # Prometheus /metrics endpoint, 0 = off
+DEBUG_PANEL = os.environ.get("TAL_DEBUG_PANEL", "0") not in ("0", "false", "no")
+
+# ─── Gemini record / replay ───
+# off / record / replay / passthrough (see tal/cassette.py); replay needs no API key
+CASSETTE_MODE = os.environ.get("TAL_CASSETTE_MODE", "off")
+CASSETTE_DIR = os.environ.get("TAL_CASSETTE_DIR", os.path.join(CACHE_DIR, "cassettes"))
+CASSETTE_LATENCY_SCALE = _env_float("TAL_CASSETTE_LATENCY_SCALE", 0)  # 0 = instant, 1 = as recorded
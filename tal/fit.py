@@ -0,0 +1,142 @@
+"""
+Page fitting.
+After the first compile, the PDF's page count is checked with PyMuPDF. If the resume overflows, the layout is
+tightened locally (bullet size, the template's vspace values, margins) by binary-searching a ladder of
+progressively tighter settings for the loosest one that fits. Each step is a cheap compile, not an LLM call.
+"""
+
+import re
+
+from tal import config
+from tal.compile import compile_pdf_local, local_compiler_available
+from tal.latex import BEGIN_DOCUMENT, FIT_MARKER
+from tal.telemetry import annotate, traced
+
+_FIT_LINE = re.compile(rf"^.*{re.escape(FIT_MARKER)}\s*$\n?", re.MULTILINE)
+_BULLET_OVERRIDE = re.compile(r"\\renewcommand\{?\\resumeBulletSize\}?\{(\\[a-z]+)\}")
+
+# Smallest to largest; a fit step never makes the bullets bigger than the document already has them
+_SIZES = (r"\scriptsize", r"\footnotesize", r"\small", r"\normalsize")
+
+# Level 0 is the template as written; every later level is at least as tight as the one before it.
+#   bullet       \resumeBulletSize
+#   item         \vspace after each bullet (template: -2pt)
+#   heading      \vspace after (sub)headings (template: -7pt)
+#   section      \vspace before section titles (template: -4pt)
+#   list_end     \vspace after each bullet list (template: -5pt)
+#   vmargin      inches taken from both the top and bottom margin
+#   hmargin      inches taken from both side margins
+LADDER = (
+    {"bullet": r"\small", "item": -2, "heading": -7, "section": -4, "list_end": -5, "vmargin": 0, "hmargin": 0},
+    {"bullet": r"\small", "item": -3, "heading": -8, "section": -5, "list_end": -6, "vmargin": 0.1, "hmargin": 0},
+    {"bullet": r"\footnotesize", "item": -3, "heading": -8, "section": -6, "list_end": -6, "vmargin": 0.15, "hmargin": 0.05},
+    {"bullet": r"\footnotesize", "item": -4, "heading": -9, "section": -7, "list_end": -7, "vmargin": 0.2, "hmargin": 0.1},
+    {"bullet": r"\footnotesize", "item": -4, "heading": -10, "section": -8, "list_end": -8, "vmargin": 0.25, "hmargin": 0.1},
+    {"bullet": r"\scriptsize", "item": -5, "heading": -10, "section": -8, "list_end": -8, "vmargin": 0.3, "hmargin": 0.15},
+)
+
+
+def count_pages(pdf_bytes: bytes) -> int:
+    import fitz  # PyMuPDF
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return doc.page_count
+
+
+def _bullet_size(latex: str, wanted: str) -> str:
+    """The smaller of the ladder's bullet size and the one the generator chose."""
+    chosen = _BULLET_OVERRIDE.findall(latex.split(BEGIN_DOCUMENT, 1)[0])
+    current = chosen[-1] if chosen and chosen[-1] in _SIZES else r"\small"
+    return min(wanted, current, key=_SIZES.index)
+
+
+def fit_block(latex: str, level: int) -> str:
+    """Preamble lines for a ladder level (each tagged, so the local compiler keeps its format-file fast path)."""
+    p = LADDER[level]
+    lines = [
+        rf"\renewcommand{{\resumeBulletSize}}{{{_bullet_size(latex, p['bullet'])}}}",
+        rf"\renewcommand{{\resumeItem}}[1]{{\item\resumeBulletSize{{{{#1 \vspace{{{p['item']}pt}}}}}}}}",
+        rf"\renewcommand{{\resumeSubheading}}[4]{{\vspace{{-2pt}}\item\begin{{tabular*}}{{1.0\textwidth}}[t]"
+        rf"{{l@{{\extracolsep{{\fill}}}}r}}\textbf{{#1}} & \textbf{{\small #2}} \\ \textit{{\small#3}} & "
+        rf"\textit{{\small #4}} \\ \end{{tabular*}}\vspace{{{p['heading']}pt}}}}",
+        rf"\renewcommand{{\resumeProjectHeading}}[2]{{\item\begin{{tabular*}}{{1.0\textwidth}}"
+        rf"{{l@{{\extracolsep{{\fill}}}}r}}\small#1 & \textbf{{\small #2}} \\ \end{{tabular*}}\vspace{{{p['heading']}pt}}}}",
+        rf"\renewcommand{{\resumeItemListEnd}}{{\end{{itemize}}\vspace{{{p['list_end']}pt}}}}",
+        rf"\titleformat{{\section}}{{\vspace{{{p['section']}pt}}\scshape\raggedright\large\bfseries}}{{}}{{0em}}{{}}"
+        rf"[\color{{black}}\titlerule \vspace{{-5pt}}]",
+    ]
+    if p["vmargin"]:
+        lines.append(rf"\addtolength{{\topmargin}}{{-{p['vmargin']}in}}\addtolength{{\textheight}}{{{2 * p['vmargin']:g}in}}")
+    if p["hmargin"]:
+        lines.append(
+            rf"\addtolength{{\oddsidemargin}}{{-{p['hmargin']}in}}\addtolength{{\evensidemargin}}{{-{p['hmargin']}in}}"
+            rf"\addtolength{{\textwidth}}{{{2 * p['hmargin']:g}in}}"
+        )
+    return "".join(f"{line} {FIT_MARKER}\n" for line in lines)
+
+
+def apply_level(latex: str, level: int) -> str:
+    """The document with its fit block (if any) replaced by the one for `level`; level 0 removes it."""
+    latex = _FIT_LINE.sub("", latex)
+    if level == 0 or BEGIN_DOCUMENT not in latex:
+        return latex
+    preamble, body = latex.split(BEGIN_DOCUMENT, 1)
+    # \providecommand first, so redefining a command the generator dropped is not an error
+    guards = "".join(
+        rf"\providecommand{{{name}}}{{}} {FIT_MARKER}" + "\n"
+        for name in (r"\resumeItem", r"\resumeSubheading", r"\resumeProjectHeading", r"\resumeItemListEnd")
+    )
+    return f"{preamble.rstrip()}\n{guards}{fit_block(latex, level)}{BEGIN_DOCUMENT}{body}"
+
+
+@traced("fit_pages")
+def fit_pages(latex: str, pdf_bytes: bytes, max_pages: int, compile_fn) -> tuple[str, bytes, dict]:
+    """
+    Make the compiled resume fit in `max_pages`. Returns (latex, pdf_bytes, report); when nothing fits,
+    the tightest level's output is returned with report["fit"] False. `compile_fn` should be a local-only
+    compile (each ladder step is one); None skips fitting, as when no local engine is installed.
+    """
+    max_pages = max(1, max_pages or 1)
+    report = {"target": max_pages, "pages": None, "level": 0, "compiles": 0, "fit": True}
+    if not pdf_bytes:
+        return latex, pdf_bytes, report
+    report["pages"] = report["pages_before"] = count_pages(pdf_bytes)
+    if report["pages"] <= max_pages or not config.FIT_PAGES or compile_fn is None:
+        report["fit"] = report["pages"] <= max_pages
+        annotate(**report)
+        return latex, pdf_bytes, report
+
+    results = {}
+
+    def attempt(level):
+        if level not in results:
+            candidate = apply_level(latex, level)
+            pdf, _ = compile_fn(candidate)
+            report["compiles"] += 1
+            results[level] = (candidate, pdf, count_pages(pdf) if pdf else None)
+        return results[level]
+
+    # Level 0 overflows; find the loosest level that fits (page count only shrinks as levels tighten)
+    lo, hi, best = 1, len(LADDER) - 1, None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        _, pdf, pages = attempt(mid)
+        if pdf and pages <= max_pages:
+            best, hi = mid, mid - 1
+        else:
+            lo = mid + 1
+
+    level = best if best is not None else len(LADDER) - 1
+    candidate, pdf, pages = attempt(level)
+    if not pdf:  # a fit block that doesn't compile must never cost the user their PDF
+        report.update(level=0, fit=False)
+        annotate(**report)
+        return latex, pdf_bytes, report
+    report.update(level=level, pages=pages, fit=pages <= max_pages)
+    annotate(**report)
+    return candidate, pdf, report
+
+
+def fit_pages_locally(latex: str, pdf_bytes: bytes, max_pages: int) -> tuple[str, bytes, dict]:
+    """fit_pages on the local engine; without one the PDF is left as it is (picklable, for process pools)."""
+    return fit_pages(latex, pdf_bytes, max_pages, compile_pdf_local if local_compiler_available() else None)
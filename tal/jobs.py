@@ -0,0 +1,191 @@
+"""
+Background jobs.
+Analysis and resume generation run as jobs on the shared event loop instead of inside the Streamlit script
+thread. A job's ID is derived from its inputs, so a rerun, a refresh or a second tab asking for the same work
+attaches to the job already running (or its persisted result) instead of paying for the Gemini calls again.
+
+    job_id = jobs().submit("analysis", inputs, lambda job: agent.analyze_resume_async(...))
+    jobs().get(job_id)  # {"status": "running", "progress": [...], ...}, poll until it isn't
+"""
+
+import asyncio
+import base64
+import contextvars
+import json
+import threading
+import time
+
+from tal import config
+from tal.cache import content_key, open_cache
+from tal.resources import submit_to_loop
+from tal.telemetry import metrics, span
+
+JOB_VERSION = "jobs-v1"  # bump when a job kind's result shape changes
+
+_current_job = contextvars.ContextVar("tal_job", default=None)
+
+
+class Job:
+    """One unit of background work; `progress()` / `preview()` are what the UI replays while attaching."""
+
+    def __init__(self, job_id: str, kind: str, inputs: dict):
+        self.id = job_id
+        self.kind = kind
+        self.inputs = inputs
+        self.status = "running"
+        self.messages = []
+        self.latest = ""
+        self.result = None
+        self.error = None
+        self.errors = []  # recovered-from failures reported while running (see report_error)
+        self.started = time.time()
+        self.finished = None
+
+    def progress(self, message: str) -> None:
+        self.messages.append(message)
+
+    def preview(self, text: str) -> None:
+        """The partial output so far (e.g. the streamed LaTeX); only the latest is kept."""
+        self.latest = text
+
+    def snapshot(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "inputs": self.inputs,
+            "status": self.status,
+            "progress": list(self.messages),
+            "preview": self.latest,
+            "result": self.result,
+            "error": self.error,
+            "seconds": round((self.finished or time.time()) - self.started, 2),
+        }
+
+
+def report_error(message: str) -> bool:
+    """
+    The agent's on_error inside a job: the agent has swapped in a fallback result (generic analysis, error
+    resume), so the job ends failed with this message instead of persisting the fallback for every later
+    submission of the same inputs. False outside a job.
+    """
+    job = _current_job.get()
+    if job is None:
+        return False
+    job.errors.append(message)
+    return True
+
+
+def _encode(value):
+    """JSON-safe copy of a result: bytes (the PDF) become {"__bytes__": base64}."""
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if set(value) == {"__bytes__"}:
+            return base64.b64decode(value["__bytes__"])
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+class JobRunner:
+    """
+    Runs jobs on the shared background loop, at most `workers` at a time. Finished jobs are written to
+    the "jobs" cache and dropped from memory after `keep` seconds; failed ones are not persisted, so
+    submitting the same inputs again retries them.
+    """
+
+    def __init__(self, store, workers: int = 16, keep: float = 600):
+        self.store = store
+        self.keep = keep
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.workers = max(1, workers)
+        self._slots = None  # asyncio.Semaphore, created on the loop
+
+    @staticmethod
+    def job_id(kind: str, inputs: dict) -> str:
+        return content_key(JOB_VERSION, kind, json.dumps(inputs, sort_keys=True, default=str))[:32]
+
+    def submit(self, kind: str, inputs: dict, make_coro) -> str:
+        """
+        Start `make_coro(job)` unless a job with the same kind and inputs is running or already finished;
+        either way the returned ID is the one to poll.
+        """
+        job_id = self.job_id(kind, inputs)
+        with self._lock:
+            self._prune()
+            existing = self._jobs.get(job_id)
+            if existing and existing.status != "failed":
+                metrics.inc("tal_jobs_total", kind=kind, outcome="attached")
+                return job_id
+            if self.store.get(job_id) is not None:
+                metrics.inc("tal_jobs_total", kind=kind, outcome="persisted")
+                return job_id
+            job = self._jobs[job_id] = Job(job_id, kind, inputs)
+        metrics.inc("tal_jobs_total", kind=kind, outcome="started")
+        submit_to_loop(self._run(job, make_coro))
+        return job_id
+
+    async def _run(self, job: Job, make_coro) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        token = _current_job.set(job)
+        try:
+            async with self._slots:
+                with span(f"job.{job.kind}", job_id=job.id):
+                    job.result = await make_coro(job)
+            if job.errors:
+                job.status, job.error = "failed", "; ".join(job.errors)
+            else:
+                job.status = "done"
+        except Exception as e:
+            job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+        finally:
+            _current_job.reset(token)
+            job.finished = time.time()
+            if job.status == "done":
+                self.store.set(job.id, _encode(job.snapshot()))
+            metrics.observe("tal_job_seconds", job.finished - job.started, kind=job.kind, status=job.status)
+
+    def get(self, job_id: str) -> dict:
+        """The job's current state: running or recently finished in this process, else its persisted result (None if unknown)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.snapshot()
+        stored = self.store.get(job_id)
+        return _decode(stored) if stored is not None else None
+
+    def _prune(self) -> None:
+        """Forget jobs that finished more than `keep` seconds ago (their results live on in the store). Holds the lock."""
+        cutoff = time.time() - self.keep
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            running = sum(1 for j in self._jobs.values() if j.status == "running")
+            return {"running": running, "tracked": len(self._jobs)}
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def jobs() -> JobRunner:
+    """The process-wide job runner, shared by every session."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            store = open_cache("jobs", ttl=config.JOB_RESULT_TTL, max_bytes=config.JOB_RESULT_MAX_BYTES)
+            _runner = JobRunner(store, workers=config.JOB_WORKERS)
+        return _runner
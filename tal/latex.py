@@ -0,0 +1,433 @@
+"""
+LaTeX template and local compilation.
+Runs pdflatex / tectonic in a bounded pool of sandboxed subprocess workers. For pdflatex the
+fixed template preamble is dumped into a format file once, so each compile only typesets the body.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from tal import config
+
+LATEX_TEMPLATE = r"""% Jake's Resume Template - ATS Optimized
+\documentclass[letterpaper,11pt]{article}
+\usepackage{latexsym}
+\usepackage[empty]{fullpage}
+\usepackage{titlesec}
+\usepackage{marvosym}
+\usepackage[usenames,dvipsnames]{color}
+\usepackage{verbatim}
+\usepackage{enumitem}
+\usepackage{fancyhdr}
+\usepackage[english]{babel}
+\usepackage{tabularx}
+\usepackage{fontawesome5}
+\usepackage{multicol}
+\setlength{\multicolsep}{-3.0pt}
+\setlength{\columnsep}{-1pt}
+\usepackage[colorlinks=true, urlcolor=royalblue, linkcolor=royalblue]{hyperref}
+
+\pagestyle{fancy}
+\fancyhf{}
+\fancyfoot{}
+\renewcommand{\headrulewidth}{0pt}
+\renewcommand{\footrulewidth}{0pt}
+
+\addtolength{\oddsidemargin}{-0.6in}
+\addtolength{\evensidemargin}{-0.5in}
+\addtolength{\textwidth}{1.19in}
+\addtolength{\topmargin}{-.7in}
+\addtolength{\textheight}{1.4in}
+
+\urlstyle{same}
+\raggedbottom
+\raggedright
+\setlength{\tabcolsep}{0in}
+
+% Sections formatting
+\titleformat{\section}{
+  \vspace{-4pt}\scshape\raggedright\large\bfseries
+}{}{0em}{}[\color{black}\titlerule \vspace{-5pt}]
+
+\pdfgentounicode=1
+
+% Custom Bullet Size Command - Re-definable by AI
+\newcommand{\resumeBulletSize}{\small} 
+
+\newcommand{\resumeItem}[1]{
+  \item\resumeBulletSize{
+    {#1 \vspace{-2pt}}
+  }
+}
+
+\newcommand{\resumeSubheading}[4]{
+  \vspace{-2pt}\item
+    \begin{tabular*}{1.0\textwidth}[t]{l@{\extracolsep{\fill}}r}
+      \textbf{#1} & \textbf{\small #2} \\
+      \textit{\small#3} & \textit{\small #4} \\
+    \end{tabular*}\vspace{-7pt}
+}
+
+\newcommand{\resumeProjectHeading}[2]{
+    \item
+    \begin{tabular*}{1.0\textwidth}{l@{\extracolsep{\fill}}r}
+      \small#1 & \textbf{\small #2} \\
+    \end{tabular*}\vspace{-7pt}
+}
+
+\newcommand{\resumeSubItem}[1]{\resumeItem{#1}\vspace{-4pt}}
+\renewcommand\labelitemii{$\vcenter{\hbox{\tiny$\bullet$}}$}
+\newcommand{\resumeSubHeadingListStart}{\begin{itemize}[leftmargin=0.0in, label={}]}
+\newcommand{\resumeSubHeadingListEnd}{\end{itemize}}
+\newcommand{\resumeItemListStart}{\begin{itemize}}
+\newcommand{\resumeItemListEnd}{\end{itemize}\vspace{-5pt}}
+
+\begin{document}
+
+% HEADER
+\begin{center}
+    {\Huge \scshape FULL_NAME} \\ \vspace{2pt}
+    {\hypersetup{urlcolor=black} \small CONTACT_INFO}
+\end{center}
+
+% EDUCATION
+\section{Education}
+  \resumeSubHeadingListStart
+    EDUCATION_CONTENT
+  \resumeSubHeadingListEnd
+
+% EXPERIENCE
+\section{Experience}
+  \resumeSubHeadingListStart
+    EXPERIENCE_CONTENT
+  \resumeSubHeadingListEnd
+
+% PROJECTS
+\section{Projects}
+    \resumeSubHeadingListStart
+      PROJECTS_CONTENT
+    \resumeSubHeadingListEnd
+
+% SKILLS
+\section{Technical Skills}
+ \begin{itemize}[leftmargin=0.15in, label={}]
+    \small{\item{
+     SKILLS_CONTENT
+    }}
+ \end{itemize}
+
+\end{document}
+"""
+
+BEGIN_DOCUMENT = r"\begin{document}"
+FIT_MARKER = "% tal:fit"  # ends every preamble line added by the page-fit loop (tal.fit)
+
+# Lines the generator (or the page-fit loop) may add to the preamble without invalidating the format file
+_PREAMBLE_OVERRIDE = re.compile(
+    rf"^\s*(?:\\renewcommand\{{?\\resumeBulletSize\}}?.*|.*{re.escape(FIT_MARKER)}\s*)$", re.MULTILINE
+)
+_COMMENT = re.compile(r"(?<!\\)%.*$", re.MULTILINE)
+
+
+def split_preamble(latex: str) -> tuple[str, str]:
+    """Split a document into (preamble, body); body starts at \\begin{document}."""
+    idx = latex.find(BEGIN_DOCUMENT)
+    if idx == -1:
+        return latex, ""
+    return latex[:idx], latex[idx:]
+
+
+def _normalize_preamble(preamble: str) -> str:
+    return re.sub(r"\s+", " ", _COMMENT.sub("", preamble)).strip()
+
+
+# Without prlimit: sets the limits in a tiny Python process that then execs the engine
+_LIMITS_WRAPPER = (
+    "import os, resource, sys\n"
+    "for name, value in zip(('RLIMIT_CPU', 'RLIMIT_AS', 'RLIMIT_FSIZE'), map(int, sys.argv[1:4])):\n"
+    "    resource.setrlimit(getattr(resource, name), (value, value))\n"
+    "os.execvp(sys.argv[4], sys.argv[4:])\n"
+)
+
+
+def _sandboxed(cmd: list) -> list:
+    """
+    `cmd` capped on CPU time, memory and output file size. The limits are applied by an exec wrapper
+    (prlimit, or _LIMITS_WRAPPER) rather than preexec_fn, which can deadlock the child in a threaded server.
+    """
+    if os.name != "posix":
+        return cmd
+    cpu, memory, fsize = int(config.LATEX_TIMEOUT) + 5, config.LATEX_MEMORY_LIMIT, 64 * 1024 * 1024
+    prlimit = shutil.which("prlimit")
+    if prlimit:
+        return [prlimit, f"--cpu={cpu}", f"--as={memory}", f"--fsize={fsize}", "--", *cmd]
+    return [sys.executable, "-c", _LIMITS_WRAPPER, str(cpu), str(memory), str(fsize), *cmd]
+
+
+# LocalCompiler errors about the engine run rather than the document
+_RUN_FAILURES = ("timed out after", "failed to start", "no local LaTeX engine")
+
+
+def is_document_error(error: str) -> bool:
+    """Whether a LocalCompiler error came from the TeX source (and so will come again for the same source)."""
+    return bool(error) and not any(marker in error for marker in _RUN_FAILURES)
+
+
+def _first_error(log: str) -> str:
+    """Pull the first '! ...' error line out of a TeX log."""
+    for line in log.splitlines():
+        if line.startswith("!"):
+            return line[1:].strip()
+    return log.strip().splitlines()[-1] if log.strip() else "unknown error"
+
+
+class LocalCompiler:
+    """
+    Bounded pool of LaTeX workers.
+    `compile()` blocks the caller but never runs more than `workers` engines at once.
+    """
+
+    def __init__(self, preamble: str, engine: str = None, workers: int = None, timeout: float = None):
+        self.engine = engine or self.detect_engine()
+        self.timeout = timeout or config.LATEX_TIMEOUT
+        self.preamble = preamble
+        self._preamble_norm = _normalize_preamble(preamble)
+        self._pool = ThreadPoolExecutor(max_workers=workers or config.LATEX_WORKERS, thread_name_prefix="latex")
+        self._fmt_path = None
+        self._fmt_future = None
+        if self.engine == "pdflatex":
+            # Warm-up: build the format file in the background so the first user doesn't wait for it
+            self._fmt_future = self._pool.submit(self._build_format)
+
+    @staticmethod
+    def detect_engine() -> str:
+        if config.LATEX_ENGINE != "auto":
+            return config.LATEX_ENGINE if shutil.which(config.LATEX_ENGINE) else None
+        for engine in ("pdflatex", "tectonic"):
+            if shutil.which(engine):
+                return engine
+        return None
+
+    @property
+    def available(self) -> bool:
+        return self.engine is not None
+
+    def submit(self, latex: str) -> Future:
+        """Queue a compile; the future resolves to (pdf_bytes, error)."""
+        return self._pool.submit(self._compile, latex)
+
+    def compile(self, latex: str) -> tuple[bytes, str]:
+        if not self.available:
+            return None, "no local LaTeX engine installed"
+        return self.submit(latex).result()
+
+    # ─── Workers ───
+
+    def _compile(self, latex: str) -> tuple[bytes, str]:
+        if self.engine == "tectonic":
+            return self._run_tectonic(latex)
+
+        fmt = self._format_path()
+        if fmt:
+            preamble, body = split_preamble(latex)
+            overrides = "\n".join(m.group(0).strip() for m in _PREAMBLE_OVERRIDE.finditer(preamble))
+            if body and _normalize_preamble(_PREAMBLE_OVERRIDE.sub("", preamble)) == self._preamble_norm:
+                pdf, error = self._run_pdflatex(f"{overrides}\n{body}", fmt=fmt)
+                if pdf:
+                    return pdf, None
+        # Custom preamble (or the format path failed): typeset the full source
+        return self._run_pdflatex(latex)
+
+    def _run(self, cmd: list, workdir: str) -> subprocess.CompletedProcess:
+        env = {
+            "PATH": os.environ.get("PATH", ""),
+            "HOME": workdir,
+            # Paranoid kpathsea mode: no reads/writes outside the scratch dir, no dotfiles
+            "openin_any": "p",
+            "openout_any": "p",
+            "shell_escape": "f",
+        }
+        return subprocess.run(
+            _sandboxed(cmd),
+            cwd=workdir,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            timeout=self.timeout,
+            start_new_session=True,
+        )
+
+    def _run_pdflatex(self, source: str, fmt: str = None) -> tuple[bytes, str]:
+        with tempfile.TemporaryDirectory(prefix="tal-tex-") as workdir:
+            with open(os.path.join(workdir, "main.tex"), "w", encoding="utf-8") as f:
+                f.write(source)
+            cmd = ["pdflatex", "-interaction=nonstopmode", "-halt-on-error", "-no-shell-escape"]
+            if fmt:
+                shutil.copy(fmt, os.path.join(workdir, "tal.fmt"))
+                cmd.append("-fmt=tal")
+            cmd.append("main.tex")
+            return self._collect(cmd, workdir)
+
+    def _run_tectonic(self, source: str) -> tuple[bytes, str]:
+        with tempfile.TemporaryDirectory(prefix="tal-tex-") as workdir:
+            with open(os.path.join(workdir, "main.tex"), "w", encoding="utf-8") as f:
+                f.write(source)
+            return self._collect(["tectonic", "--untrusted", "--outdir", workdir, "main.tex"], workdir)
+
+    def _collect(self, cmd: list, workdir: str) -> tuple[bytes, str]:
+        try:
+            proc = self._run(cmd, workdir)
+        except subprocess.TimeoutExpired:
+            return None, f"{self.engine} timed out after {self.timeout:.0f}s"
+        except OSError as e:
+            return None, f"{self.engine} failed to start: {e}"
+
+        pdf_path = os.path.join(workdir, "main.pdf")
+        if proc.returncode == 0 and os.path.exists(pdf_path):
+            with open(pdf_path, "rb") as f:
+                return f.read(), None
+        log_path = os.path.join(workdir, "main.log")
+        log = ""
+        if os.path.exists(log_path):
+            with open(log_path, encoding="utf-8", errors="replace") as f:
+                log = f.read()
+        return None, _first_error(log or proc.stdout.decode("utf-8", "replace") + proc.stderr.decode("utf-8", "replace"))
+
+    # ─── Preloaded format ───
+
+    def _format_path(self) -> str:
+        if self._fmt_future is not None:
+            try:
+                self._fmt_future.result()
+            except Exception:
+                pass
+        return self._fmt_path
+
+    def _build_format(self) -> None:
+        """Dump the template preamble into a .fmt file, keyed by preamble + engine version."""
+        try:
+            version = subprocess.run(["pdflatex", "--version"], capture_output=True, timeout=10).stdout
+        except (OSError, subprocess.TimeoutExpired):
+            return
+        digest = hashlib.sha256(self.preamble.encode("utf-8") + version).hexdigest()[:16]
+        fmt_dir = os.path.abspath(os.path.join(config.CACHE_DIR, "latex"))
+        fmt_path = os.path.join(fmt_dir, f"tal-{digest}.fmt")
+        if os.path.exists(fmt_path):
+            self._fmt_path = fmt_path
+            return
+
+        os.makedirs(fmt_dir, exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix="tal-fmt-") as workdir:
+            with open(os.path.join(workdir, "tal.tex"), "w", encoding="utf-8") as f:
+                f.write(self.preamble + "\n\\dump\n")
+            try:
+                proc = self._run(
+                    ["pdflatex", "-ini", "-interaction=nonstopmode", "-jobname=tal", "&pdflatex", "tal.tex"],
+                    workdir,
+                )
+            except (OSError, subprocess.TimeoutExpired):
+                return
+            built = os.path.join(workdir, "tal.fmt")
+            if proc.returncode == 0 and os.path.exists(built):
+                # Atomic publish so concurrent processes never load a half-written format
+                tmp_path = f"{fmt_path}.{os.getpid()}.tmp"
+                shutil.copy(built, tmp_path)
+                os.replace(tmp_path, fmt_path)
+                self._fmt_path = fmt_path
+
+
+# ─────────────────────────────────────────────────────────────
+# STREAMED GENERATION
+# ─────────────────────────────────────────────────────────────
+
+class LatexStreamAborted(Exception):
+    """The streamed document broke a structural rule; the rest of the stream isn't worth paying for."""
+
+
+class LatexStream:
+    """
+    Incremental cleanup + validation of a LaTeX document arriving in chunks.
+    Strips ``` fences as they appear, exposes the clean document so far as `text`,
+    sets `done` once \\end{document} arrives, and raises LatexStreamAborted on a violation.
+    """
+
+    MAX_PREAMBLE = 12000
+    MAX_DOCUMENT = 60000
+
+    _OPENING_FENCE = re.compile(r"```[a-zA-Z]*[ \t]*\n")
+    _LEADING_COMMENTS = re.compile(r"\A(?:\s*%[^\n]*\n)*\s*")
+
+    def __init__(self):
+        self._raw = ""
+        self.text = ""
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk; returns the newly available clean text."""
+        if self.done or not chunk:
+            return ""
+        self._raw += chunk
+
+        body = self._raw.lstrip()
+        if body.startswith("`"):
+            fence = self._OPENING_FENCE.match(body)
+            if not fence:
+                return ""  # opening fence not complete yet
+            body = body[fence.end():]
+
+        closing = body.find("\n```")
+        if closing != -1:
+            body = body[:closing]
+            self.done = True
+        else:
+            # Hold back a tail that may turn into a closing fence
+            for tail in ("\n``", "\n`", "\n"):
+                if body.endswith(tail):
+                    body = body[: -len(tail)]
+                    break
+
+        end = body.find("\\end{document}")
+        if end != -1:
+            body = body[: end + len("\\end{document}")]
+            self.done = True
+
+        self._validate(body)
+        delta = body[len(self.text):]
+        self.text = body
+        return delta
+
+    def _validate(self, body: str) -> None:
+        head = self._LEADING_COMMENTS.sub("", body, count=1)
+        if len(head) >= len("\\documentclass") and not head.startswith("%"):
+            if not head.startswith("\\documentclass"):
+                raise LatexStreamAborted("output does not start with \\documentclass")
+        if body.count(BEGIN_DOCUMENT) > 1:
+            raise LatexStreamAborted("more than one \\begin{document}")
+        if BEGIN_DOCUMENT not in body and len(body) > self.MAX_PREAMBLE:
+            raise LatexStreamAborted("preamble is runaway long")
+        if len(body) > self.MAX_DOCUMENT:
+            raise LatexStreamAborted("document is runaway long")
+
+
+# ─────────────────────────────────────────────────────────────
+# PROCESS-WIDE INSTANCE
+# ─────────────────────────────────────────────────────────────
+
+_compiler = None
+_compiler_lock = threading.Lock()
+
+
+def get_local_compiler(template: str = LATEX_TEMPLATE) -> LocalCompiler:
+    """Shared compiler whose format file is built from the template's preamble."""
+    global _compiler
+    with _compiler_lock:
+        if _compiler is None:
+            _compiler = LocalCompiler(split_preamble(template)[0])
+        return _compiler
@@ -0,0 +1,121 @@
+"""
+Resume parts for incremental generation.
+In structured mode the resume is generated as independent parts (profile, experience, projects, skills,
+extra sections). Each part is keyed by a hash of exactly the inputs it depends on (its resume sections,
+the analysis fields it reads, the JD, links, a refinement note), so after a tweak only the parts whose
+inputs changed go back to Gemini; the rest come from the section cache.
+"""
+
+import json
+import re
+
+from tal import config
+from tal.cache import content_key, normalize_text
+from tal.sections import compact_jd, compact_resume, split_text_sections
+
+# types: resume section types fed to the part; fields: keys of the resume JSON it produces;
+# plan: analysis / content-plan fields it reads; jd / links: whether the JD / link list are inputs
+PARTS = {
+    "profile": {
+        "types": ("header", "education"),
+        "fields": ("name", "contact", "education"),
+        "plan": (),
+        "jd": False,
+        "links": True,
+    },
+    "experience": {
+        "types": ("experience",),
+        "fields": ("experience",),
+        "plan": ("bullet_guidelines", "role_translation_strategy", "irrelevant_skills"),
+        "jd": True,
+        "links": False,
+    },
+    "projects": {
+        "types": ("projects",),
+        "fields": ("projects",),
+        "plan": ("top_projects", "bullet_guidelines", "role_translation_strategy", "irrelevant_skills"),
+        "jd": True,
+        "links": True,
+    },
+    "skills": {
+        "types": ("skills",),
+        "fields": ("skills",),
+        "plan": ("role_translation_strategy", "irrelevant_skills"),
+        "jd": True,
+        "links": False,
+    },
+    "extra": {
+        "types": ("other",),
+        "fields": ("extra_sections",),
+        "plan": ("keep_sections", "drop_sections", "bullet_guidelines"),
+        "jd": True,
+        "links": False,
+    },
+}
+
+
+def plan_value(analysis: dict, field: str):
+    """A content-plan field, falling back to the top level of the analysis (strategy, irrelevant skills)."""
+    plan = analysis.get("content_plan") or {}
+    return plan[field] if field in plan else analysis.get(field)
+
+
+def _title_key(title) -> str:
+    return re.sub(r"\s+", " ", str(title).strip(" :|-–—•").lower())
+
+
+def _dropped(name: str, own: list, analysis: dict) -> bool:
+    """
+    Whether the content plan drops a part: it names the part itself, or the title of every section the part
+    draws on. Titles are compared whole, so dropping "Volunteer Experience" leaves the experience part alone.
+    """
+    if name not in ("experience", "projects", "skills"):
+        return False
+    dropped = {_title_key(s) for s in plan_value(analysis, "drop_sections") or []}
+    return name in dropped or (bool(own) and all(_title_key(s["title"]) in dropped for s in own))
+
+
+def plan_parts(
+    resume_text: str, jd_text: str, analysis: dict, links: list, sections: list = None, notes: dict = None,
+    version: str = "",
+) -> list:
+    """
+    The parts to generate, each {"name", "fields", "inputs", "key"}. Parts with no matching resume
+    section, or dropped by the content plan, are left out (profile always stays).
+    `version` (model + prompt version) goes into every key, so prompt changes invalidate cached parts.
+    """
+    sections = sections if sections is not None else split_text_sections(resume_text)
+    typed = {s["type"] for s in sections} - {"header"}
+    jd = compact_jd(jd_text, config.LATEX_JD_TOKENS)
+    notes = notes or {}
+    parts = []
+    for name, spec in PARTS.items():
+        own = [s for s in sections if s["type"] in spec["types"]]
+        if name != "profile" and (_dropped(name, own, analysis) or (typed and not own)):
+            continue
+        # Unparsed resume (no typed sections): every part reads the whole document
+        resume = compact_resume(resume_text, config.LATEX_RESUME_TOKENS, "latex", own if typed else sections)
+        inputs = {
+            "resume": resume,
+            "plan": {field: plan_value(analysis, field) for field in spec["plan"]},
+            "jd": jd if spec["jd"] else None,
+            "links": [str(l) for l in links if isinstance(l, str)] if spec["links"] else None,
+            "note": notes.get(name),
+        }
+        parts.append({"name": name, "fields": spec["fields"], "inputs": inputs, "key": part_key(name, inputs, version)})
+    return parts
+
+
+def part_key(name: str, inputs: dict, version: str = "") -> str:
+    normalized = {**inputs, "resume": normalize_text(inputs["resume"]), "jd": normalize_text(inputs["jd"] or "")}
+    return content_key(version, name, json.dumps(normalized, sort_keys=True, default=str))
+
+
+def merge_parts(results: dict) -> dict:
+    """One resume dict (tal.render's input) from the per-part results, keeping only each part's own fields."""
+    resume = {}
+    for name, data in results.items():
+        for field in PARTS[name]["fields"]:
+            if data.get(field):
+                resume[field] = data[field]
+    return resume
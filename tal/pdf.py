@@ -0,0 +1,108 @@
+"""
+PDF text extraction.
+Kept free of Streamlit and Gemini so it can run in worker processes.
+
+Extraction is single-process on purpose. A page-parallel path (page ranges over a process pool, for documents
+of 24+ pages) was measured with benchmarks/extract_pdf.py and dropped: resumes are 1-2 pages and never
+reached it, and on a 40-page synthetic document it took 203 ms against 145 ms sequential (measured on one
+CPU). The batch runner already parallelizes across documents.
+"""
+
+import re
+
+import fitz  # PyMuPDF
+
+from tal.sections import build_sections
+
+# One scan for every kind of link we care about: full URLs plus bare github / linkedin shorthands
+_LINK_PATTERN = re.compile(
+    r"https?://[^\s)}\],]+"
+    r"|(?<![\w./])(?:www\.)?(?:github\.com/|linkedin\.com/in/)[^\s)}\],]+",
+    re.IGNORECASE,
+)
+_TRAILING_PUNCTUATION = ".;:'\""
+
+
+def normalize_link(link: str) -> str:
+    """Trim sentence punctuation and add https:// to scheme-less shorthands."""
+    link = link.rstrip(_TRAILING_PUNCTUATION)
+    if not link.lower().startswith(("http://", "https://")):
+        link = f"https://{link}"
+    return link
+
+
+def _dedupe_links(links) -> list:
+    """Normalize and dedupe; trailing slashes and scheme/host case don't make a link distinct."""
+    seen = {}
+    for link in links:
+        link = normalize_link(link)
+        key = link.rstrip("/").lower()
+        seen.setdefault(key, link)
+    return sorted(seen.values())
+
+
+def _page_lines(page_dict: dict) -> tuple[str, list]:
+    """Plain text (identical to page.get_text()) plus (text, size, bold) per line, from one "dict" extraction."""
+    text_parts, lines = [], []
+    for block in page_dict["blocks"]:
+        if block["type"] != 0:
+            continue
+        for line in block["lines"]:
+            spans = line["spans"]
+            line_text = "".join(span["text"] for span in spans)
+            text_parts.append(line_text + "\n")
+            visible = [span for span in spans if span["text"].strip()]
+            if visible:
+                size = max(span["size"] for span in visible)
+                bold = all(span["flags"] & fitz.TEXT_FONT_BOLD or "Bold" in span["font"] for span in visible)
+                lines.append((line_text.strip(), round(size, 1), bool(bold)))
+    return "".join(text_parts), lines
+
+
+def _extract_pages(doc, start: int, stop: int) -> tuple[list, list, list]:
+    texts, links, lines = [], [], []
+    # Iterating doc.pages() is measurably cheaper than doc[i] lookups
+    for page in doc.pages(start, stop):
+        # One layout pass gives both the text and the font data the section parser needs
+        page_text, page_lines = _page_lines(page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT))
+        texts.append(page_text)
+        lines.extend(page_lines)
+        links.extend(link["uri"] for link in page.get_links() if "uri" in link)
+    return texts, links, lines
+
+
+def _extract(doc) -> dict:
+    page_count = len(doc)
+    texts, links, lines = _extract_pages(doc, 0, page_count)
+
+    text = "\n".join(texts)
+    # Text links cover URLs that aren't hyperlinked in the PDF
+    links.extend(_LINK_PATTERN.findall(text))
+    return {
+        "text": text.strip(),
+        "pages": page_count,
+        "links": _dedupe_links(links),
+        "sections": build_sections(lines),
+    }
+
+
+def extract_pdf_data(file) -> dict:
+    """
+    Extract text, page count, hyperlinks and typed sections from PDF using PyMuPDF (fitz).
+    Raises on unreadable input.
+    In-memory uploads are opened straight from their buffer, without copying the bytes.
+    """
+    file.seek(0)
+    data = file.getbuffer() if hasattr(file, "getbuffer") else file.read()
+    try:
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            return _extract(doc)
+    finally:
+        if isinstance(data, memoryview):
+            data.release()
+
+
+def extract_pdf_path(path: str) -> dict:
+    """extract_pdf_data for a file on disk (picklable entry point for process pools)."""
+    with fitz.open(path) as doc:
+        return _extract(doc)
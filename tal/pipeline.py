@@ -0,0 +1,169 @@
+"""
+Async pipeline.
+Runs independent stages concurrently so a session costs its critical path, not the sum of stages:
+    extract -> analyze -> (generate LaTeX -> compile) || (company research + cold DM)
+fan_out() runs that flow for one resume against many JDs at once.
+"""
+
+import asyncio
+import contextvars
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from tal import config
+from tal.cache import content_key, normalize_text
+from tal.telemetry import annotate, span
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+
+
+def prefetch(fn, *args, **kwargs) -> Future:
+    """Start blocking work (e.g. PDF extraction) in the background; collect it later with .result()."""
+    # Run in a copy of the caller's context so telemetry spans land in the caller's trace
+    return _prefetch_pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+async def build_resume(
+    agent,
+    resume_text: str,
+    jd_text: str,
+    analysis: dict,
+    links: list,
+    max_pages: int = 1,
+    draft_dm: bool = True,
+    on_progress=None,
+    on_chunk=None,
+    sections: list = None,
+    notes: dict = None,
+) -> dict:
+    """
+    Generate and compile the resume while the cold DM (with its company research) is drafted alongside.
+    Passing `on_chunk` streams the LaTeX generation and reports the document as it grows.
+    `sections` (from extraction) lets the prompts be packed by section instead of re-split from text.
+    `notes` ({part: instruction}) refines single resume parts; unchanged parts come from the section cache.
+    """
+
+    def progress(message: str):
+        if on_progress:
+            on_progress(message)
+
+    async def resume_path():
+        progress("applying strategy...")
+        if on_chunk:
+            latex = await agent.generate_latex_content_stream_async(
+                resume_text, jd_text, analysis, links=links, max_pages=max_pages, on_chunk=on_chunk,
+                sections=sections, notes=notes,
+            )
+        else:
+            latex = await agent.generate_latex_content_async(
+                resume_text, jd_text, analysis, links=links, max_pages=max_pages, sections=sections, notes=notes
+            )
+        progress("compiling pdf...")
+        pdf_bytes, error = await asyncio.to_thread(agent.compile_pdf, latex)
+        latex, pdf_bytes, fit = await asyncio.to_thread(agent.fit_pages, latex, pdf_bytes, max_pages)
+        if fit["compiles"]:
+            progress(f"fitted to {fit['pages']} page(s) in {fit['compiles']} recompile(s)")
+        return latex, pdf_bytes, error, fit
+
+    async def dm_path():
+        if not draft_dm:
+            return ""
+        company_name = analysis.get("company_name", "the company")
+        return await agent.generate_cold_dm_async(resume_text, jd_text, company_name, analysis=analysis, sections=sections)
+
+    (latex, pdf_bytes, error, fit), cold_dm = await asyncio.gather(resume_path(), dm_path())
+    return {
+        "latex_content": latex,
+        "pdf_bytes": pdf_bytes,
+        "compile_error": error,
+        "page_fit": fit,
+        "cold_dm": cold_dm,
+    }
+
+
+async def run_session(agent, resume_file, jd_text: str, draft_dm: bool = True, on_progress=None) -> dict:
+    """Whole flow for one resume x JD pair, without any UI."""
+    data = await asyncio.to_thread(agent.extract_pdf_data, resume_file)
+    analysis = await agent.analyze_resume_async(data["text"], jd_text, sections=data["sections"])
+    result = await build_resume(
+        agent,
+        data["text"],
+        jd_text,
+        analysis,
+        links=data["links"],
+        max_pages=data["pages"],
+        draft_dm=draft_dm,
+        on_progress=on_progress,
+        sections=data["sections"],
+    )
+    return {"resume": data, "analysis": analysis, **result}
+
+
+# ─────────────────────────────────────────────────────────────
+# MULTI-JD FAN-OUT
+# ─────────────────────────────────────────────────────────────
+
+_JD_SEPARATOR = re.compile(r"^\s*-{3,}\s*$", re.MULTILINE)
+
+
+def split_jds(text: str) -> list:
+    """JDs pasted into one box, separated by lines of three or more dashes."""
+    return [jd.strip() for jd in _JD_SEPARATOR.split(text or "") if jd.strip()]
+
+
+async def fan_out(
+    agent,
+    data: dict,
+    jd_texts: list,
+    concurrency: int = None,
+    draft_dm: bool = True,
+    on_result=None,
+) -> list:
+    """
+    One parsed resume (extract_pdf_data output) against many JDs: analysis, resume and compile per JD with
+    bounded concurrency, so N roles cost about the slowest few rather than the sum. Identical JDs run once;
+    each role gets its own cold DM, while the company research behind it is shared through company profiles. on_result(index, result) fires as
+    each role finishes; the return value lists the results in JD order.
+    """
+    semaphore = asyncio.Semaphore(concurrency or config.FANOUT_CONCURRENCY)
+    roles = {}  # normalized JD -> task
+
+    async def role(jd_text: str) -> dict:
+        async with semaphore:
+            started = time.monotonic()
+            analysis = await agent.analyze_resume_async(data["text"], jd_text, sections=data["sections"])
+            dm = asyncio.ensure_future(agent.generate_cold_dm_async(
+                data["text"], jd_text, analysis.get("company_name", "the company"), analysis=analysis, sections=data["sections"]
+            )) if draft_dm else None
+            try:
+                result = await build_resume(
+                    agent, data["text"], jd_text, analysis,
+                    links=data["links"], max_pages=data["pages"], draft_dm=False, sections=data["sections"],
+                )
+                result["cold_dm"] = await dm if dm else ""
+            except BaseException:
+                if dm:  # don't leave the DM running, or its exception unretrieved
+                    dm.cancel()
+                    await asyncio.gather(dm, return_exceptions=True)
+                raise
+            return {"analysis": analysis, **result, "seconds": round(time.monotonic() - started, 2)}
+
+    async def run(index: int, jd_text: str) -> dict:
+        key = content_key(normalize_text(jd_text))
+        shared = key in roles
+        if not shared:
+            roles[key] = asyncio.ensure_future(role(jd_text))
+        with span("fan_out.role", index=index, shared=shared):
+            try:
+                result = {**await roles[key], "status": "done"}
+            except Exception as e:
+                annotate(error=str(e))
+                result = {"status": "failed", "error": str(e)}
+        result["index"] = index
+        if on_result:
+            on_result(index, result)
+        return result
+
+    with span("fan_out", roles=len(jd_texts)):
+        return list(await asyncio.gather(*(run(i, jd) for i, jd in enumerate(jd_texts))))
@@ -0,0 +1,94 @@
+"""
+Rasterized PDF previews.
+Instead of shipping the PDF to the browser to be rendered client-side on every rerun, pages are rendered
+server-side with PyMuPDF into compressed images, cached by PDF hash + DPI + format, and only those images are
+sent. A low-DPI placeholder is cheap enough to render inline while the full-resolution pages are produced.
+"""
+
+import io
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from tal import config
+from tal.artifacts import open_artifact_store
+from tal.telemetry import annotate, traced
+
+FORMATS = ("webp", "png")
+
+_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="preview")
+_inflight = {}  # preview key -> Future
+_inflight_lock = threading.Lock()
+
+
+def preview_store():
+    return open_artifact_store("previews", max_bytes=config.PREVIEW_CACHE_MAX_BYTES)
+
+
+def _encode(pixmap, fmt: str) -> bytes:
+    """WebP through Pillow (Streamlit already depends on it); PNG straight from PyMuPDF otherwise."""
+    if fmt == "webp":
+        try:
+            from PIL import Image
+        except ImportError:
+            return pixmap.tobytes("png")
+        image = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+        out = io.BytesIO()
+        image.save(out, format="WEBP", quality=config.PREVIEW_QUALITY, method=4)
+        return out.getvalue()
+    return pixmap.tobytes("png")
+
+
+@traced("preview.rasterize")
+def rasterize(pdf_bytes: bytes, dpi: int, fmt: str = "png") -> list:
+    """Every page as an encoded image at `dpi`."""
+    import fitz  # PyMuPDF
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        pages = [_encode(page.get_pixmap(dpi=dpi, alpha=False), fmt) for page in doc]
+    annotate(pages=len(pages), dpi=dpi, format=fmt, bytes=sum(len(p) for p in pages))
+    return pages
+
+
+def _key(pdf_bytes: bytes, dpi: int, fmt: str) -> str:
+    return preview_store().key(f"{preview_store().key(pdf_bytes)}:{dpi}:{fmt}")
+
+
+def cached_pages(pdf_bytes: bytes, dpi: int, fmt: str) -> list:
+    """The cached page images, or None if this PDF hasn't been rendered at this DPI / format yet."""
+    store = preview_store()
+    key = _key(pdf_bytes, dpi, fmt)
+    count = store.get(key)
+    if count is None:
+        return None
+    pages = [store.get(f"{key}-{i}") for i in range(int(count))]
+    return None if any(p is None for p in pages) else pages  # a page was evicted: render again
+
+
+def render_pages(pdf_bytes: bytes, dpi: int, fmt: str) -> list:
+    """cached_pages(), rendering and caching them on a miss."""
+    pages = cached_pages(pdf_bytes, dpi, fmt)
+    if pages is not None:
+        return pages
+    pages = rasterize(pdf_bytes, dpi, fmt)
+    store, key = preview_store(), _key(pdf_bytes, dpi, fmt)
+    for i, page in enumerate(pages):
+        store.put(f"{key}-{i}", page)
+    store.put(key, str(len(pages)).encode())  # written last: a count means every page is there
+    return pages
+
+
+def request_pages(pdf_bytes: bytes, dpi: int = None, fmt: str = None) -> Future:
+    """Render in the background (e.g. right after compiling); concurrent requests for one preview share the work."""
+    dpi, fmt = dpi or config.PREVIEW_DPI, fmt if fmt in FORMATS else config.PREVIEW_FORMAT
+    key = _key(pdf_bytes, dpi, fmt)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is None:
+            future = _inflight[key] = _pool.submit(render_pages, pdf_bytes, dpi, fmt)
+            future.add_done_callback(lambda _: _inflight.pop(key, None))
+        return future
+
+
+def placeholder_pages(pdf_bytes: bytes) -> list:
+    """Low-DPI renders to show while the full-resolution ones are produced (a few ms for a resume)."""
+    return render_pages(pdf_bytes, config.PREVIEW_PLACEHOLDER_DPI, "png")
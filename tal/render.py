@@ -0,0 +1,173 @@
+"""
+Structured resume -> LaTeX.
+In structured mode the generator returns JSON (name, contact, education, experience, projects, skills)
+and the document is assembled here from LATEX_TEMPLATE, so the model never writes the preamble or macros
+and user text is always escaped.
+"""
+
+import re
+
+from tal.latex import LATEX_TEMPLATE
+
+# The JSON the generator is asked for, field by field (also the prompt's schema description)
+RESUME_FIELDS = {
+    "name": '"Full Name"',
+    "contact": '[{"kind": "email / phone / linkedin / github / portfolio / location / other", "text": "shown text", "url": "link or empty"}]',
+    "education": '[{"institution": "", "location": "", "degree": "degree, with grades exactly as in the input", "dates": ""}]',
+    "experience": '[{"title": "", "company": "", "location": "", "dates": "", "bullets": ["..."]}]',
+    "projects": '[{"name": "", "tech": "comma separated stack", "url": "link or empty", "dates": "", "bullets": ["..."]}]',
+    "extra_sections": '[{"title": "e.g. Achievements", "bullets": ["..."]}]',
+    "skills": '[{"category": "Languages", "items": "Python, Go"}]',
+}
+
+
+def resume_schema(fields=RESUME_FIELDS) -> str:
+    return "{\n" + ",\n".join(f'    "{name}": {RESUME_FIELDS[name]}' for name in fields) + "\n}"
+
+
+_ICONS = {
+    "email": r"\faEnvelope",
+    "phone": r"\faPhone",
+    "linkedin": r"\faLinkedin",
+    "github": r"\faGithub",
+    "portfolio": r"\faGlobe",
+    "website": r"\faGlobe",
+    "location": r"\faMapMarker*",
+}
+_SPECIALS = {
+    "\\": r"\textbackslash{}",
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "{": r"\{",
+    "}": r"\}",
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+}
+_SPECIAL = re.compile("|".join(re.escape(c) for c in _SPECIALS))
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_URL_SCHEME = re.compile(r"^(https?://|mailto:|tel:)", re.IGNORECASE)
+# Inside an \href that sits in another macro's argument, % and # take hyperref's escapes; braces, ~, ^ and
+# spaces would change the TeX meaning, so they are percent-encoded (the URL means the same) - with the %
+# escaped in turn
+_URL_ESCAPES = {"%": r"\%", "#": r"\#", "{": r"\%7B", "}": r"\%7D", "~": r"\%7E", "^": r"\%5E", " ": r"\%20"}
+
+# "% EDUCATION\n\section{Education}..." up to the next commented block or \end{document}
+_SECTION_BLOCK = r"% {tag}\n.*?(?=\n% [A-Z]+\n|\n\\end\{{document\}})"
+
+
+def escape_latex(text) -> str:
+    """Escape LaTeX specials; **text** (the only markup the generator may use) becomes \\textbf{text}."""
+    escaped = _SPECIAL.sub(lambda m: _SPECIALS[m.group(0)], str(text or "").strip())
+    return _BOLD.sub(r"\\textbf{\1}", escaped)
+
+
+def _url(url: str, kind: str = "") -> str:
+    url = str(url or "").strip()
+    if not url:
+        return ""
+    if not _URL_SCHEME.match(url):
+        url = f"mailto:{url}" if kind == "email" else f"tel:{url.replace(' ', '')}" if kind == "phone" else f"https://{url}"
+    return "".join(_URL_ESCAPES.get(ch, ch) for ch in url.replace("\\", ""))
+
+
+def _link(url: str, display: str, kind: str = "") -> str:
+    href = _url(url, kind)
+    return rf"\href{{{href}}}{{{display}}}" if href else display
+
+
+def _contact(items: list) -> str:
+    parts = []
+    for item in items or []:
+        kind = str(item.get("kind", "")).lower().strip()
+        text = escape_latex(item.get("text") or item.get("url"))
+        if not text:
+            continue
+        icon = _ICONS.get(kind)
+        display = f"{icon} {text}" if icon else text
+        url = item.get("url") or (item.get("text") if kind in ("email", "phone") else "")
+        parts.append(_link(url, display, kind))
+    return " $|$ ".join(parts)
+
+
+def _bullets(bullets: list, indent: str = "        ") -> str:
+    items = [escape_latex(b) for b in bullets or [] if str(b or "").strip()]
+    if not items:
+        return ""
+    lines = [f"{indent}\\resumeItemListStart"]
+    lines += [f"{indent}  \\resumeItem{{{b}}}" for b in items]
+    lines.append(f"{indent}\\resumeItemListEnd")
+    return "\n" + "\n".join(lines)
+
+
+def _education(entries: list) -> str:
+    return "\n    ".join(
+        rf"\resumeSubheading{{{escape_latex(e.get('institution'))}}}{{{escape_latex(e.get('location'))}}}"
+        rf"{{{escape_latex(e.get('degree'))}}}{{{escape_latex(e.get('dates'))}}}"
+        for e in entries or []
+    )
+
+
+def _experience(entries: list) -> str:
+    return "\n    ".join(
+        rf"\resumeSubheading{{{escape_latex(e.get('title'))}}}{{{escape_latex(e.get('dates'))}}}"
+        rf"{{{escape_latex(e.get('company'))}}}{{{escape_latex(e.get('location'))}}}" + _bullets(e.get("bullets"))
+        for e in entries or []
+    )
+
+
+def _projects(entries: list) -> str:
+    rendered = []
+    for p in entries or []:
+        title = _link(p.get("url"), rf"\textbf{{{escape_latex(p.get('name'))}}}")
+        tech = escape_latex(p.get("tech"))
+        heading = rf"{title} $|$ \emph{{{tech}}}" if tech else title
+        rendered.append(rf"\resumeProjectHeading{{{heading}}}{{{escape_latex(p.get('dates'))}}}" + _bullets(p.get("bullets")))
+    return "\n      ".join(rendered)
+
+
+def _skills(groups: list) -> str:
+    lines = []
+    for g in groups or []:
+        items = escape_latex(g.get("items") if isinstance(g.get("items"), str) else ", ".join(g.get("items") or []))
+        if items:
+            lines.append(rf"\textbf{{{escape_latex(g.get('category'))}}}{{: {items}}}")
+    return " \\\\\n     ".join(lines)
+
+
+def _extra_sections(sections: list) -> str:
+    blocks = []
+    for s in sections or []:
+        bullets = [escape_latex(b) for b in s.get("bullets") or [] if str(b or "").strip()]
+        if not bullets:
+            continue
+        items = "\n".join(rf"    \resumeItem{{{b}}}" for b in bullets)
+        blocks.append(
+            f"% EXTRA\n\\section{{{escape_latex(s.get('title'))}}}\n"
+            f"  \\resumeItemListStart\n{items}\n  \\resumeItemListEnd\n"
+        )
+    return "\n".join(blocks)
+
+
+def render_resume(resume: dict) -> str:
+    """A complete document: LATEX_TEMPLATE with every placeholder filled and empty sections removed."""
+    content = {
+        "EDUCATION": _education(resume.get("education")),
+        "EXPERIENCE": _experience(resume.get("experience")),
+        "PROJECTS": _projects(resume.get("projects")),
+        "SKILLS": _skills(resume.get("skills")),
+    }
+    latex = LATEX_TEMPLATE
+    for tag, body in content.items():
+        if body:
+            latex = latex.replace(f"{tag}_CONTENT", body, 1)
+        else:
+            latex = re.sub(_SECTION_BLOCK.format(tag=tag), "", latex, count=1, flags=re.DOTALL)
+    extra = _extra_sections(resume.get("extra_sections"))
+    if extra:
+        anchor = "% SKILLS\n" if "% SKILLS\n" in latex else "\\end{document}"
+        latex = latex.replace(anchor, f"{extra}\n{anchor}", 1)
+    latex = latex.replace("FULL_NAME", escape_latex(resume.get("name")) or "Your Name", 1)
+    return latex.replace("CONTACT_INFO", _contact(resume.get("contact")), 1)
@@ -0,0 +1,65 @@
+"""
+Process-wide resources.
+The Gemini client and the event loop its async calls run on are created once per process and shared by
+every session / rerun; google.genai is only imported when the first client is actually needed.
+"""
+
+import asyncio
+import queue
+import threading
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_genai_client(api_key: str):
+    """Shared genai.Client per API key (its HTTP connection pools are reused across calls)."""
+    with _clients_lock:
+        if api_key not in _clients:
+            from google import genai
+
+            _clients[api_key] = genai.Client(api_key=api_key)
+        return _clients[api_key]
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="tal-loop", daemon=True).start()
+        return _loop
+
+
+def submit_to_loop(coro):
+    """Schedule a coroutine on the shared background loop without waiting for it (a concurrent.futures.Future)."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+def run_in_loop(make_coro):
+    """
+    Run a coroutine on the shared background loop and block until it is done.
+    The shared client's async connections are bound to one loop, so long-lived processes (the app) must not
+    use a fresh asyncio.run() per call. `make_coro(relay)` builds the coroutine; `relay(fn)` wraps a callback
+    so it executes on the calling thread (Streamlit elements can only be written from the script thread).
+    """
+    calls = queue.SimpleQueue()
+
+    def relay(fn):
+        if fn is None:
+            return None
+        return lambda *args, **kwargs: calls.put((fn, args, kwargs))
+
+    future = asyncio.run_coroutine_threadsafe(make_coro(relay), _get_loop())
+    while True:
+        try:
+            fn, args, kwargs = calls.get(timeout=0.05)
+        except queue.Empty:
+            if future.done():
+                break
+            continue
+        fn(*args, **kwargs)
+    return future.result()
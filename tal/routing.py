@@ -0,0 +1,101 @@
+"""
+Model routing.
+Every Gemini task is mapped to a chain of model tiers in config (TAL_ROUTE_<TASK>, e.g. "fast,lite"). The first
+tier answers unless it errors, runs past the task's latency budget or returns an answer `check` rejects; then
+the same request goes to the next tier. Only when every tier has failed does the caller's canned fallback run.
+
+    response, fell_back = route("analysis", request, client.models.generate_content, check=parse)
+"""
+
+import asyncio
+import time
+
+from tal import config
+from tal.telemetry import annotate, metrics
+
+def chain(task: str) -> list:
+    """[(tier, model)] for `task`, in the order they are tried."""
+    tiers = [t for t in config.MODEL_ROUTES.get(task, ()) if t in config.MODEL_TIERS] or ["pro"]
+    return [(tier, config.MODEL_TIERS[tier]) for tier in tiers]
+
+
+def primary_model(task: str) -> str:
+    """The model that answers `task` when nothing goes wrong (what cache keys are versioned on)."""
+    return chain(task)[0][1]
+
+
+def stream_model(task: str, attempt: int) -> str:
+    """Streams can't be swapped mid-way, so a retried stream moves one tier down instead."""
+    tiers = chain(task)
+    return tiers[min(attempt, len(tiers) - 1)][1]
+
+
+def _budgeted(task: str, request: dict, model: str) -> dict:
+    """`request` for `model`, with the task's budget as the HTTP timeout of each attempt."""
+    budget = config.LATENCY_BUDGETS.get(task, 0)
+    gen_config = request.get("config")
+    if budget > 0 and gen_config is not None:
+        from google.genai import types
+
+        gen_config = gen_config.model_copy(update={"http_options": types.HttpOptions(timeout=int(budget * 1000))})
+    return {**request, "model": model, "config": gen_config}
+
+
+def _outcome(error: Exception) -> str:
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)) or "timeout" in type(error).__name__.lower():
+        return "timeout"
+    return "invalid" if isinstance(error, ValueError) else "error"
+
+
+def _record(task: str, tier: str, model: str, outcome: str, started: float, position: int) -> None:
+    seconds = time.monotonic() - started
+    metrics.observe("tal_route_seconds", seconds, task=task, tier=tier, outcome=outcome)
+    metrics.inc("tal_route_total", task=task, tier=tier, outcome=outcome)
+    if outcome == "ok":
+        annotate(tier=tier, model=model, fell_back=position > 0)
+
+
+def route(task: str, request: dict, send, check=None) -> tuple:
+    """
+    (response, fell_back) from the first tier in `task`'s chain that answers. `send(**request)` makes the call;
+    `check(response)` raises ValueError on an unusable answer. The last tier's error is raised if they all fail.
+    fell_back means a lower tier answered: callers don't cache those, so the next request tries the better model.
+    """
+    error = None
+    for position, (tier, model) in enumerate(chain(task)):
+        started = time.monotonic()
+        try:
+            response = send(**_budgeted(task, request, model))
+            if check:
+                check(response)
+        except Exception as e:
+            _record(task, tier, model, _outcome(e), started, position)
+            error = e
+            continue
+        _record(task, tier, model, "ok", started, position)
+        return response, position > 0
+    raise error
+
+
+async def route_async(task: str, request: dict, send, check=None) -> tuple:
+    """Async twin of route; the budget also bounds the whole attempt (queueing and retries included)."""
+    budget = config.LATENCY_BUDGETS.get(task, 0)
+    error = None
+    for position, (tier, model) in enumerate(chain(task)):
+        started = time.monotonic()
+        try:
+            call = send(**_budgeted(task, request, model))
+            response = await (asyncio.wait_for(call, budget) if budget > 0 else call)
+            if check:
+                check(response)
+        except asyncio.TimeoutError:
+            _record(task, tier, model, "timeout", started, position)
+            error = TimeoutError(f"{model} ran past the {budget:g}s {task} budget")
+            continue
+        except Exception as e:
+            _record(task, tier, model, _outcome(e), started, position)
+            error = e
+            continue
+        _record(task, tier, model, "ok", started, position)
+        return response, position > 0
+    raise error
@@ -0,0 +1,382 @@
+"""
+Process-wide scheduler for Gemini calls.
+Every session's TalAgent shares one GeminiScheduler: token buckets cap requests and tokens per minute,
+waiting calls are admitted by priority class (interactive, then optional, then batch), each class has a
+bounded queue (a full queue fails fast with SchedulerBusy instead of piling up), and 429 / 5xx answers
+are retried with jittered exponential backoff. ScheduledClient puts it in front of a genai client.
+
+    with priority("optional"):
+        agent.generate_cold_dm(...)
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import json
+import random
+import re
+import threading
+import time
+
+from tal import config
+from tal.sections import estimate_tokens
+from tal.telemetry import annotate, metrics
+
+PRIORITIES = ("interactive", "optional", "batch")  # admitted in this order
+
+_priority = contextvars.ContextVar("tal_llm_priority", default="interactive")
+_RETRYABLE_STATUS = re.compile(r"\b(429|500|502|503|504)\b|RESOURCE_EXHAUSTED|UNAVAILABLE|DEADLINE_EXCEEDED")
+_ASYNC_POLL = 0.02  # seconds between admission checks for async waiters
+
+
+class SchedulerBusy(RuntimeError):
+    """The caller's priority queue is full: shed the call rather than queue it behind minutes of work."""
+
+
+@contextlib.contextmanager
+def priority(name: str):
+    """
+    Run the block's Gemini calls at `name` or lower: nesting never raises priority, so a cold DM
+    drafted inside a batch job stays a batch call.
+    """
+    effective = max(name, _priority.get(), key=PRIORITIES.index)
+    token = _priority.set(effective)
+    try:
+        yield effective
+    finally:
+        _priority.reset(token)
+
+
+def set_priority(name: str) -> None:
+    """priority() for a whole task or thread context (e.g. one batch item)."""
+    _priority.set(max(name, _priority.get(), key=PRIORITIES.index))
+
+
+def retryable(error: Exception) -> bool:
+    """Rate limiting and server-side failures; anything else (bad request, parse errors) is final."""
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if isinstance(code, int):
+        return code == 429 or code >= 500
+    return bool(_RETRYABLE_STATUS.search(str(error)))
+
+
+class TokenBucket:
+    """`per_minute` units, refilled continuously; 0 means unlimited. Balance may go negative (debt)."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if self.capacity:
+            self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    def wait_for(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if it is now). Requests above capacity wait for a full bucket."""
+        self._refill(now)
+        if not self.capacity:
+            return 0.0
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) * 60 / self.capacity
+
+    def take(self, amount: float) -> None:
+        if self.capacity:
+            self.level -= amount
+
+
+class GeminiScheduler:
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_inflight: int = 0,
+        queue_limit: int = 0,
+        retries: int = 3,
+        backoff: float = 1.0,
+        backoff_max: float = 30.0,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_inflight = max_inflight
+        self.queue_limit = queue_limit
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.inflight = 0
+        self._waiting = []  # heap of (priority index, seq)
+        self._depth = {name: 0 for name in PRIORITIES}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    # ─── Admission ───
+
+    def _enqueue(self, prio: str) -> tuple:
+        with self._cond:
+            if self.queue_limit and self._depth[prio] >= self.queue_limit:
+                metrics.inc("tal_scheduler_rejected_total", priority=prio)
+                raise SchedulerBusy(f"gemini queue full ({self._depth[prio]} {prio} calls waiting)")
+            ticket = (PRIORITIES.index(prio), next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            self._depth[prio] += 1
+            metrics.set("tal_scheduler_queue_depth", self._depth[prio], priority=prio)
+            return ticket
+
+    def _try_admit(self, ticket: tuple, cost: int) -> float:
+        """Admit `ticket` if it heads the queue and the limits allow; else seconds worth waiting. Holds the lock."""
+        if self._waiting[0] != ticket:
+            return _ASYNC_POLL
+        if self.max_inflight and self.inflight >= self.max_inflight:
+            return _ASYNC_POLL
+        now = time.monotonic()
+        wait = max(self.requests.wait_for(1, now), self.tokens.wait_for(cost, now))
+        if wait:
+            return wait
+        self.requests.take(1)
+        self.tokens.take(cost)
+        heapq.heappop(self._waiting)
+        prio = PRIORITIES[ticket[0]]
+        self._depth[prio] -= 1
+        metrics.set("tal_scheduler_queue_depth", self._depth[prio], priority=prio)
+        self.inflight += 1
+        self._cond.notify_all()
+        return 0.0
+
+    def _abandon(self, ticket: tuple) -> None:
+        """A waiter gave up (cancelled): take it out of the queue."""
+        with self._cond:
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                prio = PRIORITIES[ticket[0]]
+                self._depth[prio] -= 1
+                metrics.set("tal_scheduler_queue_depth", self._depth[prio], priority=prio)
+                self._cond.notify_all()
+
+    def _admitted(self, prio: str, started: float) -> None:
+        waited = time.monotonic() - started
+        metrics.observe("tal_scheduler_wait_seconds", waited, priority=prio)
+        annotate(priority=prio, queue_wait=round(waited, 4))
+
+    def acquire(self, cost: int) -> None:
+        prio = _priority.get()
+        ticket = self._enqueue(prio)
+        started = time.monotonic()
+        try:
+            with self._cond:
+                while wait := self._try_admit(ticket, cost):
+                    self._cond.wait(timeout=wait)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+        self._admitted(prio, started)
+
+    async def acquire_async(self, cost: int) -> None:
+        prio = _priority.get()
+        ticket = self._enqueue(prio)
+        started = time.monotonic()
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_admit(ticket, cost)
+                if not wait:
+                    break
+                await asyncio.sleep(min(wait, _ASYNC_POLL))
+        except BaseException:
+            self._abandon(ticket)
+            raise
+        self._admitted(prio, started)
+
+    def release(self, charged: int, response=None) -> None:
+        """Free the in-flight slot and settle the token estimate against the response's real usage."""
+        usage = getattr(response, "usage_metadata", None)
+        total = getattr(usage, "total_token_count", None) if usage is not None else None
+        if total is None and usage is not None:
+            total = sum(getattr(usage, f, None) or 0 for f in ("prompt_token_count", "candidates_token_count", "thoughts_token_count"))
+        with self._cond:
+            self.inflight -= 1
+            if total:
+                self.tokens.take(total - charged)
+            self._cond.notify_all()
+
+    # ─── Retries ───
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full jitter: uniform in [0, min(max, base * 2^attempt)]."""
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        if attempt >= self.retries or not retryable(error):
+            return False
+        metrics.inc("tal_scheduler_retries_total", reason=getattr(error, "code", None) or type(error).__name__)
+        annotate(scheduler_retries=attempt + 1, retry_reason=str(error)[:200])
+        return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"inflight": self.inflight, "queued": dict(self._depth)}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> GeminiScheduler:
+    """The process-wide scheduler, built from config on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = GeminiScheduler(
+                requests_per_minute=config.GEMINI_RPM,
+                tokens_per_minute=config.GEMINI_TPM,
+                max_inflight=config.GEMINI_MAX_INFLIGHT,
+                queue_limit=config.GEMINI_QUEUE_LIMIT,
+                retries=config.GEMINI_RETRIES,
+                backoff=config.GEMINI_BACKOFF,
+                backoff_max=config.GEMINI_BACKOFF_MAX,
+            )
+        return _scheduler
+
+
+# ─────────────────────────────────────────────────────────────
+# CLIENT
+# ─────────────────────────────────────────────────────────────
+
+def _cost(contents) -> int:
+    """Upfront token charge: the prompt estimate (the real total is settled on release)."""
+    text = contents if isinstance(contents, str) else json.dumps(contents, default=str)
+    return estimate_tokens(text)
+
+
+class ScheduledClient:
+    """A genai client (models / aio.models) whose calls wait for the scheduler and retry transient failures."""
+
+    def __init__(self, inner, scheduler: GeminiScheduler = None):
+        self.inner = inner
+        self.scheduler = scheduler or get_scheduler()
+        self.models = _Models(self)
+        self.aio = _Aio(self)
+
+
+class _Models:
+    def __init__(self, owner: ScheduledClient):
+        self._owner = owner
+
+    def generate_content(self, model=None, contents=None, config=None, **kwargs):
+        scheduler, cost = self._owner.scheduler, _cost(contents)
+        for attempt in itertools.count():
+            scheduler.acquire(cost)
+            response = None
+            try:
+                response = self._owner.inner.models.generate_content(model=model, contents=contents, config=config, **kwargs)
+                return response
+            except Exception as e:
+                if not scheduler.should_retry(e, attempt):
+                    raise
+            finally:
+                scheduler.release(cost, response)
+            time.sleep(scheduler.backoff_delay(attempt))
+
+    def generate_content_stream(self, model=None, contents=None, config=None, **kwargs):
+        """Retries only cover opening the stream; the slot is held until the stream ends or is closed."""
+        scheduler, cost = self._owner.scheduler, _cost(contents)
+        for attempt in itertools.count():
+            scheduler.acquire(cost)
+            try:
+                chunks = self._owner.inner.models.generate_content_stream(model=model, contents=contents, config=config, **kwargs)
+                return _ScheduledStream(scheduler, cost, chunks)
+            except Exception as e:
+                scheduler.release(cost)
+                if not scheduler.should_retry(e, attempt):
+                    raise
+            time.sleep(scheduler.backoff_delay(attempt))
+
+
+class _AsyncModels:
+    def __init__(self, owner: ScheduledClient):
+        self._owner = owner
+
+    async def generate_content(self, model=None, contents=None, config=None, **kwargs):
+        scheduler, cost = self._owner.scheduler, _cost(contents)
+        for attempt in itertools.count():
+            await scheduler.acquire_async(cost)
+            response = None
+            try:
+                response = await self._owner.inner.aio.models.generate_content(
+                    model=model, contents=contents, config=config, **kwargs
+                )
+                return response
+            except Exception as e:
+                if not scheduler.should_retry(e, attempt):
+                    raise
+            finally:
+                scheduler.release(cost, response)
+            await asyncio.sleep(scheduler.backoff_delay(attempt))
+
+    async def generate_content_stream(self, model=None, contents=None, config=None, **kwargs):
+        scheduler, cost = self._owner.scheduler, _cost(contents)
+        for attempt in itertools.count():
+            await scheduler.acquire_async(cost)
+            try:
+                chunks = await self._owner.inner.aio.models.generate_content_stream(
+                    model=model, contents=contents, config=config, **kwargs
+                )
+                return _AsyncScheduledStream(scheduler, cost, chunks)
+            except Exception as e:
+                scheduler.release(cost)
+                if not scheduler.should_retry(e, attempt):
+                    raise
+            await asyncio.sleep(scheduler.backoff_delay(attempt))
+
+
+class _Aio:
+    def __init__(self, owner: ScheduledClient):
+        self.models = _AsyncModels(owner)
+
+
+class _ScheduledStream:
+    """Holds the in-flight slot until the stream is exhausted or closed; settles tokens from the last chunk."""
+
+    def __init__(self, scheduler: GeminiScheduler, cost: int, chunks):
+        self._scheduler, self._cost, self._chunks = scheduler, cost, chunks
+        self._last = None
+        self._released = False
+
+    def _release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._scheduler.release(self._cost, self._last)
+
+    def __iter__(self):
+        try:
+            for chunk in self._chunks:
+                self._last = chunk
+                yield chunk
+        finally:
+            self._release()
+
+    def close(self):
+        self._release()
+        if hasattr(self._chunks, "close"):
+            self._chunks.close()
+
+
+class _AsyncScheduledStream(_ScheduledStream):
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        try:
+            async for chunk in self._chunks:
+                self._last = chunk
+                yield chunk
+        finally:
+            self._release()
+
+    async def aclose(self):
+        self._release()
+        if hasattr(self._chunks, "aclose"):
+            await self._chunks.aclose()
@@ -0,0 +1,189 @@
+"""
+Section-aware resume parsing and prompt compaction.
+Splits a resume into typed sections (header, education, experience, projects, skills, other) using
+PyMuPDF span/font data, then packs the most relevant sections into a per-prompt token budget instead
+of slicing the raw text at a fixed character count.
+"""
+
+import re
+import statistics
+
+from tal.skills import get_skill_index
+
+SECTION_TYPES = ("header", "education", "experience", "projects", "skills", "other")
+
+_HEADINGS = {
+    "education": ("education", "academics", "academic background", "academic qualifications", "qualifications"),
+    "experience": (
+        "experience", "work experience", "professional experience", "employment", "employment history",
+        "work history", "internships", "internship experience", "relevant experience",
+    ),
+    "projects": ("projects", "personal projects", "academic projects", "key projects", "selected projects"),
+    "skills": (
+        "skills", "technical skills", "skills & tools", "skills and tools", "tools", "technologies",
+        "tech stack", "core competencies", "skills & interests", "skills and interests",
+    ),
+    "other": (
+        "achievements", "awards", "honors", "certifications", "certificates", "publications", "patents",
+        "volunteering", "volunteer experience", "leadership", "positions of responsibility",
+        "extracurricular activities", "extracurriculars", "activities", "interests", "hobbies",
+        "languages", "summary", "profile", "objective", "about me", "coursework", "relevant coursework",
+    ),
+}
+_HEADING_LOOKUP = {name: kind for kind, names in _HEADINGS.items() for name in names}
+_MAX_HEADING_WORDS = 5
+
+# Section priorities per prompt: earlier sections keep more of their text when the budget is tight
+PROMPT_PROFILES = {
+    "analysis": ("header", "experience", "projects", "skills", "education", "other"),
+    "latex": ("header", "education", "experience", "projects", "skills", "other"),
+    "cold_dm": ("experience", "projects", "skills", "header"),
+}
+
+_JD_BOILERPLATE = re.compile(
+    r"equal opportunity|eeo|diversity|benefits|perks|about us|our culture|privacy|"
+    r"accommodation|background check|salary range|apply now|how to apply",
+    re.IGNORECASE,
+)
+_JD_SIGNAL = re.compile(
+    r"require|must|should|experience|responsib|you will|you'll|qualif|skills|proficien|knowledge of|"
+    r"familiar|nice to have|bonus|years",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token, the usual rule of thumb for English with Gemini tokenizers."""
+    return (len(text) + 3) // 4
+
+
+def classify_heading(line: str) -> str:
+    """Section type for a heading line, or None if it doesn't read like one."""
+    words = line.split()
+    if not words or len(words) > _MAX_HEADING_WORDS:
+        return None
+    key = re.sub(r"\s+", " ", line.strip(" :|-–—•").lower())
+    return _HEADING_LOOKUP.get(key)
+
+
+def _section(kind: str, title: str, lines: list) -> dict:
+    return {"type": kind, "title": title, "text": "\n".join(lines).strip()}
+
+
+def build_sections(lines: list) -> list:
+    """
+    Group styled lines (text, font size, bold) into sections.
+    A heading is a short line naming a known section that also *looks* like one (bigger, bold or caps);
+    if the document has no styled headings, the name alone is enough.
+    """
+    if not lines:
+        return []
+    sizes = [size for text, size, _ in lines for _ in range(len(text))]
+    body_size = statistics.median(sizes) if sizes else 0
+
+    def styled(text, size, bold):
+        return size >= body_size + 0.5 or bold or (text.isupper() and len(text) > 3)
+
+    require_style = any(classify_heading(t) and styled(t, s, b) for t, s, b in lines)
+
+    sections = []
+    kind, title, current = "header", "Header", []
+    for text, size, bold in lines:
+        heading = classify_heading(text)
+        if heading and (styled(text, size, bold) or not require_style):
+            if current:
+                sections.append(_section(kind, title, current))
+            kind, title, current = heading, text.strip(" :"), [text]
+        else:
+            current.append(text)
+    if current:
+        sections.append(_section(kind, title, current))
+    return sections
+
+
+def split_text_sections(text: str) -> list:
+    """Sections from plain text (no font data), for callers that only kept the extracted text."""
+    return build_sections([(line, 0, False) for line in (text or "").splitlines() if line.strip()])
+
+
+# ─────────────────────────────────────────────────────────────
+# PROMPT COMPACTION
+# ─────────────────────────────────────────────────────────────
+
+def _clip(text: str, tokens: int) -> str:
+    """Leading lines of `text` that fit in `tokens` (first lines are usually the most recent/important)."""
+    if estimate_tokens(text) <= tokens:
+        return text
+    kept, used = [], 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line + "\n")
+        if used + cost > tokens:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+def compact_resume(resume_text: str, budget: int, profile: str, sections: list = None) -> str:
+    """
+    Fit the resume into `budget` tokens for the given prompt profile.
+    Sections outside the profile are dropped; the rest first get a fair share of the budget, then
+    leftover tokens go to sections in profile priority order. Output keeps the document order.
+    """
+    order = PROMPT_PROFILES[profile]
+    sections = sections if sections is not None else split_text_sections(resume_text)
+    if not sections:
+        return _clip(resume_text or "", budget)
+
+    picked = [
+        (i, {**s, "text": re.sub(r"[ \t]+", " ", re.sub(r"\n\s*\n+", "\n", s["text"]))})
+        for i, s in enumerate(sections)
+        if s["type"] in order
+    ]
+    sizes = {i: estimate_tokens(s["text"]) for i, s in picked}
+    if sum(sizes.values()) <= budget:
+        return "\n\n".join(s["text"] for _, s in picked)
+
+    by_priority = sorted(picked, key=lambda p: (order.index(p[1]["type"]), p[0]))
+    alloc, remaining = {}, budget
+    fair = budget // max(len(picked), 1)
+    for i, _ in by_priority:
+        alloc[i] = min(sizes[i], fair)
+        remaining -= alloc[i]
+    for i, _ in by_priority:
+        extra = min(sizes[i] - alloc[i], remaining)
+        alloc[i] += extra
+        remaining -= extra
+
+    parts = [_clip(s["text"], alloc[i]) for i, s in picked]
+    return "\n\n".join(p for p in parts if p)
+
+
+def compact_jd(jd_text: str, budget: int) -> str:
+    """
+    Fit a JD into `budget` tokens: keep requirement-bearing lines (lexicon skills, "must", "experience"...)
+    over boilerplate (benefits, EEO, about us), in their original order.
+    """
+    jd_text = re.sub(r"\n\s*\n+", "\n", (jd_text or "").strip())
+    if estimate_tokens(jd_text) <= budget:
+        return jd_text
+
+    index = get_skill_index()
+    lines = [line.strip() for line in jd_text.splitlines() if line.strip()]
+    scored = []
+    for pos, line in enumerate(lines):
+        score = 2 * min(len(index.find(line)), 3)
+        score += 1 if _JD_SIGNAL.search(line) else 0
+        score -= 3 if _JD_BOILERPLATE.search(line) else 0
+        # Title/company lines at the top matter for company & role detection
+        score += 2 if pos < 3 else 0
+        scored.append((-score, pos, line))
+
+    keep, used = set(), 0
+    for _, pos, line in sorted(scored):
+        cost = estimate_tokens(line + "\n")
+        if used + cost > budget:
+            continue
+        keep.add(pos)
+        used += cost
+    return "\n".join(line for pos, line in enumerate(lines) if pos in keep)
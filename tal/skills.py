@@ -0,0 +1,186 @@
+"""
+Local skills index.
+A curated lexicon of tools and technologies (tal/data/skills.json) compiled into an Aho-Corasick
+automaton, so JD-vs-resume keyword coverage is computed locally, instantly and reproducibly.
+
+Lexicon format: {category: {canonical name: [aliases]}}. Matching is case-insensitive on word
+boundaries. An alias written as "=Name" matches case-sensitively; listing the canonical name that
+way (e.g. "Spark": ["pyspark", "=Spark"]) makes the canonical match case-sensitive too. "~Name" is for
+names that are also ordinary words or letters (Go, C, R, Swift): case-sensitive, and only counted where
+the text lists it (next to a comma, slash, bracket or colon, or ending a line), so "C-suite" and "Swift delivery"
+don't match. Those skills are never reported as off-target either.
+"""
+
+import functools
+import json
+import os
+from collections import Counter
+
+_LEXICON_PATH = os.path.join(os.path.dirname(__file__), "data", "skills.json")
+
+# Lowercase ASCII only, so offsets in the folded text line up with the original
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+# "&", "+" and "#" count as word characters so "R&D" isn't R and "C++" isn't C
+_WORD_EXTRA = set("&+#_")
+# What may sit on either side of a "~" form for it to count as a listed skill. A line's end counts but its
+# start doesn't: "Swift delivery of..." opening a bullet is prose
+_LIST_BEFORE = set(",;/|(:")
+_LIST_AFTER = set(",;/|)\n")
+
+# Score weights: keyword coverage of the JD vs share of resume skills that are on-target
+COVERAGE_WEIGHT = 0.7
+RELEVANCE_WEIGHT = 0.3
+NEUTRAL_COVERAGE = 0.6  # when the JD names no lexicon skills at all
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch in _WORD_EXTRA
+
+
+def _listed(text: str, start: int, end: int) -> bool:
+    """Whether text[start:end] sits in a list: the nearest non-blank character on one side is a separator."""
+    before = text[:start].rstrip(" \t")
+    after = text[end:].lstrip(" \t")
+    return (before and before[-1] in _LIST_BEFORE) or not after or after[0] in _LIST_AFTER
+
+
+class SkillIndex:
+    """Multi-pattern matcher over a skills lexicon (one pass over the text, whatever the lexicon size)."""
+
+    def __init__(self, lexicon: dict):
+        self.category = {}
+        self.contextual = set()  # canonical names written as "~Name"
+        self._patterns = []  # (length, canonical, exact form or None, needs list context)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for category, skills in lexicon.items():
+            for canonical, aliases in skills.items():
+                self.category[canonical] = category
+                exact = {a[1:] for a in aliases if a.startswith(("=", "~"))}
+                listed = {a[1:] for a in aliases if a.startswith("~")}
+                if canonical in listed:
+                    self.contextual.add(canonical)
+                forms = {canonical: canonical if canonical in exact else None}
+                for alias in aliases:
+                    if not alias.startswith(("=", "~")):
+                        forms.setdefault(alias, None)
+                for form in exact:
+                    forms.setdefault(form, form)
+                for form, exact_form in forms.items():
+                    self._add(form.translate(_ASCII_LOWER), canonical, exact_form, form in listed)
+        self._link()
+
+    def _add(self, needle: str, canonical: str, exact: str, listed: bool) -> None:
+        state = 0
+        for ch in needle:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(len(self._patterns))
+        self._patterns.append((len(needle), canonical, exact, listed))
+
+    def _link(self) -> None:
+        """Breadth-first failure links; each state's outputs include its suffix states' outputs."""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Counter:
+        """Canonical skill -> number of mentions (leftmost-longest, non-overlapping, on word boundaries)."""
+        folded = (text or "").translate(_ASCII_LOWER)
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self._patterns
+        candidates = []
+        state = 0
+        for end, ch in enumerate(folded, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for idx in out[state]:
+                length, canonical, exact, listed = patterns[idx]
+                start = end - length
+                if start > 0 and _is_word(text[start - 1]):
+                    continue
+                if end < len(text) and _is_word(text[end]):
+                    continue
+                if exact is not None and text[start:end] != exact:
+                    continue
+                if listed and not _listed(text, start, end):
+                    continue
+                candidates.append((start, -length, canonical))
+
+        counts = Counter()
+        covered_until = 0
+        for start, neg_length, canonical in sorted(candidates):
+            if start >= covered_until:
+                counts[canonical] += 1
+                covered_until = start - neg_length
+        return counts
+
+
+@functools.lru_cache(maxsize=1)
+def get_skill_index() -> SkillIndex:
+    with open(_LEXICON_PATH, encoding="utf-8") as f:
+        return SkillIndex(json.load(f))
+
+
+def gap_report(resume_text: str, jd_text: str) -> dict:
+    """
+    Deterministic keyword gap analysis. Keys line up with the analysis dict
+    (missing_keywords, irrelevant_skills, score_before, score_after) so they can be merged into it.
+    """
+    index = get_skill_index()
+    jd = index.find(jd_text)
+    resume = index.find(resume_text)
+
+    required = sorted(jd, key=lambda s: (-jd[s], s))
+    matched = [s for s in required if s in resume]
+    missing = [s for s in required if s not in resume]
+    jd_categories = {index.category[s] for s in jd}
+    # "Remove mentions of go / c" would reach every use of the word, so those skills are never off-target
+    irrelevant = sorted(
+        s for s in resume if index.category[s] not in jd_categories and s not in index.contextual
+    )
+
+    total = sum(jd.values())
+    coverage = sum(jd[s] for s in matched) / total if total else None
+    relevance = 1 - len(irrelevant) / len(resume) if resume else 1.0
+    keyword_part = COVERAGE_WEIGHT * (coverage if coverage is not None else NEUTRAL_COVERAGE)
+
+    return {
+        "jd_skills": required,
+        "matched_skills": matched,
+        "missing_keywords": missing,
+        "irrelevant_skills": irrelevant,
+        "keyword_coverage": round(coverage, 3) if coverage is not None else None,
+        "score_before": round(100 * (keyword_part + RELEVANCE_WEIGHT * relevance)),
+        # Tailoring cuts the off-target skills; it can't add skills the candidate doesn't have
+        "score_after": round(100 * (keyword_part + RELEVANCE_WEIGHT)),
+    }
+
+
+def facts_block(report: dict) -> str:
+    """The gap report as prompt-ready facts."""
+    def fmt(items):
+        return ", ".join(items) if items else "none"
+
+    coverage = report["keyword_coverage"]
+    return "\n".join([
+        f"- JD asks for: {fmt(report['jd_skills'])}",
+        f"- Resume already has: {fmt(report['matched_skills'])}",
+        f"- Missing from resume: {fmt(report['missing_keywords'])}",
+        f"- Off-target for this JD: {fmt(report['irrelevant_skills'])}",
+        f"- Keyword coverage: {'n/a' if coverage is None else f'{coverage:.0%}'}",
+    ])
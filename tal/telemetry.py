@@ -0,0 +1,364 @@
+"""
+Telemetry: timing spans, token / fallback / compile counters and latency histograms, stdlib only.
+Finished spans are appended to a JSONL log (config.TELEMETRY_LOG) and kept per trace for the in-app waterfall;
+metrics are served in the Prometheus text format by start_metrics_server().
+
+    with span("compile_pdf") as s:
+        ...
+        s.set(backend="local")
+"""
+
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tal import config
+
+logger = logging.getLogger(__name__)
+
+_trace_id = contextvars.ContextVar("tal_trace_id", default=None)
+_current_span = contextvars.ContextVar("tal_span", default=None)
+
+# usage_metadata field -> "kind" label of tal_llm_tokens_total
+_TOKEN_FIELDS = {
+    "prompt": "prompt_token_count",
+    "output": "candidates_token_count",
+    "thoughts": "thoughts_token_count",
+    "cached": "cached_content_token_count",
+    "tool_prompt": "tool_use_prompt_token_count",
+}
+_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+_HELP = {
+    "tal_span_seconds": ("histogram", "Duration of traced operations."),
+    "tal_llm_tokens_total": ("counter", "Gemini tokens by call and kind, from response usage metadata."),
+    "tal_llm_fallbacks_total": ("counter", "Calls that fell back to a canned result."),
+    "tal_llm_retries_total": ("counter", "Retried Gemini calls (e.g. aborted LaTeX streams)."),
+    "tal_compile_total": ("counter", "compile_pdf results by the backend that served them."),
+    "tal_compile_requests_total": ("counter", "Remote compile requests by backend and outcome."),
+    "tal_compile_request_seconds": ("histogram", "Remote compile request latency."),
+    "tal_jobs_total": ("counter", "Job submissions: started, attached to a running job, or served from a persisted one."),
+    "tal_job_seconds": ("histogram", "Background job duration by kind and status."),
+    "tal_company_profiles_total": ("counter", "Company profile lookups: a fresh profile (hit, no search needed) or a miss."),
+    "tal_company_refreshes_total": ("counter", "Hot company profiles re-researched by the background refresher."),
+    "tal_blob_bytes": ("gauge", "Bytes of session blobs currently referenced."),
+    "tal_blob_mapped_bytes": ("gauge", "Bytes of session blobs currently memory-mapped."),
+    "tal_blob_sessions": ("gauge", "Sessions holding at least one blob."),
+    "tal_scheduler_queue_depth": ("gauge", "Gemini calls waiting for the scheduler, by priority."),
+    "tal_scheduler_wait_seconds": ("histogram", "Time Gemini calls spent queued in the scheduler."),
+    "tal_scheduler_rejected_total": ("counter", "Gemini calls shed because their priority queue was full."),
+    "tal_scheduler_retries_total": ("counter", "Gemini calls retried after a 429 / 5xx, by reason."),
+    "tal_route_seconds": ("histogram", "Gemini call latency by task, model tier and outcome (ok / timeout / invalid / error)."),
+    "tal_route_total": ("counter", "Gemini calls by task, model tier and outcome; invalid counts answers that failed validation."),
+    "tal_analysis_repairs_total": ("counter", "Analysis answers that needed a JSON repair, by repair (fences, trailing commas, truncated, keys...)."),
+    "tal_analysis_defaulted_total": ("counter", "Analysis fields that couldn't be read and got the generic plan's value, by field."),
+}
+
+
+# ─────────────────────────────────────────────────────────────
+# METRICS
+# ─────────────────────────────────────────────────────────────
+
+class Metrics:
+    """Labelled counters, gauges and histograms, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def total(self, name: str, **labels) -> float:
+        """Sum of the `name` counters whose labels include `labels`."""
+        wanted = set(self._key(name, labels)[1])
+        with self._lock:
+            return sum(v for (n, ls), v in self._counters.items() if n == name and wanted <= set(ls))
+
+    def set(self, name: str, value: float, **labels) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            buckets, total = self._histograms.get(key, ([0] * len(_BUCKETS), [0.0, 0]))
+            for i, bound in enumerate(_BUCKETS):
+                if value <= bound:
+                    buckets[i] += 1
+            total[0] += value
+            total[1] += 1
+            self._histograms[key] = (buckets, total)
+
+    def render(self) -> str:
+        def fmt(labels, extra=()):
+            pairs = [*labels, *extra]
+            if not pairs:
+                return ""
+            escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        lines, seen = [], set()
+
+        def header(name):
+            if name not in seen:
+                seen.add(name)
+                kind, text = _HELP.get(name, ("untyped", ""))
+                lines.extend([f"# HELP {name} {text}", f"# TYPE {name} {kind}"])
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted((k, (list(b), list(t))) for k, (b, t) in self._histograms.items())
+        for (name, labels), value in counters:
+            header(name)
+            lines.append(f"{name}{fmt(labels)} {value:g}")
+        for (name, labels), value in gauges:
+            header(name)
+            lines.append(f"{name}{fmt(labels)} {value:g}")
+        for (name, labels), (buckets, (total, count)) in histograms:
+            header(name)
+            for bound, n in zip(_BUCKETS, buckets):
+                lines.append(f"{name}_bucket{fmt(labels, [('le', f'{bound:g}')])} {n}")
+            lines.append(f"{name}_bucket{fmt(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{fmt(labels)} {total:.6f}")
+            lines.append(f"{name}_count{fmt(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+# ─────────────────────────────────────────────────────────────
+# SPANS
+# ─────────────────────────────────────────────────────────────
+
+class Span:
+    def __init__(self, name: str, attrs: dict, parent, trace_id: str):
+        self.name = name
+        self.attrs = attrs
+        self.id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.id if parent else None
+        self.trace_id = trace_id
+        self.status = "ok"
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.seconds = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.id,
+            "parent_id": self.parent_id,
+            "start": round(self.start, 6),
+            "seconds": round(self.seconds, 6),
+            "status": self.status,
+            "pid": os.getpid(),
+            **self.attrs,
+        }
+
+
+_traces = OrderedDict()  # trace id -> finished span dicts, most recent trace last
+_traces_lock = threading.Lock()
+_log_lock = threading.Lock()
+_log_file = None
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def set_trace(trace_id: str) -> None:
+    """Spans started from this context on (including tasks / to_thread calls it spawns) join `trace_id`."""
+    _trace_id.set(trace_id)
+
+
+def trace_spans(trace_id: str) -> list:
+    with _traces_lock:
+        return list(_traces.get(trace_id, ()))
+
+
+def _rotate_log(path: str, backups: int) -> None:
+    """path -> path.1 -> ... -> path.<backups> (the oldest is dropped), like logging's RotatingFileHandler."""
+    for i in range(backups - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+    if backups > 0:
+        os.replace(path, f"{path}.1")
+    else:
+        os.remove(path)
+
+
+def _write_log(record: dict) -> None:
+    global _log_file
+    if not config.TELEMETRY_LOG:
+        return
+    line = json.dumps(record, default=str) + "\n"
+    with _log_lock:
+        try:
+            if _log_file is None:
+                os.makedirs(os.path.dirname(config.TELEMETRY_LOG) or ".", exist_ok=True)
+                _log_file = open(config.TELEMETRY_LOG, "a", encoding="utf-8", buffering=1)
+            _log_file.write(line)
+            if config.TELEMETRY_LOG_MAX_BYTES and _log_file.tell() >= config.TELEMETRY_LOG_MAX_BYTES:
+                _log_file.close()
+                _log_file = None
+                _rotate_log(config.TELEMETRY_LOG, config.TELEMETRY_LOG_BACKUPS)
+        except OSError as e:
+            logger.warning("telemetry log disabled: %s", e)
+            config.TELEMETRY_LOG = ""
+
+
+def _finish(span: Span) -> None:
+    span.seconds = time.perf_counter() - span._started
+    metrics.observe("tal_span_seconds", span.seconds, span=span.name, status=span.status)
+    record = span.as_dict()
+    if span.trace_id:
+        with _traces_lock:
+            spans = _traces.setdefault(span.trace_id, [])
+            _traces.move_to_end(span.trace_id)
+            if len(spans) < config.TELEMETRY_TRACE_SPANS:
+                spans.append(record)
+            while len(_traces) > config.TELEMETRY_TRACES:
+                _traces.popitem(last=False)
+    _write_log(record)
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs):
+    """Time a block; nested spans record their parent. Exceptions mark the span as an error and propagate."""
+    current = Span(name, attrs, _current_span.get(), _trace_id.get())
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.status = "error"
+        current.attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        _finish(current)
+
+
+def traced(name: str):
+    """Decorator form of span() for sync and async functions."""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def annotate(**attrs) -> None:
+    """Attach attributes to the innermost open span (no-op outside a span)."""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attrs)
+
+
+def record_usage(call: str, response) -> None:
+    """Token counts (and grounding search queries) from a Gemini response or final stream chunk."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    tokens = {kind: getattr(usage, field, None) or 0 for kind, field in _TOKEN_FIELDS.items()}
+    annotate(**{f"{kind}_tokens": n for kind, n in tokens.items() if n})
+    for kind, n in tokens.items():
+        if n:
+            metrics.inc("tal_llm_tokens_total", n, call=call, kind=kind)
+    candidates = getattr(response, "candidates", None) or []
+    grounding = getattr(candidates[0], "grounding_metadata", None) if candidates else None
+    queries = getattr(grounding, "web_search_queries", None) if grounding else None
+    if queries:
+        annotate(search_queries=len(queries))
+
+
+def set_status(status: str, error=None) -> None:
+    """Mark the innermost open span, for failures that are handled rather than raised."""
+    current = _current_span.get()
+    if current is not None:
+        current.status = status
+        if error is not None:
+            current.set(error=str(error))
+
+
+def record_fallback(call: str, error) -> None:
+    metrics.inc("tal_llm_fallbacks_total", call=call)
+    set_status("fallback", error)
+
+
+def record_retry(call: str, error) -> None:
+    metrics.inc("tal_llm_retries_total", call=call)
+    current = _current_span.get()
+    if current is not None:
+        current.set(retries=current.attrs.get("retries", 0) + 1, retry_reason=str(error))
+
+
+# ─────────────────────────────────────────────────────────────
+# METRICS ENDPOINT
+# ─────────────────────────────────────────────────────────────
+
+_server = None
+_server_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port: int = None) -> int:
+    """Serve /metrics from a daemon thread (once per process). Returns the port, or 0 when disabled."""
+    global _server
+    port = config.METRICS_PORT if port is None else port
+    with _server_lock:
+        if _server is None and port:
+            try:
+                _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            except OSError as e:
+                logger.warning("metrics endpoint not started on port %s: %s", port, e)
+                return 0
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="tal-metrics", daemon=True).start()
+        return _server.server_address[1] if _server else 0
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Before tal.config is imported: caches and the telemetry log go to a scratch dir, never the working tree
+os.environ["TAL_CACHE_DIR"] = tempfile.mkdtemp(prefix="tal-tests-")
+os.environ["TAL_TELEMETRY_LOG"] = ""
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from tal.analysis import GENERIC_ANALYSIS, Analysis, parse_analysis, repair_json
+
+ANSWER = {
+    "company_name": "acme",
+    "role_title": "backend engineer",
+    "company_archetype": "growth stage",
+    "role_archetype": "builder",
+    "role_translation_strategy": "lead with shipped systems and scale",
+    "content_plan": {
+        "keep_sections": ["Experience", "Projects"],
+        "drop_sections": [],
+        "top_projects": ["Ledger"],
+        "bullet_guidelines": "impact first, one metric per bullet",
+    },
+    "good_points": [{"point": "relevant backend experience", "why": "matches the core stack"}],
+    "needs_fixing": [{"issue": "bullets lack metrics", "impact": "reads as generic"}],
+    "proposed_changes": [{"change": "quantify the top bullets", "rationale": "shows scale"}],
+}
+TEXT = json.dumps(ANSWER, indent=2)
+
+
+def test_clean_answer_is_kept_whole():
+    analysis, notes = parse_analysis(TEXT)
+    assert analysis == ANSWER
+    assert notes == {"repairs": [], "defaulted": []}
+
+
+@pytest.mark.parametrize("text, repairs", [
+    (f"```json\n{TEXT}\n```", ["fences"]),
+    (f"Here is the analysis:\n{TEXT}\nLet me know if you need more.", ["prose"]),
+    (TEXT.replace('"\n  }', '",\n  }').replace("}\n  ]", "},\n  ]"), ["trailing_commas"]),
+])
+def test_wrapped_answers_lose_nothing(text, repairs):
+    analysis, notes = parse_analysis(text)
+    assert analysis == ANSWER
+    assert notes == {"repairs": repairs, "defaulted": []}
+
+
+def test_miscased_keys_are_mapped():
+    text = TEXT.replace('"role_title"', '"roleTitle"').replace('"company_name"', '"Company Name"')
+    analysis, notes = parse_analysis(text)
+    assert analysis == ANSWER
+    assert notes["repairs"] == ["keys"]
+
+
+def test_wrong_type_costs_only_that_field():
+    text = TEXT.replace('"role_archetype": "builder"', '"role_archetype": ["builder"]')
+    analysis, notes = parse_analysis(text)
+    assert notes["defaulted"] == ["role_archetype"]
+    assert analysis["role_archetype"] == GENERIC_ANALYSIS["role_archetype"]
+    assert {k: v for k, v in analysis.items() if k != "role_archetype"} == {
+        k: v for k, v in ANSWER.items() if k != "role_archetype"
+    }
+
+
+def test_bad_list_entries_are_dropped_not_the_list():
+    answer = {**ANSWER, "good_points": [{"point": "a", "why": "b"}, "junk", {"point": "no why"}]}
+    analysis, notes = parse_analysis(json.dumps(answer))
+    assert analysis["good_points"] == [{"point": "a", "why": "b"}]
+    assert notes["defaulted"] == []
+
+
+def test_truncated_between_fields_keeps_everything_before_the_cut():
+    text = TEXT[:TEXT.index('"proposed_changes"') - 5]
+    analysis, notes = parse_analysis(text)
+    assert notes == {"repairs": ["truncated"], "defaulted": ["proposed_changes"]}
+    assert analysis["needs_fixing"] == ANSWER["needs_fixing"]
+    assert analysis["proposed_changes"] == GENERIC_ANALYSIS["proposed_changes"]
+
+
+def test_truncated_inside_a_string_drops_the_half_value():
+    text = TEXT[:TEXT.index('"bullet_guidelines"') + 25]
+    analysis, notes = parse_analysis(text)
+    assert notes["defaulted"] == ["content_plan.bullet_guidelines", "good_points", "needs_fixing", "proposed_changes"]
+    # The half sentence is never passed off as the model's guideline
+    assert analysis["content_plan"]["bullet_guidelines"] == GENERIC_ANALYSIS["content_plan"]["bullet_guidelines"]
+    assert analysis["content_plan"]["top_projects"] == ["Ledger"]
+    assert analysis["role_translation_strategy"] == ANSWER["role_translation_strategy"]
+
+
+def test_one_usable_field_is_enough():
+    analysis, notes = parse_analysis('{"company_name": "acme"}')
+    assert analysis["company_name"] == "acme"
+    assert len(notes["defaulted"]) == len(Analysis.model_fields) - 1
+
+
+@pytest.mark.parametrize("text", ["", "no json here", "[1, 2]", '{"foo": 1}', '{"company_name": 5}'])
+def test_raises_only_when_nothing_is_usable(text):
+    with pytest.raises(ValueError):
+        parse_analysis(text)
+
+
+def test_repair_json_reports_what_it_fixed():
+    value, repairs = repair_json('Sure! ```json\n{"a": [1, 2,\n```')
+    assert value == {"a": [1, 2]}
+    assert repairs == ["fences", "trailing_commas"] or repairs == ["fences", "truncated"]
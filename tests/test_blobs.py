@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from tal.blobs import BlobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path), idle_ttl=60, session_ttl=60)
+
+
+def test_values_round_trip(store):
+    assert store.get(store.put("résumé", "s1")) == "résumé"
+    assert store.get(store.put({"a": [1, 2]}, "s1")) == {"a": [1, 2]}
+
+
+def test_bytes_come_back_as_a_view_over_the_map(store):
+    handle = store.put(b"%PDF-1.5 data", "s1")
+    value = store.get(handle)
+    assert isinstance(value, memoryview) and value.readonly
+    assert value == b"%PDF-1.5 data"
+
+
+def test_evicted_blobs_are_none_not_empty(store):
+    handle = store.put(b"%PDF-1.5 data", "s1")
+    with store.open(handle) as f:
+        assert f.read() == b"%PDF-1.5 data"
+    os.remove(store.path(handle))
+    assert not store.exists(handle)
+    assert store.open(handle) is None
+    assert store.get(handle, "gone") == "gone"
@@ -0,0 +1,46 @@
+import pytest
+
+from tal import compile as compile_mod
+
+
+class StubClient:
+    def __init__(self, errors):
+        self.errors = errors
+        self.calls = 0
+
+    def compile(self, latex):
+        self.calls += 1
+        return None, list(self.errors)
+
+
+@pytest.fixture
+def remote(monkeypatch):
+    def install(*errors):
+        client = StubClient(errors)
+        monkeypatch.setattr(compile_mod, "local_compiler_available", lambda: False)
+        monkeypatch.setattr(compile_mod, "get_compile_client", lambda: client)
+        return client
+    return install
+
+
+@pytest.mark.parametrize("errors", [
+    ("ytotech: HTTP 503", "latexonline: document too large"),
+    ("ytotech: HTTP 429",),
+    ("ytotech: Read timed out.",),
+    ("ytotech: circuit open",),
+])
+def test_passing_failures_are_retried(remote, errors):
+    client = remote(*errors)
+    source = f"transient {errors}"
+    pdf, error, deterministic = compile_mod.compile_pdf_classified(source)
+    assert pdf is None and error and not deterministic
+    compile_mod.compile_pdf(source)
+    assert client.calls == 2
+
+
+def test_document_errors_are_negative_cached(remote):
+    client = remote("ytotech: HTTP 400")
+    assert compile_mod.compile_pdf_classified("broken")[2] is True
+    pdf, error, deterministic = compile_mod.compile_pdf_classified("broken")
+    assert (pdf, deterministic, client.calls) == (None, True, 1)
+    assert "HTTP 400" in error
@@ -0,0 +1,122 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from tal import compile_client
+from tal.compile_client import CIRCUIT_OPEN, CircuitBreaker, CompileClient, DocumentRejected, RemoteBackend
+
+PDF = b"%PDF-1.5 body"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(compile_client.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _response(status: int, content: bytes = b""):
+    return SimpleNamespace(status_code=status, content=content)
+
+
+def _backend(*outcomes, name="stub", failures=2, cooldown=30):
+    """A backend whose sends return (or raise) `outcomes` in order."""
+    queue = list(outcomes)
+
+    def send(session, latex, timeout):
+        outcome = queue.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return RemoteBackend(name, send, CircuitBreaker(failures=failures, cooldown=cooldown))
+
+
+def test_breaker_opens_half_opens_and_closes(clock):
+    breaker = CircuitBreaker(failures=2, cooldown=30)
+    breaker.record(False)
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock[0] += 30
+    assert breaker.allow() and breaker.state == "half-open"
+    assert not breaker.allow()  # one probe at a time
+    breaker.record(True)
+    assert breaker.state == "closed" and breaker.consecutive_failures == 0
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failures=1, cooldown=30)
+    breaker.record(False)
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_release_frees_the_probe_without_deciding(clock):
+    breaker = CircuitBreaker(failures=1, cooldown=30)
+    breaker.record(False)
+    clock[0] += 30
+    assert breaker.allow() and not breaker.allow()
+    breaker.release()
+    assert breaker.state == "half-open" and breaker.allow()
+
+
+@pytest.mark.parametrize("response, healthy", [
+    (_response(200, PDF), True),
+    (_response(400), True),  # the document was rejected; the service is fine
+    (_response(429), False),
+    (_response(503), False),
+    (_response(200, b"<html>"), False),
+])
+def test_what_counts_against_the_breaker(clock, response, healthy):
+    backend = _backend(response)
+    backend.compile(None, "x", 1)
+    assert (backend.successes, backend.failures) == ((1, 0) if healthy else (0, 1))
+
+
+def test_rate_limits_open_the_circuit(clock):
+    backend = _backend(_response(429), _response(429))
+    backend.compile(None, "x", 1)
+    backend.compile(None, "x", 1)
+    assert backend.breaker.state == "open"
+
+
+def test_document_rejected_leaves_breaker_and_stats_alone(clock):
+    backend = _backend(_response(503), DocumentRejected("document too large"), failures=1, cooldown=30)
+    backend.compile(None, "x", 1)
+    clock[0] += 30
+    assert backend.breaker.allow()  # the half-open probe goes to a document the backend refuses
+    assert backend.compile(None, "x", 1) == (None, "document too large")
+    assert backend.breaker.state == "half-open" and backend.breaker.allow()
+    assert backend.stats()["requests"] == 1 and backend.stats()["last_error"] == "HTTP 503"
+
+
+def test_hedge_wins_when_the_first_backend_stalls():
+    gate = threading.Event()
+
+    def stalled(session, latex, timeout):
+        gate.wait(5)
+        return _response(503)
+
+    slow = RemoteBackend("slow", stalled, CircuitBreaker(failures=3, cooldown=30))
+    fast = _backend(_response(200, PDF), name="fast")
+    client = CompileClient([slow, fast], hedge_delay=0.01, timeout=1, pool_size=2)
+    try:
+        assert client.compile("x") == (PDF, [])
+        assert fast.stats()["wins"] == 1
+    finally:
+        gate.set()
+        client._executor.shutdown(wait=True)
+    assert slow.stats()["failures"] == 1  # the losing hedge still reports to its breaker
+
+
+def test_open_circuits_are_skipped_and_reported(clock):
+    down = _backend(name="down", failures=1)
+    down.breaker.record(False)
+    up = _backend(_response(503), name="up")
+    client = CompileClient([down, up], hedge_delay=0.01, timeout=1, pool_size=2)
+    assert client.compile("x") == (None, [f"down: {CIRCUIT_OPEN}", "up: HTTP 503"])
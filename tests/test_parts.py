@@ -0,0 +1,31 @@
+from tal.parts import plan_parts
+
+SECTIONS = [
+    {"type": "header", "title": "Header", "text": "Jane Doe"},
+    {"type": "experience", "title": "Work Experience", "text": "Backend Engineer, Globex"},
+    {"type": "projects", "title": "Projects", "text": "Payments ledger"},
+    {"type": "skills", "title": "Technical Skills", "text": "Python, Go"},
+    {"type": "other", "title": "Volunteer Experience", "text": "Food bank"},
+]
+
+
+def _names(drop_sections: list) -> list:
+    analysis = {"content_plan": {"drop_sections": drop_sections}}
+    return [p["name"] for p in plan_parts("resume", "jd", analysis, [], sections=SECTIONS)]
+
+
+def test_dropping_a_lookalike_title_keeps_the_part():
+    assert _names(["Volunteer Experience", "Soft Skills"]) == ["profile", "experience", "projects", "skills", "extra"]
+
+
+def test_dropping_a_section_title_drops_its_part():
+    assert _names(["Projects"]) == ["profile", "experience", "skills", "extra"]
+    assert _names(["technical skills:"]) == ["profile", "experience", "projects", "extra"]
+
+
+def test_dropping_the_part_by_name():
+    assert _names(["Experience"]) == ["profile", "projects", "skills", "extra"]
+
+
+def test_profile_is_never_dropped():
+    assert _names(["Header", "Education"])[0] == "profile"
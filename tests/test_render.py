@@ -0,0 +1,77 @@
+import re
+
+from tal.render import escape_latex, render_resume
+
+SPECIALS = r"50% & $5 #1 a_b {x} ~y ^z C:\tmp"
+URL = "github.com/jane_doe/~ledger?tab=1&q=a b#top{}^"
+
+RESUME = {
+    "name": "Jane & Co",
+    "contact": [
+        {"kind": "email", "text": "jane_doe@example.com"},
+        {"kind": "github", "text": "github.com/jane_doe", "url": URL},
+    ],
+    "education": [{"institution": "State University", "location": "Pune", "degree": "B.Tech, 8.9/10", "dates": "2020"}],
+    "experience": [{"title": "Engineer", "company": "Globex", "location": "", "dates": "2021", "bullets": [SPECIALS]}],
+    "projects": [{"name": "Ledger_v2", "tech": "C#, C++", "url": URL, "dates": "2022", "bullets": ["**100%** audited"]}],
+    "skills": [{"category": "Languages", "items": ["C#", "R & D"]}],
+}
+
+
+def _balanced(latex: str) -> bool:
+    depth = 0
+    for ch in re.sub(r"\\[{}]", "", latex):
+        depth += {"{": 1, "}": -1}.get(ch, 0)
+        if depth < 0:
+            return False
+    return depth == 0
+
+
+def test_escape_latex_specials():
+    assert escape_latex(SPECIALS) == (
+        r"50\% \& \$5 \#1 a\_b \{x\} \textasciitilde{}y \textasciicircum{}z C:\textbackslash{}tmp"
+    )
+
+
+def test_bold_is_converted_after_escaping():
+    assert escape_latex("cut **p95_latency** by **40%**") == r"cut \textbf{p95\_latency} by \textbf{40\%}"
+    assert escape_latex("a ** b") == "a ** b"
+
+
+def test_urls_are_escaped_for_href():
+    latex = render_resume(RESUME)
+    href = r"\href{https://github.com/jane_doe/\%7Eledger?tab=1&q=a\%20b\#top\%7B\%7D\%5E}"
+    assert latex.count(href) == 2  # contact line and project heading
+    assert r"\href{mailto:jane_doe@example.com}{\faEnvelope jane\_doe@example.com}" in latex
+
+
+def test_rendered_document_is_escaped_and_balanced():
+    latex = render_resume(RESUME)
+    assert r"\resumeItem{" + escape_latex(SPECIALS) + "}" in latex
+    assert r"{\Huge \scshape Jane \& Co}" in latex
+    assert r"\textbf{Languages}{: C\#, R \& D}" in latex
+    assert _balanced(latex)
+    for placeholder in ("FULL_NAME", "CONTACT_INFO", "_CONTENT"):
+        assert placeholder not in latex
+
+
+def test_empty_sections_are_removed():
+    latex = render_resume({**RESUME, "projects": [], "education": None})
+    assert r"\section{Projects}" not in latex and "% PROJECTS" not in latex
+    assert r"\section{Education}" not in latex
+    assert r"\section{Experience}" in latex and r"\section{Technical Skills}" in latex
+    assert _balanced(latex)
+
+
+def test_extra_sections_go_before_skills():
+    extra = [{"title": "Awards & Honors", "bullets": ["Top 1%", ""]}, {"title": "Empty", "bullets": []}]
+    latex = render_resume({**RESUME, "extra_sections": extra})
+    assert latex.index(r"\section{Awards \& Honors}") < latex.index("% SKILLS")
+    assert r"\resumeItem{Top 1\%}" in latex
+    assert r"\section{Empty}" not in latex
+
+
+def test_extra_sections_without_skills_go_before_end():
+    latex = render_resume({**RESUME, "skills": [], "extra_sections": [{"title": "Awards", "bullets": ["x"]}]})
+    assert "% SKILLS" not in latex
+    assert latex.index(r"\section{Awards}") < latex.index(r"\end{document}")
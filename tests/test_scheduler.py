@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from tal.scheduler import GeminiScheduler, ScheduledClient, SchedulerBusy, TokenBucket, priority, retryable
+
+
+class ApiError(Exception):
+    def __init__(self, code: int):
+        super().__init__(f"{code} error")
+        self.code = code
+
+
+def _wait_until(check, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not check():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_token_bucket_refills_and_caps_requests():
+    bucket = TokenBucket(60)  # one unit a second
+    bucket._updated = 0.0
+    bucket.take(60)
+    assert bucket.wait_for(1, now=0.0) == pytest.approx(1.0)
+    assert bucket.wait_for(1, now=1.0) == 0.0
+    # A request above capacity waits for a full bucket, not forever
+    assert bucket.wait_for(600, now=1.0) == pytest.approx(59.0)
+    assert TokenBucket(0).wait_for(10**6, now=0.0) == 0.0
+
+
+def test_priority_nesting_never_raises_priority():
+    with priority("batch"):
+        with priority("interactive") as effective:
+            assert effective == "batch"
+
+
+def test_batch_waiter_yields_to_a_later_interactive_one():
+    scheduler = GeminiScheduler(max_inflight=1)
+    scheduler.acquire(1)  # the only slot is taken
+    admitted = []
+
+    def call(prio: str):
+        with priority(prio):
+            scheduler.acquire(1)
+        admitted.append(prio)
+
+    batch = threading.Thread(target=call, args=("batch",))
+    batch.start()
+    _wait_until(lambda: scheduler.stats()["queued"]["batch"] == 1)
+    interactive = threading.Thread(target=call, args=("interactive",))
+    interactive.start()
+    _wait_until(lambda: scheduler.stats()["queued"]["interactive"] == 1)
+
+    scheduler.release(1)
+    _wait_until(lambda: admitted == ["interactive"])
+    scheduler.release(1)  # batch is not starved once the interactive work is done
+    _wait_until(lambda: admitted == ["interactive", "batch"])
+    batch.join(1)
+    interactive.join(1)
+
+
+def test_async_waiters_are_admitted_by_priority():
+    scheduler = GeminiScheduler(max_inflight=1)
+    admitted = []
+
+    async def call(prio: str):
+        with priority(prio):
+            await scheduler.acquire_async(1)
+        admitted.append(prio)
+        await asyncio.sleep(0.01)
+        scheduler.release(1)
+
+    async def main():
+        scheduler.acquire(1)
+        waiters = [asyncio.create_task(call(p)) for p in ("batch", "optional", "batch", "interactive")]
+        while sum(scheduler.stats()["queued"].values()) < 4:
+            await asyncio.sleep(0.005)
+        scheduler.release(1)
+        await asyncio.wait_for(asyncio.gather(*waiters), 2)
+
+    asyncio.run(main())
+    assert admitted == ["interactive", "optional", "batch", "batch"]
+
+
+def test_full_queue_sheds_calls():
+    scheduler = GeminiScheduler(max_inflight=1, queue_limit=1)
+    scheduler.acquire(1)
+    waiter = threading.Thread(target=scheduler.acquire, args=(1,))
+    waiter.start()
+    _wait_until(lambda: scheduler.stats()["queued"]["interactive"] == 1)
+    with pytest.raises(SchedulerBusy):
+        scheduler.acquire(1)
+    scheduler.release(1)
+    waiter.join(1)
+
+
+def test_retryable_errors():
+    assert retryable(ApiError(429)) and retryable(ApiError(503))
+    assert not retryable(ApiError(400))
+    assert retryable(RuntimeError("RESOURCE_EXHAUSTED: quota")) and not retryable(ValueError("bad json"))
+
+
+def test_retry_delays_use_full_jitter():
+    scheduler = GeminiScheduler(backoff=1.0, backoff_max=4.0)
+    delays = [scheduler.backoff_delay(5) for _ in range(200)]
+    assert 0 <= min(delays) and max(delays) <= 4.0
+
+
+def _client(errors: list, retries: int = 3):
+    calls = []
+
+    def generate_content(**kwargs):
+        calls.append(kwargs)
+        if errors:
+            raise errors.pop(0)
+        return SimpleNamespace(text="ok", usage_metadata=None)
+
+    inner = SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+    scheduler = GeminiScheduler(retries=retries, backoff=0)
+    return ScheduledClient(inner, scheduler), scheduler, calls
+
+
+def test_transient_errors_are_retried():
+    client, scheduler, calls = _client([ApiError(429), ApiError(503)])
+    assert client.models.generate_content(model="m", contents="hi").text == "ok"
+    assert len(calls) == 3 and scheduler.stats()["inflight"] == 0
+
+
+def test_retries_stop_after_the_limit():
+    client, scheduler, calls = _client([ApiError(503)] * 10, retries=3)
+    with pytest.raises(ApiError):
+        client.models.generate_content(model="m", contents="hi")
+    assert len(calls) == 4  # the first try plus three retries
+    assert scheduler.stats()["inflight"] == 0
+
+
+def test_final_errors_are_not_retried():
+    client, _, calls = _client([ApiError(400)])
+    with pytest.raises(ApiError):
+        client.models.generate_content(model="m", contents="hi")
+    assert len(calls) == 1
@@ -0,0 +1,77 @@
+import pytest
+
+from tal.skills import SkillIndex, gap_report
+
+LEXICON = {
+    "languages": {
+        "Go": ["golang", "~Go"],
+        "C": ["embedded c", "~C"],
+        "C++": ["cpp"],
+        "Java": [],
+        "JavaScript": ["js"],
+    },
+    "backend": {
+        "Kafka": ["apache kafka"],
+        "Kafka Streams": [],
+        "Ruby on Rails": ["rails"],
+    },
+    "data": {"Excel": ["ms excel", "=Excel"]},
+}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SkillIndex(LEXICON)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Languages: Python, Go, C", {"Go": 1, "C": 1}),
+    ("Go\n", {"Go": 1}),
+    ("Skills: C / Java", {"C": 1, "Java": 1}),
+    ("Built Go services", {}),
+    ("go to market", {}),
+    ("Reported to the C-suite", {}),
+    ("Plan C was a fallback for the team", {}),
+    ("golang and embedded c", {"Go": 1, "C": 1}),
+])
+def test_list_context_forms(index, text, expected):
+    assert dict(index.find(text)) == expected
+
+
+def test_exact_forms_are_case_sensitive(index):
+    assert dict(index.find("Excel, ms excel")) == {"Excel": 2}
+    assert dict(index.find("you will excel here")) == {}
+
+
+def test_word_boundaries(index):
+    assert dict(index.find("Java and JavaScript")) == {"Java": 1, "JavaScript": 1}
+    assert dict(index.find("C++, cpp")) == {"C++": 2}
+    assert dict(index.find("rails, Railsback")) == {"Ruby on Rails": 1}
+
+
+def test_overlapping_aliases_take_the_leftmost_longest(index):
+    assert dict(index.find("Kafka Streams")) == {"Kafka Streams": 1}
+    assert dict(index.find("Apache Kafka Streams")) == {"Kafka": 1}
+    assert dict(index.find("Ruby on Rails")) == {"Ruby on Rails": 1}
+
+
+def test_gap_report_scores():
+    report = gap_report("Skills: Python, Figma", "Python, Go and Kubernetes. Python daily.")
+    assert report["jd_skills"] == ["Python", "Go", "Kubernetes"]
+    assert report["matched_skills"] == ["Python"]
+    assert report["missing_keywords"] == ["Go", "Kubernetes"]
+    assert report["irrelevant_skills"] == ["Figma"]
+    assert report["keyword_coverage"] == 0.5
+    # 100 * (0.7 * 0.5 + 0.3 * (1 - 1/2)) before, 100 * (0.7 * 0.5 + 0.3) after
+    assert (report["score_before"], report["score_after"]) == (50, 65)
+
+
+def test_gap_report_without_jd_skills_is_neutral():
+    report = gap_report("Ten years in retail", "A friendly team.")
+    assert report["keyword_coverage"] is None
+    assert report["score_before"] == report["score_after"] == 72
+
+
+def test_word_like_skills_are_never_off_target():
+    report = gap_report("Skills: Go, C, Swift, Figma", "Python and Django")
+    assert report["irrelevant_skills"] == ["Figma"]